@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import re
+
+from markdown_utilities import hash_file, place_file, read_json, write_json_atomic
+
+ASSET_STATE_VERSION = 1
+DEFAULT_ASSET_STATE_PATH = os.path.join(".ssg-cache", "assets.json")
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+FINGERPRINT_LENGTH = 10
+ATTRIBUTE_PATTERN = re.compile(r"""\b(href|src)=(["'])([^"']*)\2""")
+
+# URL of every static file mapped to its fingerprinted URL. Set by the build
+# before pages are rendered; empty means links are left exactly as written.
+_asset_urls = {}
+_asset_version = ""
+
+def set_asset_urls(urls):
+    global _asset_urls, _asset_version
+    _asset_urls = dict(urls)
+    _asset_version = ""
+    if _asset_urls:
+        encoded = json.dumps(_asset_urls, sort_keys=True).encode("utf-8")
+        _asset_version = hashlib.sha256(encoded).hexdigest()
+
+def asset_urls():
+    return _asset_urls
+
+def asset_version():
+    # Changes whenever any asset URL does, so caches of rendered pages can key on it
+    return _asset_version
+
+def asset_url(url):
+    return _asset_urls.get(url, url)
+
+def rewrite_asset_urls(html):
+    # Rewrites href/src attribute values that name a static file, e.g. the
+    # stylesheet link in the template
+    if not _asset_urls:
+        return html
+    def replace(match):
+        name, quote, url = match.groups()
+        return f"{name}={quote}{asset_url(url)}{quote}"
+    return ATTRIBUTE_PATTERN.sub(replace, html)
+
+def fingerprinted_path(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+def _load_asset_state(state_path):
+    state = read_json(state_path)
+    if not isinstance(state, dict) or state.get("version") != ASSET_STATE_VERSION:
+        state = {"version": ASSET_STATE_VERSION, "files": {}}
+    return state
+
+def fingerprint_assets(src_dir, dest_dir, state_path=DEFAULT_ASSET_STATE_PATH, link_mode="copy",
+                       compressor=None):
+    # Places each static file a second time under a name carrying its content
+    # hash, so the file at that name never changes and can be cached forever.
+    # Hashes are reused while a file's size and mtime match the last build.
+    # Returns (urls, placed): the URL mapping and the new fingerprinted paths.
+    state = _load_asset_state(state_path)
+    files = {}
+    urls = {}
+    placed = []
+    for root, dirs, names in os.walk(src_dir):
+        dirs.sort()
+        rel_root = os.path.relpath(root, src_dir)
+        for name in sorted(names):
+            rel_path = os.path.normpath(os.path.join(rel_root, name))
+            src_path = os.path.join(src_dir, rel_path)
+            stat = os.stat(src_path)
+            entry = state["files"].get(rel_path)
+            if (entry is not None and entry["size"] == stat.st_size
+                    and entry["mtime_ns"] == stat.st_mtime_ns):
+                digest = entry["hash"]
+            else:
+                digest = hash_file(src_path)
+            files[rel_path] = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+            fingerprinted = fingerprinted_path(rel_path, digest)
+            dest_path = os.path.join(dest_dir, fingerprinted)
+            # The name is derived from the bytes, so an existing file is current
+            is_new = not os.path.exists(dest_path)
+            if is_new:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                place_file(src_path, dest_path, link_mode)
+                placed.append(fingerprinted)
+            if compressor is not None:
+                compressor.submit_file(dest_path, changed=is_new)
+            urls["/" + rel_path.replace(os.sep, "/")] = "/" + fingerprinted.replace(os.sep, "/")
+
+    write_json_atomic(state_path, {"version": ASSET_STATE_VERSION, "files": files})
+    return urls, placed
+
+def write_asset_manifest(dest_dir, urls):
+    # Returns "added", "changed" or "unchanged", like write_page
+    path = os.path.join(dest_dir, ASSET_MANIFEST_NAME)
+    previous = read_json(path)
+    if previous == urls:
+        return "unchanged"
+    write_json_atomic(path, urls)
+    return "added" if previous is None else "changed"
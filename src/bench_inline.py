@@ -0,0 +1,46 @@
+import sys
+import time
+
+from textnode import (TextNode, split_nodes_delimiter, split_nodes_image,
+                      split_nodes_link, text_to_textnodes)
+
+def split_pipeline(text):
+    # The five-pass pipeline text_to_textnodes used before the single-pass scanner.
+    # Both agree on this corpus; they differ where links and delimiters interleave.
+    nodes = [TextNode(text, "text")]
+    nodes = split_nodes_delimiter(nodes, "**", "bold")
+    nodes = split_nodes_delimiter(nodes, "*", "italic")
+    nodes = split_nodes_delimiter(nodes, "`", "code")
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+def link_dense_paragraph(links):
+    return " ".join(
+        f"see [page {i}](/docs/page-{i}) and ![shot {i}](/images/{i}.png) with **note {i}**"
+        for i in range(links)
+    )
+
+def best_time(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(arg) for arg in argv] or [10, 100, 1000, 4000]
+    print(f"{'links':>8} {'split pipeline':>16} {'single pass':>14} {'speedup':>9}")
+    for links in sizes:
+        text = link_dense_paragraph(links)
+        if split_pipeline(text) != text_to_textnodes(text):
+            raise AssertionError(f"Tokenizer output differs for {links} links")
+        repeat = 5 if links <= 1000 else 2
+        old = best_time(split_pipeline, text, repeat)
+        new = best_time(text_to_textnodes, text, repeat)
+        print(f"{links:>8} {old * 1000:>14.2f}ms {new * 1000:>12.2f}ms {old / new:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import sys
+import tracemalloc
+
+from htmlnode import count_nodes
+from markdown_core import markdown_to_html_node
+from textnode import text_to_textnodes
+
+def sample_markdown(sections):
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}")
+        parts.append(f"Some **bold {i}** text, an *aside*, `code {i}` and a [link](/page/{i}).")
+        parts.append("\n".join(f"* item {j} with *emphasis*" for j in range(5)))
+        parts.append("\n".join(f"{j}. step {j}" for j in range(1, 4)))
+    return "\n\n".join(parts)
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return result, retained
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sections = int(argv[0]) if argv else 2000
+    markdown = sample_markdown(sections)
+
+    tree, tree_bytes = measure(lambda: markdown_to_html_node(markdown))
+    html_nodes = count_nodes(tree)
+    paragraphs = [block for block in markdown.split("\n\n") if block.startswith("Some")]
+    text_nodes, text_bytes = measure(lambda: [text_to_textnodes(p) for p in paragraphs])
+    text_node_count = sum(len(nodes) for nodes in text_nodes)
+
+    print(f"HTML nodes: {html_nodes:>8}  retained {tree_bytes / html_nodes:8.1f} bytes/node")
+    print(f"Text nodes: {text_node_count:>8}  retained {text_bytes / text_node_count:8.1f} bytes/node")
+
+if __name__ == "__main__":
+    main()
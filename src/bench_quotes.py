@@ -0,0 +1,55 @@
+import sys
+import time
+
+from markdown_core import MAX_QUOTE_DEPTH, markdown_to_html_node
+
+# Adversarial blockquote inputs. Each builder returns markdown whose size is
+# linear in n; linear parsing shows as a flat ns/byte column as n doubles.
+def deep_line(n):
+    # One line with n nesting markers
+    return ">" * n + " bottom"
+
+def staircase(n):
+    # Nesting climbs to the depth limit and drops back, over and over
+    return "\n".join("> " * (1 + i % MAX_QUOTE_DEPTH) + f"step {i}" for i in range(n))
+
+def huge_quote(n):
+    return "\n".join(f"> line {i} with **bold** and `code` and a [link](/l/{i})" for i in range(n))
+
+def many_fences(n):
+    lines = []
+    for i in range(n):
+        lines.extend(["> ```", f"> > not a quote {i}", "> ```", f"> text {i}"])
+    return "\n".join(lines)
+
+def unclosed_fences(n):
+    # Every fence opens at a deeper level than the last, and none close
+    return "\n".join("> " * (1 + i % MAX_QUOTE_DEPTH) + "```" for i in range(n))
+
+CASES = (deep_line, staircase, huge_quote, many_fences, unclosed_fences)
+
+def best_time(markdown, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        markdown_to_html_node(markdown).to_html()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(arg) for arg in argv] or [1000, 2000, 4000, 8000, 16000]
+    print(f"{'case':<16} {'n':>7} {'bytes':>10} {'time':>10} {'ns/byte':>9} {'growth':>7}")
+    for case in CASES:
+        previous = None
+        for n in sizes:
+            markdown = case(n)
+            seconds = best_time(markdown)
+            # Time ratio against the previous size; ~2.0 per doubling is linear
+            growth = f"{seconds / previous:.2f}x" if previous else ""
+            print(f"{case.__name__:<16} {n:>7} {len(markdown):>10} {seconds * 1000:>8.2f}ms "
+                  f"{seconds * 1e9 / len(markdown):>9.1f} {growth:>7}")
+            previous = seconds
+
+if __name__ == "__main__":
+    main()
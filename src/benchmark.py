@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from block_scanner import scan_blocks
+from markdown_core import markdown_to_html_node
+from markdown_utilities import extract_title
+from synthetic_corpus import add_corpus_arguments, corpus_options, generate_corpus
+from template import Template
+from textnode import markdown_to_blocks, text_to_textnodes
+
+STAGES = ("read", "markdown_to_blocks", "text_to_textnodes", "markdown_to_html_node",
+          "to_html", "template", "write")
+# markdown_to_blocks and text_to_textnodes run inside markdown_to_html_node; they
+# are timed separately for the breakdown but left out of the throughput total.
+PIPELINE_STAGES = ("read", "markdown_to_html_node", "to_html", "template", "write")
+
+BENCH_TEMPLATE = ("<!DOCTYPE html><html><head><title>{{ Title }}</title></head>"
+                  "<body><article>{{ Content }}</article></body></html>")
+
+def run_benchmark(paths, out_dir, repeat=1):
+    # Each stage is timed on its own so a regression points at one function.
+    timings = {stage: 0.0 for stage in STAGES}
+    template = Template(BENCH_TEMPLATE)
+    input_bytes = 0
+    output_bytes = 0
+    clock = time.perf_counter
+
+    for _ in range(repeat):
+        for index, path in enumerate(paths):
+            start = clock()
+            with open(path, 'r') as f:
+                markdown = f.read()
+            timings["read"] += clock() - start
+
+            start = clock()
+            markdown_to_blocks(markdown)
+            timings["markdown_to_blocks"] += clock() - start
+
+            inline_texts = [block.text(markdown) for block in scan_blocks(markdown)
+                            if block.kind == "paragraph"]
+            start = clock()
+            for text in inline_texts:
+                text_to_textnodes(text)
+            timings["text_to_textnodes"] += clock() - start
+
+            start = clock()
+            html_node = markdown_to_html_node(markdown)
+            timings["markdown_to_html_node"] += clock() - start
+
+            start = clock()
+            html = html_node.to_html()
+            timings["to_html"] += clock() - start
+
+            start = clock()
+            page = template.render({"Title": extract_title(markdown), "Content": html})
+            timings["template"] += clock() - start
+
+            start = clock()
+            with open(os.path.join(out_dir, f"{index}.html"), 'w') as f:
+                f.write(page)
+            timings["write"] += clock() - start
+
+            input_bytes += len(markdown.encode("utf-8"))
+            output_bytes += len(page.encode("utf-8"))
+
+    total = sum(timings[stage] for stage in PIPELINE_STAGES)
+    pages = len(paths) * repeat
+    return {
+        "pages": pages,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "total_seconds": total,
+        "pages_per_second": pages / total if total else 0.0,
+        "input_mb_per_second": input_bytes / total / 1e6 if total else 0.0,
+        "stages": {
+            stage: {"seconds": seconds, "share": seconds / total if total else 0.0}
+            for stage, seconds in timings.items()
+        },
+    }
+
+def format_report(result, baseline=None):
+    lines = [f"{result['pages']} pages, {result['input_bytes'] / 1e6:.2f} MB in, "
+             f"{result['output_bytes'] / 1e6:.2f} MB out",
+             f"{result['pages_per_second']:.1f} pages/s, {result['input_mb_per_second']:.2f} MB/s"]
+    for stage, data in result["stages"].items():
+        line = f"  {stage:<24}{data['seconds'] * 1000:10.1f} ms {data['share'] * 100:6.1f}%"
+        if baseline and stage in baseline["stages"] and baseline["stages"][stage]["seconds"]:
+            ratio = data["seconds"] / baseline["stages"][stage]["seconds"]
+            line += f"  {ratio:5.2f}x vs baseline"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline stage by stage.")
+    add_corpus_arguments(parser)
+    parser.add_argument("--content", help="benchmark an existing content/ tree instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.content:
+            paths = sorted(
+                os.path.join(root, name)
+                for root, _, files in os.walk(args.content)
+                for name in files if name.endswith(".md")
+            )
+            corpus = {"content": args.content}
+        else:
+            corpus = corpus_options(args)
+            paths = generate_corpus(os.path.join(tmp, "content"), **corpus)
+        out_dir = os.path.join(tmp, "public")
+        os.makedirs(out_dir)
+        result = run_benchmark(paths, out_dir, repeat=args.repeat)
+
+    result["corpus"] = corpus
+    result["python"] = platform.python_version()
+    result["timestamp"] = time.time()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print(format_report(result, baseline))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=1)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
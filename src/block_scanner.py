@@ -0,0 +1,116 @@
+import re
+
+ORDERED_ITEM_PATTERN = re.compile(r"(\d+)\. ")
+
+class Block:
+    # A typed block found by scan_blocks. start/end delimit the stripped block
+    # in the source; lines holds (start, end) spans of each line's content,
+    # already past the list marker for lists and past the "#"s for headings.
+    def __init__(self, kind, level, start, end, lines):
+        self.kind = kind
+        self.level = level
+        self.start = start
+        self.end = end
+        self.lines = lines
+
+    def text(self, source):
+        return source[self.start:self.end]
+
+    def line_texts(self, source):
+        return [source[start:end] for start, end in self.lines]
+
+    def __repr__(self):
+        return (f"Block({self.kind}, level={self.level}, start={self.start}, "
+                f"end={self.end}, lines={self.lines})")
+
+def scan_blocks(markdown):
+    # Blocks are separated by empty lines, exactly like markdown_to_blocks
+    # splitting on "\n\n"; each block is classified as soon as it is closed.
+    lines = []
+    position = 0
+    while True:
+        newline = markdown.find("\n", position)
+        line_end = len(markdown) if newline == -1 else newline
+        if line_end > position:
+            lines.append((position, line_end))
+        elif lines:
+            block = _close_block(markdown, lines)
+            if block is not None:
+                yield block
+            lines = []
+        if newline == -1:
+            break
+        position = newline + 1
+
+    if lines:
+        block = _close_block(markdown, lines)
+        if block is not None:
+            yield block
+
+def classify_block(block):
+    # Classifies one already-split block string without any stripping
+    lines = []
+    position = 0
+    for line in block.split("\n"):
+        lines.append((position, position + len(line)))
+        position += len(line) + 1
+    return _classify(block, 0, len(block), lines)
+
+def _close_block(source, lines):
+    # Strip surrounding whitespace the way str.strip() would on the block text
+    first = 0
+    last = len(lines) - 1
+    while first <= last and source[lines[first][0]:lines[first][1]].isspace():
+        first += 1
+    while last >= first and source[lines[last][0]:lines[last][1]].isspace():
+        last -= 1
+    if first > last:
+        return None
+    lines = lines[first:last + 1]
+
+    start, first_end = lines[0]
+    first_line = source[start:first_end]
+    start += len(first_line) - len(first_line.lstrip())
+    last_start, end = lines[-1]
+    last_line = source[last_start:end]
+    end -= len(last_line) - len(last_line.rstrip())
+    lines[0] = (start, lines[0][1])
+    lines[-1] = (lines[-1][0], end)
+
+    return _classify(source, start, end, lines)
+
+def _classify(source, start, end, lines):
+    if source.startswith("#", start):
+        content = start
+        while content < end and source[content] == "#":
+            content += 1
+        if source.startswith(" ", content, end):
+            return Block("heading", content - start, start, end, [(content, end)])
+
+    if source.startswith("```", start, end) and source.endswith("```", start, end):
+        content_start = start
+        while content_start < end and source[content_start] == "`":
+            content_start += 1
+        content_end = end
+        while content_end > content_start and source[content_end - 1] == "`":
+            content_end -= 1
+        return Block("code", 0, start, end, [(content_start, content_end)])
+
+    if all(source.startswith(">", line_start, line_end) for line_start, line_end in lines):
+        return Block("quote", 0, start, end, lines)
+
+    if all(source.startswith(("* ", "- "), line_start, line_end)
+           for line_start, line_end in lines):
+        return Block("unordered_list", 0, start, end,
+                     [(line_start + 2, line_end) for line_start, line_end in lines])
+
+    items = []
+    for number, (line_start, line_end) in enumerate(lines, start=1):
+        match = ORDERED_ITEM_PATTERN.match(source, line_start, line_end)
+        if match is None or match.end() == line_end or int(match.group(1)) != number:
+            break
+        items.append((match.end(), line_end))
+    else:
+        return Block("ordered_list", 0, start, end, items)
+
+    return Block("paragraph", 0, start, end, lines)
@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+
+from markdown_utilities import write_json_atomic
+
+PAGE_STAGES = ("read", "cache", "block_parse", "inline_parse", "render", "write", "compress")
+
+QUIET = 0
+NORMAL = 1
+VERBOSE = 2
+
+class PageStats:
+    def __init__(self, path):
+        self.path = path
+        self.stages = dict.fromkeys(PAGE_STAGES, 0.0)
+        self.nodes = 0
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "total": sum(self.stages.values()),
+            "stages": dict(self.stages),
+            "nodes": self.nodes,
+        }
+
+class BuildStats:
+    def __init__(self, verbosity=NORMAL):
+        self.verbosity = verbosity
+        self.pages = []
+        self.started = time.perf_counter()
+
+    def add_page(self, page):
+        # Accepts PageStats or the dict form that worker processes send back
+        record = page if isinstance(page, dict) else page.to_dict()
+        self.pages.append(record)
+        if self.verbosity >= VERBOSE:
+            stages = " ".join(f"{name}={record['stages'][name] * 1000:.1f}ms" for name in PAGE_STAGES)
+            print(f"{record['path']}: {record['total'] * 1000:.1f}ms, {record['nodes']} nodes ({stages})")
+        elif self.verbosity >= NORMAL:
+            print(f"Generated {record['path']}")
+
+    def report(self, slowest=20):
+        totals = dict.fromkeys(PAGE_STAGES, 0.0)
+        for record in self.pages:
+            for name in PAGE_STAGES:
+                totals[name] += record["stages"][name]
+        return {
+            "pages": len(self.pages),
+            "wall_seconds": time.perf_counter() - self.started,
+            "page_seconds": sum(totals.values()),
+            "nodes": sum(record["nodes"] for record in self.pages),
+            "stages": totals,
+            "slowest": sorted(self.pages, key=lambda record: record["total"], reverse=True)[:slowest],
+        }
+
+    def write_report(self, report_path, slowest=20):
+        report = self.report(slowest)
+        write_json_atomic(report_path, report)
+        return report
+
+def format_report(report, slowest=5):
+    lines = [f"Built {report['pages']} page(s) in {report['wall_seconds']:.2f}s "
+             f"({report['page_seconds']:.2f}s page time, {report['nodes']} nodes)"]
+    for name, seconds in report["stages"].items():
+        lines.append(f"  {name:<14}{seconds * 1000:10.1f} ms")
+    if report["slowest"]:
+        lines.append("Slowest pages:")
+        for record in report["slowest"][:slowest]:
+            lines.append(f"  {record['total'] * 1000:10.1f} ms {record['nodes']:8d} nodes  {record['path']}")
+    return "\n".join(lines)
@@ -0,0 +1,117 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip sidecars without it
+    brotli = None
+
+SIDECAR_SUFFIXES = (".gz", ".br")
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt",
+                           ".map", ".ico")
+
+def available_formats():
+    return ("gz", "br") if brotli is not None else ("gz",)
+
+def _compress(data, fmt):
+    if fmt == "gz":
+        # mtime=0 keeps the bytes stable, so unchanged input yields an unchanged sidecar
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if fmt == "br":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"Unknown compression format: {fmt}")
+
+def remove_sidecars(path):
+    # For writers without a compressor: sidecars of the old content would
+    # otherwise be served in place of the new file
+    for suffix in SIDECAR_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def _write_file(path, data):
+    # Rename into place: the sidecar may be hardlinked into an older generation
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class Compressor:
+    # Writes precompressed .gz/.br siblings for nginx gzip_static and
+    # brotli_static from bytes the caller already holds. zlib and brotli
+    # release the GIL, so a thread pool compresses files in parallel; with
+    # workers=0 everything runs inline, as in page worker processes.
+    def __init__(self, formats=None, min_size=1024, workers=None):
+        self.formats = tuple(formats) if formats is not None else available_formats()
+        for fmt in self.formats:
+            if fmt == "br" and brotli is None:
+                raise ValueError("Brotli sidecars need the brotli package.")
+        self.min_size = min_size
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers) if workers != 0 else None
+        self.futures = []
+
+    def sidecars(self, path):
+        return [f"{path}.{fmt}" for fmt in self.formats]
+
+    def wants(self, path):
+        return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+    def submit(self, path, data, changed=True):
+        # changed=False means the caller left path as it was; its sidecars
+        # are still current unless path has been rewritten since they were.
+        if not self.wants(path) or not self._stale(path, len(data), changed):
+            return
+        for fmt, sidecar in zip(self.formats, self.sidecars(path)):
+            if self.pool is None:
+                self._write(sidecar, data, fmt)
+            else:
+                self.futures.append(self.pool.submit(self._write, sidecar, data, fmt))
+
+    def submit_file(self, path, changed=True):
+        # Reads path only when a sidecar actually needs writing
+        if not self.wants(path) or not self._stale(path, os.path.getsize(path), changed):
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.submit(path, data)
+
+    def _stale(self, path, size, changed):
+        sidecars = self.sidecars(path)
+        if size < self.min_size:
+            # Too small to be worth it; drop sidecars left from a larger version
+            for sidecar in sidecars:
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+            return False
+        if changed:
+            return True
+        # Watch mode, the server or a build without a compressor may have
+        # rewritten path after its sidecars were made
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        for sidecar in sidecars:
+            try:
+                if mtime is not None and os.stat(sidecar).st_mtime_ns < mtime:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def _write(self, sidecar, data, fmt):
+        _write_file(sidecar, _compress(data, fmt))
+
+    def wait(self):
+        # Blocks until every submitted sidecar is on disk; re-raises the first failure
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
@@ -0,0 +1,190 @@
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+from assets import asset_urls, asset_version
+from images import IMAGE_EXTENSIONS
+from markdown_utilities import hash_file, read_json, write_json_atomic
+
+DEPGRAPH_VERSION = 2
+DEFAULT_DEPGRAPH_PATH = os.path.join(".ssg-cache", "depgraph.json")
+# Edge kinds; any of them makes the output dirty whenever the input changes
+SOURCE = "source"
+TEMPLATE = "template"
+ASSET = "asset"
+PAGE = "page"
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+class DependencyGraph:
+    # Persisted edges from every output to the inputs it was rendered from:
+    # its source, the template files (and layout candidates) that shaped it
+    # and the static files whose size or name it has baked in. Inputs are
+    # stamped with size, mtime and hash when recorded, so the graph can say
+    # which inputs changed since and which outputs that makes dirty.
+    def __init__(self, path=DEFAULT_DEPGRAPH_PATH, content_dir="content", static_dir="static",
+                 public_dir="public"):
+        self.path = path
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.public_dir = public_dir
+        state = read_json(path)
+        if not isinstance(state, dict) or state.get("version") != DEPGRAPH_VERSION:
+            state = {"outputs": {}, "inputs": {}, "reasons": {}}
+        self.outputs = state["outputs"]
+        self.inputs = state["inputs"]
+        self.reasons = state["reasons"]
+        self.dirty = False
+        self._dependents = None
+        self._originals = (None, {})
+
+    def dependents(self):
+        # Reverse edges: input -> [(output, kind)]
+        if self._dependents is None:
+            self._dependents = {}
+            for output, edges in self.outputs.items():
+                for path, kind in edges:
+                    self._dependents.setdefault(path, []).append((output, kind))
+        return self._dependents
+
+    def _current(self, path):
+        # [mtime_ns, size, hash] of path now, or None if it does not exist;
+        # the hash is only recomputed when size or mtime moved
+        stamp = _stamp(path)
+        if stamp is None:
+            return None
+        known = self.inputs.get(path)
+        if known is not None and known[:2] == stamp:
+            return known
+        return stamp + [hash_file(path)]
+
+    def changed_inputs(self):
+        # {input: "added" | "removed" | "changed"} since each was recorded
+        changed = {}
+        for path, known in self.inputs.items():
+            current = self._current(path)
+            if known is None and current is not None:
+                changed[path] = "added"
+            elif known is not None and current is None:
+                changed[path] = "removed"
+            elif known is not None and current[2] != known[2]:
+                changed[path] = "changed"
+            elif known is not None and current is not known:
+                # Same contents under a new mtime: remember the new stamp
+                self.inputs[path] = current
+                self.dirty = True
+        return changed
+
+    def dirty_outputs(self, changed):
+        # The minimal set of outputs to rebuild for changed inputs, given as
+        # {path: change} or a list of paths. Returns {output: [[input, kind, change]]}
+        if not isinstance(changed, dict):
+            changed = {os.path.normpath(path): "changed" for path in changed}
+        dependents = self.dependents()
+        dirty = {}
+        for path, change in changed.items():
+            for output, kind in dependents.get(path, ()):
+                dirty.setdefault(output, []).append([path, kind, change])
+        return dirty
+
+    def output_key(self, dest_path, build_dir):
+        # Outputs are named by where they are published, even when built
+        # into a staging directory
+        return os.path.normpath(os.path.join(self.public_dir, os.path.relpath(dest_path, build_dir)))
+
+    def record(self, output, edges, reasons):
+        # Replaces the edges of output; reasons say why it was rebuilt
+        edges = sorted({(os.path.normpath(path), kind) for path, kind in edges})
+        self.outputs[output] = [list(edge) for edge in edges]
+        self.reasons[output] = reasons
+        for path, _ in edges:
+            self.inputs[path] = self._current(path)
+        self.dirty = True
+        self._dependents = None
+
+    def remove(self, output):
+        if self.outputs.pop(output, None) is not None:
+            self.reasons.pop(output, None)
+            self.dirty = True
+            self._dependents = None
+
+    def page_edges(self, from_path, dest_path, public_dir, templates, references):
+        # Every input the page at dest_path was rendered from
+        edges = [(from_path, SOURCE)]
+        for path in templates.candidates(from_path):
+            edges.append((path, TEMPLATE))
+        template = templates.for_page(from_path)
+        edges.extend((path, TEMPLATE) for path in templates.files(template))
+        # A static file only shapes the page through the width and height of
+        # an image in its body, or through a fingerprinted name. Link targets
+        # coming or going never change the page; the link checker sees them.
+        page_url = "/" + os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+        fingerprinted = bool(asset_urls())
+        for url in references:
+            edges.extend(edge for edge in self.resolve(url, page_url)
+                         if fingerprinted or edge[0].lower().endswith(IMAGE_EXTENSIONS))
+        if fingerprinted:
+            for url in template.references:
+                edges.extend(self.resolve(url, page_url))
+        return edges
+
+    def resolve(self, url, page_url):
+        # [(static file, ASSET)] for an internal URL naming one, else []
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path:
+            return []
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(page_url), parts.path))
+        if parts.path.endswith("/") and not path.endswith("/"):
+            path += "/"
+        # Fingerprinted URLs stand for the static file they were made from
+        version, originals = self._originals
+        if version != asset_version():
+            originals = {fingerprinted: original for original, fingerprinted in asset_urls().items()}
+            self._originals = (asset_version(), originals)
+        path = originals.get(path, path)
+        if path.endswith((".html", "/")) or not posixpath.splitext(path)[1]:
+            return []
+        return [(os.path.join(self.static_dir, *path.lstrip("/").split("/")), ASSET)]
+
+    def explain(self, path):
+        # Lines saying why an output was last rebuilt and what it depends on,
+        # or which outputs depend on an input
+        path = os.path.normpath(path)
+        lines = []
+        if path in self.outputs:
+            changed = self.changed_inputs()
+            lines.append(f"{path}")
+            lines.append("  last rebuilt because:")
+            for input_path, kind, change in self.reasons.get(path, []):
+                lines.append(f"    {input_path} ({kind}) {change}")
+            lines.append("  depends on:")
+            for input_path, kind in self.outputs[path]:
+                note = ""
+                if input_path in changed:
+                    note = f"  [{changed[input_path]} since, will rebuild]"
+                elif self.inputs.get(input_path) is None:
+                    note = "  [missing]"
+                lines.append(f"    {input_path} ({kind}){note}")
+        dependents = self.dependents().get(path)
+        if dependents:
+            lines.append(f"{path} is an input of:")
+            for output, kind in sorted(dependents):
+                lines.append(f"    {output} ({kind})")
+        if not lines:
+            lines.append(f"{path} is not in the dependency graph")
+        return lines
+
+    def save(self):
+        if self.dirty:
+            # Inputs nothing depends on any more are forgotten
+            dependents = self.dependents()
+            for path in [path for path in self.inputs if path not in dependents]:
+                del self.inputs[path]
+            write_json_atomic(self.path, {"version": DEPGRAPH_VERSION, "outputs": self.outputs,
+                                          "inputs": self.inputs, "reasons": self.reasons})
+            self.dirty = False
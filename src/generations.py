@@ -0,0 +1,103 @@
+import os
+import re
+import shutil
+
+GENERATION_PATTERN = re.compile(r"gen-(\d+)$")
+
+def generations_dir(public_dir):
+    # Generations live next to the public path so the swap never crosses filesystems
+    return os.path.normpath(public_dir) + ".generations"
+
+def _generation_path(public_dir, number):
+    return os.path.join(generations_dir(public_dir), f"gen-{number:06d}")
+
+def list_generations(public_dir):
+    # Returns the published and staged generation paths, oldest first
+    try:
+        names = os.listdir(generations_dir(public_dir))
+    except FileNotFoundError:
+        return []
+    numbers = sorted(int(match.group(1)) for match in map(GENERATION_PATTERN.match, names) if match)
+    return [_generation_path(public_dir, number) for number in numbers]
+
+def current_generation(public_dir):
+    # The generation public_dir points at, or None when it is not a generation link
+    if not os.path.islink(public_dir):
+        return None
+    target = os.readlink(public_dir)
+    return os.path.normpath(os.path.join(os.path.dirname(public_dir), target))
+
+def _link_tree(src_dir, dest_dir):
+    # Hardlinks every file of the previous generation into the new one, so
+    # unchanged outputs cost a directory entry instead of a copy. Writers
+    # replace files by rename, which never touches the shared inode.
+    for root, dirs, files in os.walk(src_dir):
+        target_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            src_path = os.path.join(root, name)
+            dest_path = os.path.join(target_root, name)
+            try:
+                os.link(src_path, dest_path)
+            except OSError:
+                shutil.copy2(src_path, dest_path)
+
+def stage_generation(public_dir):
+    # Creates the next generation directory seeded with the live output
+    generations = list_generations(public_dir)
+    number = 1
+    if generations:
+        number = int(GENERATION_PATTERN.match(os.path.basename(generations[-1])).group(1)) + 1
+    if os.path.isdir(public_dir) and not os.path.islink(public_dir):
+        # A plain directory from an unstaged build is adopted as the
+        # generation before this one when the new one is published
+        number += 1
+    staging_dir = _generation_path(public_dir, number)
+    os.makedirs(staging_dir)
+    if os.path.isdir(public_dir):
+        _link_tree(public_dir, staging_dir)
+    return staging_dir
+
+def publish_generation(public_dir, generation):
+    # Points public_dir at generation by renaming a fresh symlink over it:
+    # a reader sees either the old tree or the new one, never a mix.
+    public_dir = os.path.normpath(public_dir)
+    if os.path.isdir(public_dir) and not os.path.islink(public_dir):
+        number = int(GENERATION_PATTERN.match(os.path.basename(generation)).group(1))
+        os.rename(public_dir, _generation_path(public_dir, number - 1))
+    link_path = public_dir + ".swap"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(os.path.relpath(generation, os.path.dirname(public_dir) or "."), link_path)
+    os.replace(link_path, public_dir)
+
+def discard_generation(generation):
+    shutil.rmtree(generation, ignore_errors=True)
+
+def prune_generations(public_dir, keep=3):
+    # Deletes the oldest generations beyond keep; the live one always stays
+    current = current_generation(public_dir)
+    generations = list_generations(public_dir)
+    removed = []
+    for generation in generations[:max(0, len(generations) - keep)]:
+        if generation != current:
+            discard_generation(generation)
+            removed.append(generation)
+    return removed
+
+def rollback(public_dir, state_paths=()):
+    # Publishes the generation before the live one and returns it. The build
+    # state in state_paths describes the newer generation, so it is deleted
+    # and the next build, incremental or not, starts over.
+    current = current_generation(public_dir)
+    generations = list_generations(public_dir)
+    if current not in generations:
+        raise ValueError(f"{public_dir} does not point at an output generation.")
+    index = generations.index(current)
+    if index == 0:
+        raise ValueError("No older generation to roll back to.")
+    publish_generation(public_dir, generations[index - 1])
+    for path in state_paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return generations[index - 1]
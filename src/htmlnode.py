@@ -1,13 +1,29 @@
+import sys
+from types import MappingProxyType
+
+# Shared by every node that has no children or props; both are read-only so
+# one node can never leak changes into another.
+EMPTY_CHILDREN = ()
+EMPTY_PROPS = MappingProxyType({})
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
-        self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self.children = children if children else EMPTY_CHILDREN
+        self.props = props if props else EMPTY_PROPS
 
     def to_html(self):
         raise NotImplementedError("Subclasses should implement this method.")
 
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
+
     def props_to_html(self):
         if not self.props:
             return ""
@@ -18,6 +34,8 @@ class HTMLNode:
                 f"children={self.children}, props={self.props})")
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         if value is None and tag not in ["hr", "br", "img"]:
             raise ValueError("LeafNode must have a value.")
@@ -42,6 +60,8 @@ class LeafNode(HTMLNode):
         return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
         if tag is None:
             raise ValueError("ParentNode must have a tag.")
@@ -50,14 +70,35 @@ class ParentNode(HTMLNode):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("ParentNode must have a tag.")
-        if not self.children:
-            raise ValueError("ParentNode must have children.")
+        return "".join(self.iter_html())
 
-        props_html = self.props_to_html()
-        if props_html:
-            props_html = " " + props_html
+    def iter_html(self):
+        # Walks the tree with an explicit stack and yields each tag and leaf as
+        # it is reached, so no subtree is ever built up as an intermediate string.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("ParentNode must have a tag.")
+                if not node.children:
+                    raise ValueError("ParentNode must have children.")
+                props_html = node.props_to_html()
+                if props_html:
+                    props_html = " " + props_html
+                yield f"<{node.tag}{props_html}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield from node.iter_html()
 
-        children_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{props_html}>{children_html}</{self.tag}>"
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import struct
+
+from markdown_utilities import read_json, write_json_atomic
+
+IMAGE_INDEX_VERSION = 1
+DEFAULT_IMAGE_INDEX_PATH = os.path.join(".ssg-cache", "images.json")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+# URL of every probed static image mapped to (width, height), set by the build
+_image_sizes = {}
+_image_version = ""
+
+def set_image_sizes(sizes):
+    global _image_sizes, _image_version
+    _image_sizes = {url: tuple(size) for url, size in sizes.items()}
+    _image_version = ""
+    if _image_sizes:
+        encoded = json.dumps(sorted(_image_sizes.items())).encode("utf-8")
+        _image_version = hashlib.sha256(encoded).hexdigest()
+
+def image_sizes():
+    return _image_sizes
+
+def image_version():
+    return _image_version
+
+def image_size(url):
+    return _image_sizes.get(url)
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return (int.from_bytes(head[24:27], "little") + 1,
+                int.from_bytes(head[27:30], "little") + 1)
+    return None
+
+def _jpeg_size(f):
+    # Hops from segment to segment using their lengths, so only the few
+    # header bytes before the frame header are ever read
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == 0xDA:
+            # Entropy-coded data follows; a frame header would have come first
+            return None
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def probe_image_size(path):
+    # Returns (width, height) from the file header, or None for anything
+    # that is not a PNG, GIF, WebP or JPEG with a readable header
+    with open(path, 'rb') as f:
+        head = f.read(30)
+        # Truncated headers count as unreadable, not as errors
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24]) if len(head) >= 24 else None
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10]) if len(head) >= 10 else None
+        if len(head) == 30 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_size(head)
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_size(f)
+    return None
+
+def index_images(src_dir, index_path=DEFAULT_IMAGE_INDEX_PATH):
+    # Probes the images under src_dir whose size or mtime changed since the
+    # last build. Returns (sizes, probed): URL to (width, height) for every
+    # image with a readable header, and the relative paths probed this time.
+    state = read_json(index_path)
+    if not isinstance(state, dict) or state.get("version") != IMAGE_INDEX_VERSION:
+        state = {"version": IMAGE_INDEX_VERSION, "files": {}}
+    files = {}
+    sizes = {}
+    probed = []
+    for root, dirs, names in os.walk(src_dir):
+        dirs.sort()
+        rel_root = os.path.relpath(root, src_dir)
+        for name in sorted(names):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            rel_path = os.path.normpath(os.path.join(rel_root, name))
+            stat = os.stat(os.path.join(src_dir, rel_path))
+            entry = state["files"].get(rel_path)
+            if (entry is None or entry["size"] != stat.st_size
+                    or entry["mtime_ns"] != stat.st_mtime_ns):
+                entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                         "dimensions": probe_image_size(os.path.join(src_dir, rel_path))}
+                probed.append(rel_path)
+            files[rel_path] = entry
+            if entry["dimensions"] is not None:
+                sizes["/" + rel_path.replace(os.sep, "/")] = tuple(entry["dimensions"])
+
+    if probed or len(files) != len(state["files"]):
+        write_json_atomic(index_path, {"version": IMAGE_INDEX_VERSION, "files": files})
+    return sizes, probed
@@ -0,0 +1,145 @@
+import hashlib
+import os
+
+from assets import asset_urls
+from depgraph import SOURCE, DependencyGraph
+from links import page_url
+from markdown_core import find_pages
+from markdown_utilities import hash_file, read_json, remove_output, write_json_atomic
+from parallel import generate_pages
+from template import TemplateSet
+from transforms import transforms_key
+
+MANIFEST_VERSION = 5
+DEFAULT_MANIFEST_PATH = os.path.join(".ssg-cache", "manifest.json")
+
+def hash_generator():
+    # Any change to the generator's own code can change every output page.
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(src_dir)):
+        if not name.endswith(".py") or name.startswith("test_"):
+            continue
+        digest.update(name.encode("utf-8") + b"\0")
+        with open(os.path.join(src_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def empty_manifest():
+    return {"version": MANIFEST_VERSION, "generator": None, "fingerprint": None, "transforms": None,
+            "pages": {}}
+
+def load_manifest(manifest_path):
+    manifest = read_json(manifest_path)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+def save_manifest(manifest, manifest_path):
+    write_json_atomic(manifest_path, manifest)
+
+def hash_source(from_path, previous_entry):
+    # Re-hashing is skipped when size and mtime match the previous build.
+    stat = os.stat(from_path)
+    if (previous_entry is not None
+            and previous_entry.get("size") == stat.st_size
+            and previous_entry.get("mtime_ns") == stat.st_mtime_ns):
+        return previous_entry["hash"], stat
+    return hash_file(from_path), stat
+
+def build_manifest():
+    # An empty manifest carrying the settings of this build
+    manifest = empty_manifest()
+    manifest["generator"] = hash_generator()
+    manifest["fingerprint"] = bool(asset_urls())
+    manifest["transforms"] = transforms_key()
+    return manifest
+
+def page_entry(from_path, dest_path, previous_entry):
+    source_hash, stat = hash_source(from_path, previous_entry)
+    return {"hash": source_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "output": dest_path}
+
+def record_full_build(pages, manifest_path=DEFAULT_MANIFEST_PATH):
+    # Leaves the manifest an incremental build of the same pages would have,
+    # so the next incremental build starts from this one
+    previous = load_manifest(manifest_path)
+    manifest = build_manifest()
+    for from_path, dest_path in pages:
+        manifest["pages"][from_path] = page_entry(from_path, dest_path, previous["pages"].get(from_path))
+    save_manifest(manifest, manifest_path)
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path,
+                               manifest_path=DEFAULT_MANIFEST_PATH, jobs=1, stats=None,
+                               parse_cache=None, changes=None, compressor=None, metadata=None,
+                               static_dir="static", graph=None, link_index=None):
+    # With a metadata index, draft pages are left out (and removed if built before).
+    # Rebuilt and removed pages are recorded in link_index when one is given.
+    # Besides changed sources, the dependency graph (kept next to the manifest)
+    # names the pages whose template files, referenced static files or link
+    # targets changed; only settings that touch every page rebuild them all.
+    previous = load_manifest(manifest_path)
+    manifest = build_manifest()
+    if previous["generator"] is None:
+        global_changes = [[manifest_path, "build", "no previous manifest"]]
+    else:
+        global_changes = [[name, "build", "changed"] for name in ("generator", "fingerprint", "transforms")
+                          if previous[name] != manifest[name]]
+
+    if graph is None:
+        graph = DependencyGraph(os.path.join(os.path.dirname(manifest_path), "depgraph.json"),
+                                dir_path_content, static_dir, dest_dir_path)
+    graph_dirty = graph.dirty_outputs(graph.changed_inputs())
+
+    dirty = []
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+        if metadata is not None and metadata.is_draft(from_path):
+            continue
+        previous_entry = previous["pages"].get(from_path)
+        entry = manifest["pages"][from_path] = page_entry(from_path, dest_path, previous_entry)
+        output = graph.output_key(dest_path, dest_dir_path)
+        if global_changes:
+            reasons = global_changes
+        elif previous_entry is None:
+            reasons = [[from_path, SOURCE, "added"]]
+        elif previous_entry["hash"] != entry["hash"]:
+            reasons = [[from_path, SOURCE, "changed"]]
+        elif previous_entry["output"] != dest_path or not os.path.exists(dest_path):
+            reasons = [[dest_path, "output", "missing"]]
+        elif output not in graph.outputs:
+            reasons = [[dest_path, "output", "not in the dependency graph"]]
+        elif link_index is not None and page_url(dest_path, dest_dir_path) not in link_index.pages:
+            reasons = [[dest_path, "output", "not in the link index"]]
+        else:
+            reasons = graph_dirty.get(output)
+        if reasons:
+            dirty.append((from_path, dest_path, reasons))
+
+    links = {}
+    rebuilt = generate_pages([(from_path, dest_path) for from_path, dest_path, _ in dirty],
+                             template_path, jobs=jobs, stats=stats, parse_cache=parse_cache,
+                             changes=changes, compressor=compressor, content_dir=dir_path_content,
+                             links=links)
+    templates = TemplateSet(template_path, dir_path_content)
+    for from_path, dest_path, reasons in dirty:
+        edges = graph.page_edges(from_path, dest_path, dest_dir_path, templates,
+                                 links[from_path]["references"])
+        graph.record(graph.output_key(dest_path, dest_dir_path), edges, reasons)
+        if link_index is not None:
+            link_index.update(page_url(dest_path, dest_dir_path), links[from_path]["references"],
+                              links[from_path]["anchors"])
+
+    outputs = {entry["output"] for entry in manifest["pages"].values()}
+    removed = []
+    for from_path, entry in previous["pages"].items():
+        if from_path not in manifest["pages"] and entry["output"] not in outputs:
+            remove_output(entry["output"], dest_dir_path)
+            removed.append(entry["output"])
+            graph.remove(graph.output_key(entry["output"], dest_dir_path))
+            if link_index is not None:
+                link_index.remove(page_url(entry["output"], dest_dir_path))
+            if changes is not None:
+                changes.record(entry["output"], "removed")
+
+    graph.save()
+    save_manifest(manifest, manifest_path)
+    return rebuilt, removed
@@ -0,0 +1,206 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote, urlsplit
+
+from htmlnode import ParentNode
+from markdown_utilities import read_json, write_json_atomic
+
+LINK_INDEX_VERSION = 2
+DEFAULT_LINK_INDEX_PATH = os.path.join(".ssg-cache", "links.json")
+DEFAULT_LINK_REPORT_PATH = os.path.join(".ssg-cache", "link-report.json")
+# The one rule both the node and the HTML walk follow: links are a[href] and
+# img[src]; any element's id is an anchor
+REFERENCE_PROPS = {"a": "href", "img": "src"}
+TAG_PATTERN = re.compile(r"<([a-zA-Z][\w-]*)\b([^>]*)>")
+ATTRIBUTE_PATTERN = re.compile(r"""\b(href|src|id)=(["'])([^"']*)\2""")
+
+def _collect(tag, props, references, anchors):
+    prop = REFERENCE_PROPS.get(tag)
+    if prop is not None and prop in props:
+        references.add(props[prop])
+    if "id" in props:
+        anchors.add(props["id"])
+
+def collect_links(content):
+    # (link and image URLs, element ids) of a page body, from the node tree
+    # or, when the body is already serialized, from its HTML
+    references = set()
+    anchors = set()
+    if isinstance(content, str):
+        for tag in TAG_PATTERN.finditer(content):
+            props = {match.group(1): match.group(3) for match in ATTRIBUTE_PATTERN.finditer(tag.group(2))}
+            _collect(tag.group(1).lower(), props, references, anchors)
+        return sorted(references), sorted(anchors)
+    stack = [content]
+    while stack:
+        node = stack.pop()
+        if node.props:
+            _collect(node.tag, node.props, references, anchors)
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+    return sorted(references), sorted(anchors)
+
+def page_url(dest_path, public_dir):
+    return "/" + os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+
+def list_outputs(public_dir):
+    # Site path of every file in the output tree
+    outputs = set()
+    for root, _, files in os.walk(public_dir):
+        rel_root = os.path.relpath(root, public_dir).replace(os.sep, "/")
+        prefix = "/" if rel_root == "." else f"/{rel_root}/"
+        outputs.update(prefix + name for name in files)
+    return outputs
+
+def _target(url, page):
+    # (site path, fragment) an internal URL points at, or None for external
+    # and non-http URLs
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    if not parts.path:
+        return page, parts.fragment
+    path = posixpath.normpath(posixpath.join(posixpath.dirname(page), unquote(parts.path)))
+    if parts.path.endswith("/") and not path.endswith("/"):
+        path += "/"
+    return path, parts.fragment
+
+def _candidates(path):
+    # The outputs a site path may be served from, as a static host picks them
+    if path.endswith("/"):
+        return [path + "index.html"]
+    return [path, path + ".html", path + "/index.html"]
+
+def _served_as(output):
+    # The site paths whose candidates include output
+    paths = [output]
+    if output.endswith(".html"):
+        paths.append(output[:-len(".html")])
+    if output.endswith("/index.html"):
+        paths.append(output[:-len("index.html")])
+        paths.append(output[:-len("/index.html")])
+    return paths
+
+def _resolve(path, outputs):
+    return next((candidate for candidate in _candidates(path) if candidate in outputs), None)
+
+class LinkIndex:
+    # Outgoing links and element ids of every rendered page, kept between
+    # builds with each page's broken links, a reverse index from link
+    # targets to the pages linking to them, and the site's outputs. Pages
+    # record their links as they are rendered; check() then re-checks only
+    # the pages rendered, and the referrers of outputs that came or went or
+    # of pages whose ids changed.
+    def __init__(self, path=DEFAULT_LINK_INDEX_PATH):
+        self.path = path
+        state = read_json(path)
+        if not isinstance(state, dict) or state.get("version") != LINK_INDEX_VERSION:
+            state = {"pages": {}, "referrers": {}, "outputs": None}
+        self.pages = state["pages"]
+        self.referrers = {target: set(pages) for target, pages in state["referrers"].items()}
+        # The output tree as listed by the last check, None before the first
+        self.outputs = set(state["outputs"]) if state["outputs"] is not None else None
+        self.updated = set()
+        self.changed_anchors = set()
+        self.checked = 0
+        self.dirty = False
+
+    def _targets(self, url):
+        entry = self.pages.get(url)
+        if entry is None:
+            return set()
+        return {target[0] for target in (_target(link, url) for link in entry["links"])
+                if target is not None}
+
+    def _unlink(self, url):
+        for target in self._targets(url):
+            pages = self.referrers.get(target)
+            if pages is not None:
+                pages.discard(url)
+                if not pages:
+                    del self.referrers[target]
+
+    def update(self, url, references, anchors):
+        entry = self.pages.get(url)
+        if entry is None or entry["anchors"] != list(anchors):
+            self.changed_anchors.add(url)
+        self.updated.add(url)
+        if entry is not None and entry["links"] == list(references) and entry["anchors"] == list(anchors):
+            return
+        self._unlink(url)
+        # The previous results stay until check() finds out whether they moved
+        broken = entry["broken"] if entry is not None else []
+        self.pages[url] = {"links": list(references), "anchors": list(anchors), "broken": broken}
+        for target in self._targets(url):
+            self.referrers.setdefault(target, set()).add(url)
+        self.dirty = True
+
+    def remove(self, url):
+        if url in self.pages:
+            self._unlink(url)
+            del self.pages[url]
+            self.changed_anchors.add(url)
+            self.dirty = True
+
+    def check_page(self, url):
+        # [[link, reason]] for each broken internal link of the page. Fragments
+        # are only checked against pages that have ids at all, so a site
+        # without heading anchors does not report every "#section" link.
+        broken = []
+        for link in self.pages[url]["links"]:
+            target = _target(link, url)
+            if target is None:
+                continue
+            path, fragment = target
+            resolved = _resolve(path, self.outputs)
+            if resolved is None:
+                broken.append([link, "missing"])
+                continue
+            anchors = self.pages.get(resolved, {}).get("anchors")
+            if fragment and anchors and fragment not in anchors:
+                broken.append([link, "missing anchor"])
+        return broken
+
+    def check(self, outputs):
+        # Takes a listing of the output tree, which also sees files written
+        # outside a build (watch mode, a sync), and re-checks the pages
+        # affected by what came or went since the last one. Returns
+        # [(page, link, reason)] over the whole site.
+        outputs = set(outputs)
+        came_or_went = outputs ^ (self.outputs or set())
+        if came_or_went or self.outputs is None:
+            self.dirty = True
+        self.outputs = outputs
+        recheck = set(self.updated)
+        for output in came_or_went | self.changed_anchors:
+            for path in _served_as(output):
+                recheck.update(self.referrers.get(path, ()))
+        recheck = {url for url in recheck if url in self.pages}
+        for url in recheck:
+            broken = self.check_page(url)
+            if broken != self.pages[url]["broken"]:
+                self.pages[url]["broken"] = broken
+                self.dirty = True
+        self.checked = len(recheck)
+        return [(url, link, reason) for url, entry in sorted(self.pages.items())
+                for link, reason in entry["broken"]]
+
+    def save(self):
+        # Only written when a page's links, ids or results or the outputs moved
+        if not self.dirty:
+            return
+        self.dirty = False
+        write_json_atomic(self.path, {
+            "version": LINK_INDEX_VERSION,
+            "pages": self.pages,
+            "referrers": {target: sorted(pages) for target, pages in self.referrers.items()},
+            "outputs": sorted(self.outputs) if self.outputs is not None else None,
+        })
+
+def write_link_report(path, broken, pages, checked):
+    write_json_atomic(path, {
+        "pages": pages,
+        "checked": checked,
+        "broken": [{"page": page, "link": link, "reason": reason} for page, link, reason in broken],
+    })
@@ -0,0 +1,206 @@
+import hashlib
+import html
+import json
+import os
+
+from depgraph import PAGE, TEMPLATE
+from incremental import hash_generator
+from markdown_core import write_page
+from markdown_utilities import read_json, remove_output, write_json_atomic
+from transforms import slugify
+
+LISTINGS_STATE_VERSION = 1
+DEFAULT_LISTINGS_STATE_PATH = os.path.join(".ssg-cache", "listings.json")
+DEFAULT_PAGE_SIZE = 10
+# layouts/_list.html renders listing pages when it exists
+LISTING_LAYOUT = "_list"
+LISTING_KINDS = {"tag": "Tag", "archive": "Archive", "section": "Section"}
+
+def listing_keys(meta):
+    # The listings a page appears on: one per tag, the archive of its year
+    # and the top-level section it lives in
+    keys = {f"tag:{tag}" for tag in meta["tags"]}
+    if meta.get("date"):
+        keys.add(f"archive:{meta['date'][:4]}")
+    section, separator, _ = meta["path"].replace(os.sep, "/").partition("/")
+    if separator:
+        keys.add(f"section:{section}")
+    return sorted(keys)
+
+def listing_base(key):
+    kind, _, name = key.partition(":")
+    if kind == "tag":
+        return f"tags/{slugify(name)}"
+    if kind == "archive":
+        return f"archive/{name}"
+    return f"sections/{name}"
+
+def listing_url(base, number):
+    return f"/{base}/" if number == 1 else f"/{base}/page/{number}/"
+
+def listing_output(public_dir, url):
+    return os.path.join(public_dir, *url.strip("/").split("/"), "index.html")
+
+def _sort_key(meta):
+    # Newest first; undated pages go last
+    return meta.get("date") or "", meta["path"]
+
+def paginate(key, items, page_size):
+    # Yields the Page value of each output page of one listing
+    kind, _, name = key.partition(":")
+    base = listing_base(key)
+    items = sorted(items, key=_sort_key, reverse=True)
+    count = max(1, -(-len(items) // page_size))
+    for number in range(1, count + 1):
+        yield {
+            "title": f"{LISTING_KINDS[kind]}: {name}",
+            "kind": kind,
+            "name": name,
+            "url": listing_url(base, number),
+            "number": number,
+            "pages": count,
+            "prev": listing_url(base, number - 1) if number > 1 else None,
+            "next": listing_url(base, number + 1) if number < count else None,
+            "items": items[(number - 1) * page_size:number * page_size],
+        }
+
+def render_listing(page):
+    # Default body of a listing page, for templates without a _list layout
+    pieces = [f"<h1>{html.escape(page['title'])}</h1>", '<ul class="listing">']
+    for item in page["items"]:
+        pieces.append(f'<li><a href="{html.escape(item["url"])}">{html.escape(item.get("title") or item["url"])}</a>')
+        if item.get("date"):
+            pieces.append(f' <time datetime="{html.escape(item["date"])}">{html.escape(item["date"])}</time>')
+        pieces.append("</li>")
+    pieces.append("</ul>")
+    if page["prev"] or page["next"]:
+        pieces.append('<nav class="pagination">')
+        if page["prev"]:
+            pieces.append(f'<a rel="prev" href="{page["prev"]}">Newer</a>')
+        if page["next"]:
+            pieces.append(f'<a rel="next" href="{page["next"]}">Older</a>')
+        pieces.append("</nav>")
+    return "".join(pieces)
+
+def _fingerprint(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+def empty_listings_state():
+    return {"version": LISTINGS_STATE_VERSION, "settings": None, "pages": {}, "listings": {}}
+
+def load_listings_state(state_path):
+    state = read_json(state_path)
+    if not isinstance(state, dict) or state.get("version") != LISTINGS_STATE_VERSION:
+        return empty_listings_state()
+    return state
+
+def generate_listings(metadata, public_dir, templates, page_size=DEFAULT_PAGE_SIZE,
+                      include_drafts=False, state_path=DEFAULT_LISTINGS_STATE_PATH,
+                      changes=None, compressor=None, graph=None):
+    # Renders the tag, archive and section listings from the metadata index.
+    # A dependency index records which listings each page appears on, so
+    # only listings that gained, lost or hold a changed page are re-rendered,
+    # and of those only the output pages whose contents differ are written.
+    # Returns (rendered, removed, outputs) with outputs every listing page.
+    # Rendered pages are recorded in graph, when given, with their members.
+    previous = load_listings_state(state_path)
+    state = empty_listings_state()
+    state["settings"] = {"generator": hash_generator(), "template": templates.digest(),
+                         "page_size": page_size, "drafts": include_drafts}
+
+    all_pages = metadata.pages()
+    content_outputs = {meta["url"] for meta in all_pages}
+    members = {}
+    for meta in all_pages:
+        if meta["draft"] and not include_drafts:
+            continue
+        keys = listing_keys(meta)
+        state["pages"][meta["path"]] = {"meta": _fingerprint(meta), "listings": keys}
+        for key in keys:
+            members.setdefault(key, []).append(meta)
+
+    bases = {}
+    for key in members:
+        base = listing_base(key)
+        if base in bases:
+            raise ValueError(f"Listings {bases[base]!r} and {key!r} would both be written to /{base}/.")
+        if f"/{base}/index.html" in content_outputs:
+            raise ValueError(f"Listing {key!r} would overwrite the page /{base}/index.html.")
+        bases[base] = key
+
+    # Different settings leave nothing rendered before reusable
+    everything = previous["settings"] != state["settings"]
+    # Affected listings, each with the [input, kind, change] reasons for it
+    affected = {}
+    def affect(keys, path, change):
+        for key in keys:
+            affected.setdefault(key, []).append([path, PAGE, change])
+    if everything:
+        for key in set(members) | set(previous["listings"]):
+            affected[key] = [["settings", "build", "changed"]]
+    else:
+        for rel_path, entry in state["pages"].items():
+            old = previous["pages"].get(rel_path)
+            source = os.path.join(metadata.content_dir, rel_path)
+            if old is None:
+                affect(entry["listings"], source, "added")
+            elif old["meta"] != entry["meta"]:
+                affect(set(entry["listings"]) | set(old["listings"]), source, "changed")
+        for rel_path, old in previous["pages"].items():
+            if rel_path not in state["pages"]:
+                affect(old["listings"], os.path.join(metadata.content_dir, rel_path), "removed")
+        # Outputs deleted behind our back are written again
+        for key, outputs in previous["listings"].items():
+            if key not in affected and not all(
+                    os.path.exists(os.path.join(public_dir, rel_path)) for rel_path in outputs):
+                affected[key] = [[key, "output", "missing"]]
+
+    rendered = []
+    removed = []
+    template = templates.for_layout(LISTING_LAYOUT)
+    for key in sorted(set(members) | set(previous["listings"])):
+        old_outputs = previous["listings"].get(key, {})
+        if key not in affected:
+            state["listings"][key] = old_outputs
+            continue
+        outputs = {}
+        pages = paginate(key, members[key], page_size) if key in members else []
+        for page in pages:
+            dest_path = listing_output(public_dir, page["url"])
+            rel_path = os.path.relpath(dest_path, public_dir)
+            fingerprint = _fingerprint(page)
+            outputs[rel_path] = fingerprint
+            if (not everything and old_outputs.get(rel_path) == fingerprint
+                    and os.path.exists(dest_path)):
+                continue
+            outcome = write_page(dest_path, template, page["title"], render_listing(page),
+                                 compressor=compressor, meta=page)
+            rendered.append(dest_path)
+            if changes is not None:
+                changes.record(dest_path, outcome)
+            if graph is not None:
+                edges = [(os.path.join(metadata.content_dir, item["path"]), PAGE) for item in page["items"]]
+                edges.extend((path, TEMPLATE) for path in templates.files(template))
+                graph.record(graph.output_key(dest_path, public_dir), edges, affected[key])
+        for rel_path in old_outputs:
+            if rel_path not in outputs:
+                dest_path = os.path.join(public_dir, rel_path)
+                remove_output(dest_path, public_dir)
+                removed.append(dest_path)
+                if changes is not None:
+                    changes.record(dest_path, "removed")
+                if graph is not None:
+                    graph.remove(graph.output_key(dest_path, public_dir))
+        if outputs:
+            state["listings"][key] = outputs
+
+    if state != previous:
+        write_json_atomic(state_path, state)
+    outputs = [os.path.join(public_dir, rel_path)
+               for listing in state["listings"].values() for rel_path in listing]
+    if changes is not None:
+        written = set(rendered)
+        for dest_path in outputs:
+            if dest_path not in written:
+                changes.record(dest_path, "unchanged")
+    return rendered, removed, outputs
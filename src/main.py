@@ -1,28 +1,275 @@
-from markdown_utilities import copy_static_files
-from markdown_core import generate_pages_recursive
+from markdown_utilities import DEFAULT_SYNC_STATE_PATH, sync_static_files
+from markdown_core import find_pages
+from incremental import DEFAULT_MANIFEST_PATH, generate_pages_incremental, record_full_build
+from parallel import default_jobs, generate_pages
+from build_stats import NORMAL, QUIET, VERBOSE, BuildStats, format_report
+from parse_cache import ParseCache
+from output_changes import DEFAULT_CHANGES_PATH, ChangeSet, prune_outputs
+from assets import ASSET_MANIFEST_NAME, fingerprint_assets, set_asset_urls, write_asset_manifest
+from compression import Compressor, available_formats
+from images import index_images, set_image_sizes
+from metadata import MetadataIndex
+from listings import DEFAULT_LISTINGS_STATE_PATH, DEFAULT_PAGE_SIZE, generate_listings
+from template import TemplateSet
+from depgraph import DEFAULT_DEPGRAPH_PATH, DependencyGraph
+from links import (DEFAULT_LINK_INDEX_PATH, DEFAULT_LINK_REPORT_PATH, LinkIndex, list_outputs,
+                   page_url, write_link_report)
+from transforms import BUILTIN_TRANSFORMS, load_plugins
+from generations import (discard_generation, prune_generations, publish_generation, rollback,
+                         stage_generation)
 
+import argparse
 import os
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="only rebuild pages whose inputs changed since the last build")
+    mode.add_argument("--staged", action="store_true",
+                      help="build into a new generation next to public/ and swap the public/ "
+                           "symlink over to it once the build succeeds")
+    mode.add_argument("--rollback", action="store_true",
+                      help="point public/ back at the previous staged generation and exit")
+    mode.add_argument("--explain", metavar="PATH",
+                      help="show why an output was last rebuilt and what it depends on, or what "
+                           "depends on an input, then exit")
+    parser.add_argument("--keep-generations", type=int, default=3,
+                        help="staged generations kept around for rollback")
+    parser.add_argument("--jobs", "-j", type=int, nargs="?", const=default_jobs(), default=1,
+                        help="render pages on N worker processes (default 1; bare --jobs uses every core)")
+    parser.add_argument("--static-hash", action="store_true",
+                        help="when syncing static files, compare contents of files whose mtime changed")
+    parser.add_argument("--link-mode", choices=("copy", "hardlink", "reflink"), default="copy",
+                        help="how incremental builds place static files in the output directory; "
+                             "hardlink is only safe for static files that are replaced, not edited "
+                             "in place, since the published file (and any older generation) shares "
+                             "their bytes")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("--quiet", "-q", dest="verbosity", action="store_const", const=QUIET,
+                           default=NORMAL, help="only print the end-of-build summary")
+    verbosity.add_argument("--verbose", "-v", dest="verbosity", action="store_const", const=VERBOSE,
+                           help="print stage timings and node counts for every page")
+    parser.add_argument("--report", default=os.path.join(".ssg-cache", "build-report.json"),
+                        help="where to write the per-page and per-stage timing report")
+    parser.add_argument("--no-parse-cache", dest="parse_cache", action="store_false",
+                        help="always parse markdown instead of reusing cached parse trees")
+    parser.add_argument("--parse-cache-mb", type=int, default=256,
+                        help="size cap of the on-disk parse cache")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br with the brotli package) next to text outputs")
+    parser.add_argument("--compress-min-bytes", type=int, default=1024,
+                        help="outputs smaller than this get no precompressed sidecars")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also publish static files under content-hashed names and point "
+                             "the template and page links at them")
+    parser.add_argument("--plugin", action="append", default=[], metavar="NAME",
+                        help="run a page transform: a built-in one ("
+                             + ", ".join(sorted(BUILTIN_TRANSFORMS))
+                             + ") or a module that registers its own; may be repeated")
+    parser.add_argument("--drafts", action="store_true",
+                        help="also build pages whose front matter says draft: true")
+    parser.add_argument("--listings", action="store_true",
+                        help="generate tag, yearly archive and section listing pages from front matter")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help="entries per listing page")
+    parser.add_argument("--changes", default=DEFAULT_CHANGES_PATH,
+                        help="where to write the added/changed/removed output paths for deploys")
+    parser.add_argument("--link-report", default=DEFAULT_LINK_REPORT_PATH,
+                        help="where to write the broken internal links found in rendered pages")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Define paths
     static_dir = "static"
     public_dir = "public"
     content_dir = "content"
     template_path = "template.html"
+    if args.rollback:
+        # Everything that says what the output tree holds goes with the newer generation
+        state_paths = (DEFAULT_MANIFEST_PATH, DEFAULT_DEPGRAPH_PATH, DEFAULT_LINK_INDEX_PATH,
+                       DEFAULT_SYNC_STATE_PATH, DEFAULT_LISTINGS_STATE_PATH)
+        print(f"Rolled back {public_dir} to {rollback(public_dir, state_paths)}")
+        return
+    # What every output was rendered from, so changed inputs map to the
+    # outputs they dirty
+    graph = DependencyGraph(DEFAULT_DEPGRAPH_PATH, content_dir, static_dir, public_dir)
+    if args.explain:
+        print("\n".join(graph.explain(args.explain)))
+        return
+
+    load_plugins(args.plugin)
+    stats = BuildStats(args.verbosity)
+    parse_cache = ParseCache(max_bytes=args.parse_cache_mb << 20) if args.parse_cache else None
+    changes = ChangeSet(public_dir)
+    # Page metadata comes from front matter alone, reread only for changed files
+    metadata = MetadataIndex(content_dir)
+    # Outgoing links and ids of every page, checked once the output is complete
+    link_index = LinkIndex(DEFAULT_LINK_INDEX_PATH)
+    compressor = None
+    if args.precompress:
+        compressor = Compressor(available_formats(), min_size=args.compress_min_bytes)
+
+    if args.incremental:
+        # Keep existing output; the manifest decides what needs rebuilding
+        sync_static(args, static_dir, public_dir, changes, compressor)
+        rebuilt, removed = generate_pages_incremental(content_dir, template_path, public_dir,
+                                                       jobs=args.jobs, stats=stats,
+                                                       parse_cache=parse_cache, changes=changes,
+                                                       compressor=compressor,
+                                                       metadata=None if args.drafts else metadata,
+                                                       static_dir=static_dir, graph=graph,
+                                                       link_index=link_index)
+        print(f"Incremental build: {len(rebuilt)} page(s) rebuilt, {len(removed)} removed")
+        build_listings(args, metadata, changes, compressor, graph, public_dir, content_dir,
+                       template_path)
+    elif args.staged:
+        # The live tree is never written to; the new generation starts as
+        # hardlinks of it, so only changed outputs cost real I/O
+        staging_dir = stage_generation(public_dir)
+        changes = ChangeSet(staging_dir)
+        try:
+            full_build(args, stats, parse_cache, changes, compressor, metadata, graph, link_index, static_dir,
+                       staging_dir, content_dir, template_path)
+            if compressor is not None:
+                compressor.close()
+        except BaseException:
+            discard_generation(staging_dir)
+            raise
+        publish_generation(public_dir, staging_dir)
+        prune_generations(public_dir, keep=args.keep_generations)
+        print(f"Published {staging_dir} as {public_dir}")
+    else:
+        full_build(args, stats, parse_cache, changes, compressor, metadata, graph, link_index, static_dir,
+                   public_dir, content_dir, template_path)
+    if not args.incremental:
+        # The next incremental build starts from this one, not from scratch
+        record_full_build(site_pages(args, metadata, content_dir, public_dir))
+    graph.save()
+
+    if metadata.read:
+        print(f"Read front matter of {len(metadata.read)} page(s)")
+    metadata.save()
+    if compressor is not None:
+        compressor.close()
+        changes.include_sidecars(compressor)
+    check_links(args, link_index, public_dir)
+    summary = changes.write(args.changes)
+    print(f"Output: {len(summary['added'])} added, {len(summary['changed'])} changed, "
+          f"{len(summary['removed'])} removed, {summary['unchanged']} unchanged")
+
+    if parse_cache is not None:
+        parse_cache.trim()
+
+    report = stats.write_report(args.report)
+    print(format_report(report, slowest=10 if args.verbosity >= VERBOSE else 5))
 
-    # Clear public directory if it exists
-    if os.path.exists(public_dir):
-        for root, dirs, files in os.walk(public_dir, topdown=False):
-            for name in files:
-                os.remove(os.path.join(root, name))
-            for name in dirs:
-                os.rmdir(os.path.join(root, name))
+def sync_static(args, static_dir, public_dir, changes, compressor):
+    # Returns the outputs besides the plain static copies that this build owns
+    report = sync_static_files(static_dir, public_dir, use_hash=args.static_hash,
+                               link_mode=args.link_mode, compressor=compressor)
+    changes.record_static_sync(report)
+    print(f"Static sync: {len(report['copied'])} copied, {len(report['hardlink'])} hardlinked, "
+          f"{len(report['reflink'])} reflinked, {report['unchanged']} unchanged, "
+          f"{len(report['removed'])} removed")
+    # Only images whose size or mtime changed have their headers read
+    sizes, probed = index_images(static_dir)
+    set_image_sizes(sizes)
+    if probed:
+        print(f"Probed {len(probed)} image header(s)")
 
-    # Copy static files
-    copy_static_files(static_dir, public_dir)
+    if not args.fingerprint:
+        set_asset_urls({})
+        return []
+
+    # Original names stay in place for references outside pages and the
+    # template, such as url() in stylesheets
+    urls, placed = fingerprint_assets(static_dir, public_dir, link_mode=args.link_mode,
+                                      compressor=compressor)
+    set_asset_urls(urls)
+    for rel_path in placed:
+        changes.record(os.path.join(public_dir, rel_path), "added")
+    changes.record(os.path.join(public_dir, ASSET_MANIFEST_NAME),
+                   write_asset_manifest(public_dir, urls))
+    print(f"Fingerprinted {len(urls)} static file(s), {len(placed)} new")
+    return [os.path.join(public_dir, url.lstrip("/")) for url in urls.values()] + [
+        os.path.join(public_dir, ASSET_MANIFEST_NAME)]
+
+def check_links(args, link_index, public_dir):
+    # Only pages rendered by this build, or linking to outputs that came or
+    # went, are checked again; the rest keep their previous results. The
+    # output tree is listed every time: only a listing sees pages and files
+    # that watch mode wrote, which the build's change set reports unchanged.
+    broken = link_index.check(list_outputs(public_dir))
+    # When no result moved the report on disk still holds, as of the last
+    # build that changed one
+    if link_index.dirty or not os.path.exists(args.link_report):
+        write_link_report(args.link_report, broken, len(link_index.pages), link_index.checked)
+    link_index.save()
+    pages = {page for page, _, _ in broken}
+    print(f"Links: {len(broken)} broken in {len(pages)} page(s), "
+          f"{link_index.checked} of {len(link_index.pages)} page(s) checked")
+    for page, link, reason in broken[:10]:
+        print(f"  {page}: {link} ({reason})")
+    if len(broken) > 10:
+        print(f"  ... and {len(broken) - 10} more in {args.link_report}")
+
+def build_listings(args, metadata, changes, compressor, graph, public_dir, content_dir, template_path):
+    # Returns every listing page the build owns; only listings holding a
+    # page whose metadata changed are rendered again
+    if not args.listings:
+        return []
+    rendered, removed, outputs = generate_listings(
+        metadata, public_dir, TemplateSet(template_path, content_dir), page_size=args.page_size,
+        include_drafts=args.drafts, changes=changes, compressor=compressor, graph=graph)
+    print(f"Listings: {len(rendered)} page(s) rendered, {len(removed)} removed, "
+          f"{len(outputs) - len(rendered)} up to date")
+    return outputs
+
+def site_pages(args, metadata, content_dir, public_dir):
+    # (source, output) of every page the build publishes
+    return [(from_path, dest_path) for from_path, dest_path in find_pages(content_dir, public_dir)
+            if args.drafts or not metadata.is_draft(from_path)]
+
+def full_build(args, stats, parse_cache, changes, compressor, metadata, graph, link_index, static_dir,
+               public_dir, content_dir, template_path):
+    # Rebuild every page over the existing public directory: identical files
+    # keep their mtimes, and anything this build does not produce is pruned.
+    extra_outputs = sync_static(args, static_dir, public_dir, changes, compressor)
 
     # Generate HTML pages recursively
-    generate_pages_recursive(content_dir, template_path, public_dir)
+    pages = site_pages(args, metadata, content_dir, public_dir)
+    links = {}
+    generate_pages(pages, template_path, jobs=args.jobs, stats=stats, parse_cache=parse_cache,
+                   changes=changes, compressor=compressor, content_dir=content_dir, links=links)
+    templates = TemplateSet(template_path, content_dir)
+    for from_path, dest_path in pages:
+        references = links[from_path]["references"]
+        graph.record(graph.output_key(dest_path, public_dir),
+                     graph.page_edges(from_path, dest_path, public_dir, templates, references),
+                     [["*", "build", "full"]])
+        link_index.update(page_url(dest_path, public_dir), references, links[from_path]["anchors"])
+    built_urls = {page_url(dest_path, public_dir) for _, dest_path in pages}
+    for url in [url for url in link_index.pages if url not in built_urls]:
+        link_index.remove(url)
+
+    listing_outputs = build_listings(args, metadata, changes, compressor, graph, public_dir,
+                                     content_dir, template_path)
+    built = {graph.output_key(path, public_dir) for _, path in pages}
+    built.update(graph.output_key(path, public_dir) for path in listing_outputs)
+    for output in [output for output in graph.outputs if output not in built]:
+        graph.remove(output)
+
+    keep = [dest_path for _, dest_path in pages] + extra_outputs + listing_outputs
+    for root, _, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        keep.extend(os.path.join(public_dir, rel_root, name) for name in files)
+    if compressor is not None:
+        compressor.wait()
+        keep.extend(sidecar for path in list(keep) for sidecar in compressor.sidecars(path))
+    prune_outputs(public_dir, keep, changes)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,19 @@
+import hashlib
 import os
-from markdown_utilities import extract_title
-from textnode import text_to_textnodes, block_to_block_type, markdown_to_blocks, text_node_to_html_node
-from htmlnode import ParentNode, LeafNode, HTMLNode
+from compression import remove_sidecars
+from links import collect_links
+from markdown_utilities import extract_title, hash_file
+from metadata import split_front_matter
+from textnode import text_to_textnodes, text_node_to_html_node
+from block_scanner import scan_blocks, classify_block
+from htmlnode import ParentNode, LeafNode, HTMLNode, count_nodes
+from build_stats import BuildStats, PageStats
+from template import TemplateSet, load_template
+from transforms import registered_transforms, render_transformed
+
+# Deeper blockquotes fold into this level, so hostile input cannot build
+# arbitrarily deep trees
+MAX_QUOTE_DEPTH = 32
 
 def text_to_children(text):
     text_nodes = text_to_textnodes(text)
@@ -13,121 +25,135 @@ def create_paragraph_node(block):
         return ParentNode(tag="p", children=children)
     return LeafNode(value="")  # Return an empty LeafNode to avoid returning None
 
-def create_heading_node(block, level):
-    return ParentNode(tag=f"h{level}", children=text_to_children(block.lstrip("#").strip()))
+def create_heading_node(text, level):
+    return ParentNode(tag=f"h{level}", children=text_to_children(text.strip()))
 
-def create_code_block_node(block):
-    content = block.strip("`")
+def create_code_block_node(content):
     return ParentNode(tag="pre", children=[ParentNode(tag="code", children=[LeafNode(value=content)])])
 
-def create_quote_node(block):
-    lines = block.splitlines()
-    paragraphs = []
-    current_paragraph = []
-    inside_code_block = False
-    code_block_content = []
-    nested_quote = []
-    list_items = []
+class _QuoteLevel:
+    # One open blockquote while parsing: finished child nodes plus whatever
+    # paragraph, list or code fence is still accumulating lines.
+    __slots__ = ("children", "paragraph", "items", "code")
+
+    def __init__(self):
+        self.children = []
+        self.paragraph = []
+        self.items = []
+        self.code = None
+
+    def flush(self):
+        if self.paragraph:
+            self.children.append(create_paragraph_node("\n".join(self.paragraph)))
+            self.paragraph = []
+        if self.items:
+            self.children.append(create_unordered_list_node(self.items))
+            self.items = []
+        if self.code is not None:
+            # An unclosed fence runs to the end of its quote
+            self.children.append(create_code_block_node("\n" + "\n".join(self.code) + "\n"))
+            self.code = None
 
+    def close(self):
+        self.flush()
+        if not self.children:
+            return LeafNode(tag="blockquote", value="")
+        return ParentNode(tag="blockquote", children=self.children)
+
+def _quote_depth(line, limit):
+    # Counts leading ">" markers, each optionally followed by one space, and
+    # returns (depth, content). Markers past limit are left in the content.
+    depth = 0
+    position = 0
+    length = len(line)
+    while depth < limit and position < length and line[position] == ">":
+        depth += 1
+        position += 1
+        if position < length and line[position] == " ":
+            position += 1
+    return depth, line[position:]
+
+def create_quote_node(lines, max_depth=MAX_QUOTE_DEPTH):
+    # Single pass with an explicit stack of open quotes, so the work is
+    # linear in the input whatever the nesting. Quotes nested deeper than
+    # max_depth are folded into the deepest allowed level.
+    stack = [_QuoteLevel()]
     for line in lines:
-        stripped_line = line.lstrip("> ").strip()
-
-        if stripped_line.startswith("```"):
-            if inside_code_block:
-                code_block_content.append(stripped_line)
-                paragraphs.append(create_code_block_node("\n".join(code_block_content)))
-                code_block_content = []
-                inside_code_block = False
-            else:
-                inside_code_block = True
-                code_block_content.append(stripped_line)
-            continue
-
-        if inside_code_block:
-            code_block_content.append(stripped_line)
-            continue
-
-        if line.startswith("> >"):
-            nested_quote.append(line[2:])
-            continue
-
-        if nested_quote:
-            paragraphs.append(create_quote_node("\n".join(nested_quote)))
-            nested_quote = []
-
-        if stripped_line.startswith(("* ", "- ")):
-            list_items.append(stripped_line)
-            continue
-
-        if list_items:
-            paragraphs.append("\n".join(list_items))
-            list_items = []
-
-        if stripped_line:
-            current_paragraph.append(stripped_line)
-        else:
-            if current_paragraph:
-                paragraphs.append(" ".join(current_paragraph))
-                current_paragraph = []
-
-    if current_paragraph:
-        paragraphs.append(" ".join(current_paragraph))
-    if list_items:
-        paragraphs.append("\n".join(list_items))
-    if nested_quote:
-        paragraphs.append(create_quote_node("\n".join(nested_quote)))
-
-    # If there's only one paragraph, return it directly without wrapping it in a <p> tag
-    if len(paragraphs) == 1:
-        return LeafNode(tag="blockquote", value=paragraphs[0])
-
-    children = []
-    for p in paragraphs:
-        if isinstance(p, str) and (p.startswith("* ") or p.startswith("- ")):
-            children.append(create_unordered_list_node(p))
-        elif isinstance(p, str):
-            children.append(create_paragraph_node(p))
+        level = stack[-1]
+        if level.code is not None:
+            # Inside a fence only the fence's own quote markers are syntax
+            depth, content = _quote_depth(line, len(stack))
+            if depth == len(stack):
+                if content.strip().startswith("```"):
+                    level.flush()
+                else:
+                    level.code.append(content)
+                continue
+            level.flush()
+        depth, content = _quote_depth(line, max_depth)
+        depth = max(depth, 1)
+
+        while len(stack) > depth:
+            closed = stack.pop()
+            stack[-1].children.append(closed.close())
+        if len(stack) < depth:
+            stack[-1].flush()
+            while len(stack) < depth:
+                stack.append(_QuoteLevel())
+        level = stack[-1]
+
+        stripped = content.strip()
+        if stripped.startswith("```"):
+            level.flush()
+            level.code = []
+        elif stripped.startswith(("* ", "- ")):
+            if level.paragraph:
+                level.flush()
+            level.items.append(stripped[2:])
+        elif stripped:
+            if level.items:
+                level.flush()
+            level.paragraph.append(stripped)
         else:
-            children.append(p)
+            level.flush()
 
-    if children:
-        return ParentNode(tag="blockquote", children=children)
-    return LeafNode(value="")  # Return an empty LeafNode to avoid returning None
+    while len(stack) > 1:
+        closed = stack.pop()
+        stack[-1].children.append(closed.close())
+    return stack[0].close()
 
-def create_unordered_list_node(block):
-    items = block.splitlines()
-    children = [
-        ParentNode(tag="li", children=text_to_children(item[2:].strip()))
-        for item in items if item.startswith(("* ", "- "))
-    ]
+def create_unordered_list_node(items):
+    children = [ParentNode(tag="li", children=text_to_children(item.strip())) for item in items]
     if children:
         return ParentNode(tag="ul", children=children)
     return LeafNode(value="")  # Return an empty LeafNode to avoid returning None
 
-def create_ordered_list_node(block):
-    list_items = block.splitlines()
-    children = [ParentNode(tag="li", children=text_to_children(item.split(". ", 1)[1].strip())) for item in list_items]
+def create_ordered_list_node(items):
+    children = [ParentNode(tag="li", children=text_to_children(item.strip())) for item in items]
     return ParentNode(tag="ol", children=children)
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == "heading":
-        level = len(block.split()[0])  # Number of # characters
-        return create_heading_node(block, level)
-    elif block_type == "code":
-        return create_code_block_node(block)
-    elif block_type == "quote":
-        return create_quote_node(block)  # Directly return the quote node
-    elif block_type == "unordered_list":
-        return create_unordered_list_node(block)
-    elif block_type == "ordered_list":
-        return create_ordered_list_node(block)
+def html_node_from_block(source, block):
+    # Builds the node for a Block record straight from its spans in the source
+    if block.kind == "heading":
+        start, end = block.lines[0]
+        return create_heading_node(source[start:end], block.level)
+    elif block.kind == "code":
+        start, end = block.lines[0]
+        return create_code_block_node(source[start:end])
+    elif block.kind == "quote":
+        return create_quote_node(block.line_texts(source))  # Directly return the quote node
+    elif block.kind == "unordered_list":
+        return create_unordered_list_node(block.line_texts(source))
+    elif block.kind == "ordered_list":
+        return create_ordered_list_node(block.line_texts(source))
     else:  # Paragraph
-        return create_paragraph_node(block)
+        return create_paragraph_node(block.text(source))
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    block_nodes = [block_to_html_node(block) for block in blocks]
+def block_to_html_node(block):
+    return html_node_from_block(block, classify_block(block))
+
+def blocks_to_html_node(markdown, blocks):
+    block_nodes = [html_node_from_block(markdown, block) for block in blocks]
     
     # Only wrap in a <div> if needed
     if len(block_nodes) == 1 and isinstance(block_nodes[0], ParentNode) and block_nodes[0].tag == "blockquote":
@@ -135,44 +161,139 @@ def markdown_to_html_node(markdown):
     
     return ParentNode(tag="div", children=block_nodes)
 
-def generate_page(from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def markdown_to_html_node(markdown):
+    return blocks_to_html_node(markdown, scan_blocks(markdown))
 
-    # Read the markdown file
-    with open(from_path, 'r') as f:
-        markdown_content = f.read()
+def parse_page(markdown_content, page=None, source="<page>"):
+    # Returns (title, html_node, meta); stage timings go to page when given.
+    # The title comes from the front matter, else the first "# " heading.
+    if page is None:
+        page = PageStats(None)
+    meta, body = split_front_matter(markdown_content, source)
+    with page.stage("block_parse"):
+        blocks = list(scan_blocks(body))
+    with page.stage("inline_parse"):
+        html_node = blocks_to_html_node(body, blocks)
+    if "title" not in meta:
+        meta["title"] = extract_title(body)
+    return meta["title"], html_node, meta
 
-    # Read the template file
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+def render_content(html_node):
+    # Serializes the page body, running any registered plugin transforms in
+    # the same traversal
+    transforms = registered_transforms()
+    if not transforms:
+        return html_node.to_html()
+    return render_transformed(html_node, transforms)[1]
 
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+def write_page(dest_path, template, title, content, page=None, compressor=None, meta=None):
+    # Returns "added", "changed" or "unchanged". An existing file holding the
+    # same bytes is left alone, so its mtime stays put for rsync and CDN deploys.
+    # Templates see the page's front matter as Page.
+    if page is None:
+        page = PageStats(None)
+    values = {"Title": title, "Content": content, "Page": meta if meta is not None else {"title": title}}
+    with page.stage("render"):
+        chunks = template.iter_render(values)
+    with page.stage("write"):
+        outcome = _write_if_changed(dest_path, chunks)
+    if compressor is not None:
+        # The page is only read back when a sidecar needs writing
+        with page.stage("compress"):
+            compressor.submit_file(dest_path, changed=outcome != "unchanged")
+    elif outcome != "unchanged":
+        remove_sidecars(dest_path)
+    return outcome
 
-    # Extract title
-    title = extract_title(markdown_content)
+def _write_if_changed(dest_path, chunks):
+    # Streams the chunks into a temp file, hashing them on the way, and only
+    # then decides whether dest_path needs replacing. Replace instead of
+    # truncating: dest_path may be a hardlink shared with an older output
+    # generation, which must keep its own bytes.
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            digest.update(data)
+            size += len(data)
+            f.write(data)
+    try:
+        existing_size = os.path.getsize(dest_path)
+    except FileNotFoundError:
+        os.replace(tmp_path, dest_path)
+        return "added"
+    if existing_size == size and hash_file(dest_path) == digest.hexdigest():
+        os.remove(tmp_path)
+        return "unchanged"
+    os.replace(tmp_path, dest_path)
+    return "changed"
 
-    # Replace placeholders in the template
-    final_content = template_content.replace("{{ Title }}", title)
-    final_content = template_content.replace("{{ Content }}", html_content)
+def generate_page(from_path, template_path, dest_path, template=None, stats=None, parse_cache=None,
+                  compressor=None, links=None):
+    # When links is a dict, the page's link and image URLs and its element
+    # ids are stored in it under "references" and "anchors". Progress is
+    # reported through stats at its verbosity; without stats nothing is printed.
+    page = PageStats(from_path)
 
-    # Ensure the destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # Read the markdown file
+    with page.stage("read"):
+        with open(from_path, 'r') as f:
+            markdown_content = f.read()
 
-    # Write the final HTML to the destination file
-    with open(dest_path, 'w') as f:
-        f.write(final_content)
+    # Compile the template unless the caller already has it; a template set
+    # picks the layout for the page's section
+    if template is None:
+        template = load_template(template_path)
+    elif isinstance(template, TemplateSet):
+        template = template.for_page(from_path)
 
-    print(f"Page generated at {dest_path}")
+    # Convert markdown to HTML, reusing the cached parse of identical sources
+    cached = None
+    if parse_cache is not None:
+        with page.stage("cache"):
+            cache_key = parse_cache.key(markdown_content)
+            cached = parse_cache.load(cache_key)
+    if cached is not None:
+        title, content, page.nodes = cached
+        meta, _ = split_front_matter(markdown_content, from_path)
+        meta.setdefault("title", title)
+    else:
+        title, content, meta = parse_page(markdown_content, page, from_path)
+        if stats is not None or parse_cache is not None:
+            page.nodes = count_nodes(content)
+        if parse_cache is not None or registered_transforms():
+            # Serialize once: the same string feeds the write and the cache
+            with page.stage("render"):
+                content = render_content(content)
+        if parse_cache is not None:
+            with page.stage("cache"):
+                parse_cache.store(cache_key, title, content, page.nodes)
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+    if links is not None:
+        links["references"], links["anchors"] = collect_links(content)
+    outcome = write_page(dest_path, template, title, content, page, compressor, meta)
+    if stats is not None:
+        stats.add_page(page)
+    return outcome
+
+def find_pages(dir_path_content, dest_dir_path):
+    pages = []
     for root, dirs, files in os.walk(dir_path_content):
-        for file in files:
+        dirs.sort()
+        for file in sorted(files):
             if file.endswith('.md'):
                 from_path = os.path.join(root, file)
                 rel_path = os.path.relpath(root, dir_path_content)
                 dest_path_dir = os.path.join(dest_dir_path, rel_path)
-                os.makedirs(dest_path_dir, exist_ok=True)
                 dest_path = os.path.join(dest_path_dir, file.replace('.md', '.html'))
-                generate_page(from_path, template_path, dest_path)
+                pages.append((from_path, dest_path))
+    return pages
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, stats=None):
+    if stats is None:
+        stats = BuildStats()
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+        generate_page(from_path, template_path, dest_path, stats=stats)
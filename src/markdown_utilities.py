@@ -1,7 +1,21 @@
+import hashlib
+import json
 import os
 import shutil
 import re
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; reflinks fall back to copies
+    fcntl = None
+
+from compression import SIDECAR_SUFFIXES, remove_sidecars
+
+DEFAULT_SYNC_STATE_PATH = os.path.join(".ssg-cache", "static.json")
+SYNC_STATE_VERSION = 2
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write file clones (btrfs, xfs)
+TITLE_PATTERN = re.compile(r"^# (.*)$", re.MULTILINE)
+
 def extract_markdown_images(text):
     pattern = r"!\[(.*?)\]\((.*?)\)"
     matches = re.findall(pattern, text)
@@ -13,13 +27,203 @@ def extract_markdown_links(text):
     return matches
 
 def extract_title(markdown):
-    lines = markdown.splitlines()
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:].strip()
-    raise ValueError("No h1 header found in the markdown file.")
-
-def copy_static_files(src_dir, dest_dir):
-    if os.path.exists(dest_dir):
+    # Stops at the first heading instead of splitting the whole document
+    match = TITLE_PATTERN.search(markdown)
+    if match is None:
+        raise ValueError("No h1 header found in the markdown file.")
+    return match.group(1).strip()
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_json(path, default=None):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def write_json_atomic(path, data):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        # Compact, and in one dumps call: json.dump and indenting both go
+        # through the pure-Python encoder, which dominated saving large state
+        f.write(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+def remove_output(dest_path, dest_dir_path):
+    # Precompressed sidecars go with the file they were made from
+    for path in [dest_path] + [dest_path + suffix for suffix in SIDECAR_SUFFIXES]:
+        if os.path.exists(path):
+            os.remove(path)
+    # Prune directories left empty by the removal, but never the output root.
+    root = os.path.abspath(dest_dir_path)
+    parent = os.path.dirname(os.path.abspath(dest_path))
+    while parent != root and parent.startswith(root + os.sep):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+def copy_static_files(src_dir, dest_dir, clean=True, compressor=None):
+    if clean and os.path.exists(dest_dir):
         shutil.rmtree(dest_dir)
-    shutil.copytree(src_dir, dest_dir)
\ No newline at end of file
+    copy_function = shutil.copy2
+    if compressor is not None:
+        def copy_function(src_path, dest_path):
+            # Compress from the bytes read for the copy instead of reading twice
+            with open(src_path, 'rb') as f:
+                data = f.read()
+            with open(dest_path, 'wb') as f:
+                f.write(data)
+            shutil.copystat(src_path, dest_path)
+            compressor.submit(dest_path, data)
+            return dest_path
+    shutil.copytree(src_dir, dest_dir, copy_function=copy_function, dirs_exist_ok=True)
+
+def _clone_file(src_path, dest_path):
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform.")
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    shutil.copystat(src_path, dest_path)
+
+def place_file(src_path, dest_path, link_mode):
+    # Materialise next to the target and rename over it, so readers never
+    # see a half-written asset. Returns how the file was actually placed.
+    tmp_path = dest_path + ".sync-tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    method = "copy"
+    if link_mode == "hardlink":
+        try:
+            os.link(src_path, tmp_path)
+            method = "hardlink"
+        except OSError:
+            pass
+    elif link_mode == "reflink":
+        try:
+            _clone_file(src_path, tmp_path)
+            method = "reflink"
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    if method == "copy":
+        shutil.copy2(src_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+    return method
+
+def _source_entry(src_path, dest_path, entry, use_hash):
+    # Returns (entry, changed): the source's size, mtime and (with use_hash)
+    # hash, and whether it differs from the entry recorded when it was placed.
+    # The published file's stat is never trusted, since with hardlinks it is
+    # the source itself, and it is never touched.
+    stat = os.stat(src_path)
+    current = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": None}
+    if entry is None or entry["size"] != stat.st_size or not os.path.exists(dest_path):
+        changed = True
+    elif entry["mtime_ns"] == stat.st_mtime_ns:
+        current["hash"] = entry["hash"]
+        changed = False
+    elif use_hash:
+        # Same bytes, only touched: the new mtime is recorded so the next sync is a stat compare
+        current["hash"] = hash_file(src_path)
+        known = entry["hash"]
+        if known is None and not os.path.samefile(src_path, dest_path):
+            known = hash_file(dest_path)
+        changed = current["hash"] != known
+    else:
+        changed = True
+    if use_hash and current["hash"] is None:
+        current["hash"] = hash_file(src_path)
+    return current, changed
+
+def _load_sync_state(state_path):
+    state = read_json(state_path)
+    if isinstance(state, dict) and state.get("version") == 1:
+        # Version 1 only listed the files; they are placed again once
+        return {"version": SYNC_STATE_VERSION, "files": dict.fromkeys(state["files"])}
+    if not isinstance(state, dict) or state.get("version") != SYNC_STATE_VERSION:
+        state = {"version": SYNC_STATE_VERSION, "files": {}}
+    return state
+
+def _sync_file(src_dir, dest_dir, rel_path, entry, use_hash, link_mode, report, compressor):
+    # Returns the entry to record for rel_path
+    src_path = os.path.join(src_dir, rel_path)
+    dest_path = os.path.join(dest_dir, rel_path)
+    entry, changed = _source_entry(src_path, dest_path, entry, use_hash)
+    if not changed:
+        report["unchanged"] += 1
+        if compressor is not None:
+            compressor.submit_file(dest_path, changed=False)
+        return entry
+    if not os.path.lexists(dest_path):
+        report["added"].append(rel_path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    method = place_file(src_path, dest_path, link_mode)
+    report["copied" if method == "copy" else method].append(rel_path)
+    if compressor is not None:
+        compressor.submit_file(dest_path)
+    else:
+        remove_sidecars(dest_path)
+    return entry
+
+def _new_sync_report(link_mode):
+    if link_mode not in ("copy", "hardlink", "reflink"):
+        raise ValueError(f"Unknown link mode: {link_mode}")
+    # "added" lists the placed files that did not exist in dest_dir before
+    return {"copied": [], "hardlink": [], "reflink": [], "added": [], "unchanged": 0,
+            "removed": []}
+
+def sync_static_files(src_dir, dest_dir, state_path=DEFAULT_SYNC_STATE_PATH,
+                      use_hash=False, link_mode="copy", compressor=None):
+    # Unlike copy_static_files this leaves dest_dir in place: only new or
+    # changed files are written, and files synced last time whose source is
+    # gone are deleted. Generated pages in dest_dir are never touched.
+    report = _new_sync_report(link_mode)
+    state = _load_sync_state(state_path)
+
+    synced = {}
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        rel_root = os.path.relpath(root, src_dir)
+        for name in sorted(files):
+            rel_path = os.path.normpath(os.path.join(rel_root, name))
+            synced[rel_path] = _sync_file(src_dir, dest_dir, rel_path, state["files"].get(rel_path),
+                                          use_hash, link_mode, report, compressor)
+
+    for rel_path in state["files"]:
+        if rel_path not in synced:
+            remove_output(os.path.join(dest_dir, rel_path), dest_dir)
+            report["removed"].append(rel_path)
+
+    write_json_atomic(state_path, {"version": SYNC_STATE_VERSION, "files": synced})
+    return report
+
+def sync_static_paths(src_dir, dest_dir, rel_paths, state_path=DEFAULT_SYNC_STATE_PATH,
+                      use_hash=False, link_mode="copy", compressor=None):
+    # Same as sync_static_files, restricted to the given paths relative to
+    # src_dir; paths that no longer exist in src_dir are removed from dest_dir.
+    report = _new_sync_report(link_mode)
+    state = _load_sync_state(state_path)
+    files = state["files"]
+
+    for rel_path in sorted(set(map(os.path.normpath, rel_paths))):
+        if os.path.isfile(os.path.join(src_dir, rel_path)):
+            files[rel_path] = _sync_file(src_dir, dest_dir, rel_path, files.get(rel_path), use_hash,
+                                         link_mode, report, compressor)
+        elif rel_path in files:
+            del files[rel_path]
+            remove_output(os.path.join(dest_dir, rel_path), dest_dir)
+            report["removed"].append(rel_path)
+
+    write_json_atomic(state_path, {"version": SYNC_STATE_VERSION, "files": files})
+    return report
@@ -0,0 +1,180 @@
+import os
+import re
+
+from markdown_utilities import read_json, write_json_atomic
+
+FRONT_MATTER_DELIMITER = "---"
+MAX_FRONT_MATTER_LINES = 200
+METADATA_INDEX_VERSION = 1
+DEFAULT_METADATA_INDEX_PATH = os.path.join(".ssg-cache", "metadata.json")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?)?$")
+KEY_PATTERN = re.compile(r"([A-Za-z_][A-Za-z0-9_-]*)\s*:\s*(.*)$")
+
+def _parse_scalar(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.lower() in ("true", "yes"):
+        return True
+    if text.lower() in ("false", "no"):
+        return False
+    if text.startswith("[") and text.endswith("]"):
+        return [_parse_scalar(item) for item in text[1:-1].split(",") if item.strip()]
+    return text
+
+def _check(meta, source):
+    # The keys the generator itself relies on get their types checked
+    if "title" in meta and not isinstance(meta["title"], str):
+        meta["title"] = str(meta["title"])
+    if "date" in meta and not (isinstance(meta["date"], str) and DATE_PATTERN.match(meta["date"])):
+        raise ValueError(f"Invalid date {meta['date']!r} in the front matter of {source}.")
+    if "draft" in meta and not isinstance(meta["draft"], bool):
+        raise ValueError(f"draft must be true or false in the front matter of {source}.")
+    if "tags" in meta:
+        tags = meta["tags"]
+        if isinstance(tags, str):
+            tags = [tags] if tags else []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ValueError(f"tags must be a list of names in the front matter of {source}.")
+        meta["tags"] = tags
+    return meta
+
+def _with_defaults(meta):
+    meta.setdefault("tags", [])
+    meta.setdefault("draft", False)
+    return meta
+
+def parse_front_matter(lines, source="<page>"):
+    # A small YAML subset: "key: value" lines, [a, b] or "- item" lists,
+    # true/false, quoted strings and # comments
+    meta = {}
+    list_key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and list_key is not None:
+            meta[list_key].append(_parse_scalar(stripped[2:]))
+            continue
+        match = KEY_PATTERN.match(stripped)
+        if match is None:
+            raise ValueError(f"Invalid front matter line {stripped!r} in {source}.")
+        key, value = match.groups()
+        if value:
+            meta[key] = _parse_scalar(value)
+            list_key = None
+        else:
+            meta[key] = []
+            list_key = key
+    return _check(meta, source)
+
+def split_front_matter(markdown, source="<page>"):
+    # Returns (meta, body); a document without front matter is all body
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return _with_defaults({}), markdown
+    first_end = markdown.find("\n")
+    if first_end == -1 or markdown[:first_end].rstrip() != FRONT_MATTER_DELIMITER:
+        return _with_defaults({}), markdown
+    position = first_end + 1
+    lines = []
+    while True:
+        end = markdown.find("\n", position)
+        line = markdown[position:] if end == -1 else markdown[position:end]
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            body = "" if end == -1 else markdown[end + 1:]
+            return _with_defaults(parse_front_matter(lines, source)), body
+        if end == -1:
+            raise ValueError(f"Unclosed front matter in {source}.")
+        lines.append(line)
+        position = end + 1
+
+def read_page_metadata(path):
+    # Reads only as far into the file as it must: the front matter, and past
+    # it only when no title was given there, up to the first "# " heading.
+    with open(path, 'r') as f:
+        line = f.readline()
+        meta = {}
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            lines = []
+            for line in f:
+                if line.rstrip() == FRONT_MATTER_DELIMITER:
+                    break
+                lines.append(line)
+                if len(lines) > MAX_FRONT_MATTER_LINES:
+                    raise ValueError(f"Front matter of {path} is longer than {MAX_FRONT_MATTER_LINES} lines.")
+            else:
+                raise ValueError(f"Unclosed front matter in {path}.")
+            meta = parse_front_matter(lines, path)
+            line = f.readline()
+        if "title" not in meta:
+            while line:
+                if line.startswith("# "):
+                    meta["title"] = line[2:].strip()
+                    break
+                line = f.readline()
+    return _with_defaults(meta)
+
+def page_url(rel_path):
+    # Where find_pages writes the page, as a site URL
+    return "/" + rel_path[:-len(".md")].replace(os.sep, "/") + ".html"
+
+class MetadataIndex:
+    # Site-wide page metadata, persisted between builds. Entries are read
+    # lazily and only for pages whose size or mtime changed, so listings,
+    # draft filtering and title lookups never touch page bodies.
+    def __init__(self, content_dir, index_path=DEFAULT_METADATA_INDEX_PATH):
+        self.content_dir = content_dir
+        self.index_path = index_path
+        state = read_json(index_path, None)
+        if (not isinstance(state, dict) or state.get("version") != METADATA_INDEX_VERSION
+                or state.get("content_dir") != content_dir):
+            state = {"pages": {}}
+        self.entries = state["pages"]
+        self.read = []
+        self.dirty = False
+
+    def get(self, from_path, rel_path=None):
+        if rel_path is None:
+            rel_path = os.path.relpath(from_path, self.content_dir)
+        stat = os.stat(from_path)
+        entry = self.entries.get(rel_path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            meta = read_page_metadata(from_path)
+            meta["path"] = rel_path
+            meta["url"] = page_url(rel_path)
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "meta": meta}
+            self.entries[rel_path] = entry
+            self.read.append(rel_path)
+            self.dirty = True
+        return entry["meta"]
+
+    def is_draft(self, from_path):
+        return self.get(from_path)["draft"]
+
+    def title(self, from_path):
+        return self.get(from_path).get("title")
+
+    def pages(self):
+        # Metadata of every page under the content directory, in find_pages order;
+        # entries for deleted pages are dropped
+        found = {}
+        for root, dirs, files in os.walk(self.content_dir):
+            dirs.sort()
+            rel_root = os.path.relpath(root, self.content_dir)
+            for name in sorted(files):
+                if name.endswith(".md"):
+                    rel_path = name if rel_root == os.curdir else os.path.join(rel_root, name)
+                    found[rel_path] = self.get(os.path.join(root, name), rel_path)
+        for rel_path in [rel_path for rel_path in self.entries if rel_path not in found]:
+            del self.entries[rel_path]
+            self.dirty = True
+        return list(found.values())
+
+    def save(self):
+        if self.dirty:
+            write_json_atomic(self.index_path, {
+                "version": METADATA_INDEX_VERSION,
+                "content_dir": self.content_dir,
+                "pages": self.entries,
+            })
+            self.dirty = False
@@ -0,0 +1,80 @@
+import os
+
+from markdown_utilities import remove_output, write_json_atomic
+
+DEFAULT_CHANGES_PATH = os.path.join(".ssg-cache", "changes.json")
+
+class ChangeSet:
+    # Output paths a build added, changed or removed, relative to the output
+    # root with "/" separators, so a deploy step can upload and purge just those.
+    def __init__(self, root):
+        self.root = root
+        self.added = set()
+        self.changed = set()
+        self.removed = set()
+        self.unchanged = 0
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def record(self, path, outcome):
+        if outcome == "unchanged":
+            self.unchanged += 1
+        elif outcome == "added":
+            self.added.add(self._rel(path))
+        elif outcome == "changed":
+            self.changed.add(self._rel(path))
+        elif outcome == "removed":
+            self.removed.add(self._rel(path))
+        else:
+            raise ValueError(f"Unknown output change: {outcome}")
+
+    def record_static_sync(self, report):
+        added = set(report["added"])
+        for rel_path in report["copied"] + report["hardlink"] + report["reflink"]:
+            self.record(os.path.join(self.root, rel_path),
+                        "added" if rel_path in added else "changed")
+        self.unchanged += report["unchanged"]
+        for rel_path in report["removed"]:
+            self.record(os.path.join(self.root, rel_path), "removed")
+
+    def include_sidecars(self, compressor):
+        # Precompressed siblings follow their file: deployed with it, purged with it
+        for paths, check in ((self.added, True), (self.changed, True), (self.removed, False)):
+            for rel_path in list(paths):
+                path = os.path.join(self.root, rel_path)
+                if not compressor.wants(path):
+                    continue
+                for sidecar in compressor.sidecars(path):
+                    if not check or os.path.exists(sidecar):
+                        paths.add(self._rel(sidecar))
+
+    def to_dict(self):
+        # A path removed and written again in one build is a change, not both
+        readded = self.added & self.removed
+        return {
+            "added": sorted(self.added - readded),
+            "changed": sorted(self.changed | readded),
+            "removed": sorted(self.removed - readded),
+            "unchanged": self.unchanged,
+        }
+
+    def write(self, path=DEFAULT_CHANGES_PATH):
+        data = self.to_dict()
+        write_json_atomic(path, data)
+        return data
+
+def prune_outputs(dest_dir, keep, changes=None):
+    # Deletes every file under dest_dir that is not in keep, the full set of
+    # outputs this build owns; replaces wiping the tree before a full build.
+    keep = {os.path.normpath(path) for path in keep}
+    removed = []
+    for root, dirs, files in os.walk(dest_dir, topdown=False):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if path not in keep:
+                remove_output(path, dest_dir)
+                removed.append(path)
+                if changes is not None:
+                    changes.record(path, "removed")
+    return removed
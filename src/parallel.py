@@ -0,0 +1,111 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from assets import asset_urls, set_asset_urls
+from build_stats import QUIET, BuildStats
+from compression import Compressor
+from images import image_sizes, set_image_sizes
+from markdown_core import generate_page
+from parse_cache import ParseCache
+from template import TemplateSet
+from transforms import load_plugins, loaded_plugins, registered_transforms
+
+# Set once per worker process by _init_worker so the template is compiled a single time.
+_worker_template_path = None
+_worker_template = None
+_worker_stats = None
+_worker_parse_cache = None
+_worker_compressor = None
+_worker_links = False
+
+def _init_worker(template_path, content_dir, collect_stats, parse_cache_dir, compression, urls, sizes,
+                 plugins, collect_links):
+    global _worker_template_path, _worker_template, _worker_stats, _worker_parse_cache
+    global _worker_compressor, _worker_links
+    # Set before the template loads: both it and page links use fingerprinted asset URLs
+    set_asset_urls(urls)
+    set_image_sizes(sizes)
+    if not registered_transforms():
+        # Spawned workers start empty; forked ones already have the parent's
+        load_plugins(plugins)
+    _worker_template_path = template_path
+    _worker_template = TemplateSet(template_path, content_dir)
+    # Workers stay silent; the parent logs records as they arrive, in order
+    _worker_stats = BuildStats(QUIET) if collect_stats else None
+    # Entries are written atomically, so workers can share one cache directory
+    _worker_parse_cache = ParseCache(parse_cache_dir) if parse_cache_dir is not None else None
+    _worker_links = collect_links
+    # The pool already spreads pages over cores, so workers compress inline
+    if compression is not None:
+        formats, min_size = compression
+        _worker_compressor = Compressor(formats, min_size, workers=0)
+
+def _generate_page_task(page):
+    from_path, dest_path = page
+    links = {} if _worker_links else None
+    try:
+        outcome = generate_page(from_path, _worker_template_path, dest_path,
+                                template=_worker_template, stats=_worker_stats,
+                                parse_cache=_worker_parse_cache, compressor=_worker_compressor,
+                                links=links)
+    except Exception:
+        # Returned rather than raised so one bad page cannot wedge the pool.
+        return from_path, traceback.format_exc(), None, None, None
+    record = _worker_stats.pages.pop() if _worker_stats is not None else None
+    return from_path, None, record, outcome, links
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+def default_chunksize(page_count, jobs):
+    # A few chunks per worker keeps the pool balanced without per-page IPC.
+    return max(1, page_count // (jobs * 4))
+
+def generate_pages(pages, template_path, jobs=1, chunksize=None, stats=None, parse_cache=None,
+                   changes=None, compressor=None, content_dir=None, links=None):
+    # With content_dir, pages in a section use its layout when one exists.
+    # When links is a dict it maps each page to the URLs and ids found in it.
+    pages = list(pages)
+    if jobs <= 1 or len(pages) <= 1:
+        template = TemplateSet(template_path, content_dir)
+        for from_path, dest_path in pages:
+            page_links = {} if links is not None else None
+            outcome = generate_page(from_path, template_path, dest_path, template=template,
+                                    stats=stats, parse_cache=parse_cache, compressor=compressor,
+                                    links=page_links)
+            if changes is not None:
+                changes.record(dest_path, outcome)
+            if links is not None:
+                links[from_path] = page_links
+        return [from_path for from_path, _ in pages]
+
+    jobs = min(jobs, len(pages))
+    if chunksize is None:
+        chunksize = default_chunksize(len(pages), jobs)
+
+    failures = []
+    generated = []
+    initargs = (template_path, content_dir, stats is not None,
+                parse_cache.cache_dir if parse_cache is not None else None,
+                (compressor.formats, compressor.min_size) if compressor is not None else None,
+                asset_urls(), image_sizes(), loaded_plugins(), links is not None)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as pool:
+        # map() yields in submission order, so results stay deterministic.
+        results = pool.map(_generate_page_task, pages, chunksize=chunksize)
+        for (_, dest_path), (from_path, error, record, outcome, page_links) in zip(pages, results):
+            if error is None:
+                generated.append(from_path)
+                if stats is not None:
+                    stats.add_page(record)
+                if changes is not None:
+                    changes.record(dest_path, outcome)
+                if links is not None:
+                    links[from_path] = page_links
+            else:
+                failures.append((from_path, error))
+
+    if failures:
+        details = "\n".join(f"--- {from_path}\n{error}" for from_path, error in failures)
+        raise RuntimeError(f"Failed to generate {len(failures)} page(s):\n{details}")
+    return generated
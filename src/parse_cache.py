@@ -0,0 +1,108 @@
+import hashlib
+import marshal
+import os
+import sys
+
+from assets import asset_version
+from images import image_version
+from transforms import transforms_key
+
+PARSE_CACHE_FORMAT = 1
+DEFAULT_PARSE_CACHE_DIR = os.path.join(".ssg-cache", "parsed")
+# Modules whose code decides what a markdown document parses to
+PARSER_MODULES = ("assets.py", "block_scanner.py", "htmlnode.py", "images.py", "markdown_core.py",
+                  "markdown_utilities.py", "metadata.py", "textnode.py", "transforms.py")
+
+_parser_version = None
+
+def parser_version():
+    global _parser_version
+    if _parser_version is None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256(f"{PARSE_CACHE_FORMAT}:{sys.version}".encode("utf-8"))
+        for name in PARSER_MODULES:
+            with open(os.path.join(src_dir, name), 'rb') as f:
+                digest.update(f.read())
+        _parser_version = digest.hexdigest()
+    return _parser_version
+
+class ParseCache:
+    # On-disk cache of parsed pages keyed by source content and parser version.
+    # A page is stored as its title, node count and serialized body HTML: that
+    # is all a template-only rebuild needs, and it loads far faster than
+    # rebuilding node objects would. File mtimes double as the LRU clock: hits
+    # touch the entry and trim() evicts the stalest entries past max_bytes.
+    def __init__(self, cache_dir=DEFAULT_PARSE_CACHE_DIR, max_bytes=256 << 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        digest = hashlib.sha256(parser_version().encode("ascii"))
+        # Links to static files render as their fingerprinted URLs, and
+        # images carry the probed dimensions
+        digest.update(asset_version().encode("ascii"))
+        digest.update(image_version().encode("ascii"))
+        digest.update(transforms_key().encode("utf-8"))
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".bin")
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                title, content, node_count = marshal.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (EOFError, ValueError, TypeError):
+            # Truncated or foreign entry: drop it and parse again
+            self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)
+        self.hits += 1
+        return title, content, node_count
+
+    def store(self, key, title, content, node_count):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump((title, content, node_count), f)
+        os.replace(tmp_path, path)
+
+    def trim(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return 0
+        # Evict down to 90% so the next few builds do not trim again
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from markdown_core import parse_page, render_content
+from template import TemplateSet
+from transforms import BUILTIN_TRANSFORMS, load_plugins
+
+class LRUCache:
+    # Bounded by the total size of the cached values, oldest use evicted first.
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def __len__(self):
+        return len(self.entries)
+
+def _safe_join(root, url_path):
+    # Maps a URL path under root, refusing anything that escapes it
+    path = os.path.normpath(os.path.join(root, url_path.lstrip("/")))
+    root = os.path.normpath(root)
+    if path != root and not path.startswith(root + os.sep):
+        return None
+    return path
+
+class PageRenderer:
+    def __init__(self, content_dir, template_path, cache_bytes=64 << 20):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.cache = LRUCache(cache_bytes)
+        self.templates = TemplateSet(template_path, content_dir)
+        self.template_lock = threading.Lock()
+
+    def resolve(self, url_path):
+        # "/", "/dir", "/dir/" and "/dir/index.html" all map to dir/index.md;
+        # "/page.html" maps to page.md
+        path = _safe_join(self.content_dir, url_path)
+        if path is None:
+            return None
+        if path.endswith(".html"):
+            candidates = [path[:-len(".html")] + ".md"]
+        else:
+            candidates = [os.path.join(path, "index.md"), path + ".md"]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def _current_template(self, source_path):
+        # Compiled templates are reused until one of their files changes
+        with self.template_lock:
+            template = self.templates.for_page(source_path)
+        # Layouts and partials date the page as much as the template itself
+        return template, max((os.stat(path).st_mtime for path in template.files),
+                             default=os.stat(template.name).st_mtime)
+
+    def render(self, source_path):
+        # Returns (body, etag, last_modified); rendered once per source and
+        # template version, then answered from the LRU.
+        template, template_mtime = self._current_template(source_path)
+        stat = os.stat(source_path)
+        key = (source_path, stat.st_mtime_ns, stat.st_size, template.digest)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with open(source_path, 'r') as f:
+            title, html_node, meta = parse_page(f.read(), source=source_path)
+        body = template.render({"Title": title, "Content": render_content(html_node),
+                                "Page": meta}).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        last_modified = max(stat.st_mtime, template_mtime)
+        rendered = (body, etag, last_modified)
+        self.cache.put(key, rendered, len(body))
+        return rendered
+
+class SiteRequestHandler(BaseHTTPRequestHandler):
+    server_version = "StaticSiteGenerator"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        url_path = unquote(urlsplit(self.path).path)
+        renderer = self.server.renderer
+
+        source_path = renderer.resolve(url_path)
+        if source_path is not None:
+            try:
+                body, etag, last_modified = renderer.render(source_path)
+            except Exception as error:
+                self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Failed to render page: {error}")
+                return
+            if self.not_modified(etag, last_modified):
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_validators("text/html; charset=utf-8", len(body), etag, last_modified)
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        static_path = _safe_join(self.server.static_dir, url_path)
+        if static_path is not None and os.path.isdir(static_path):
+            static_path = os.path.join(static_path, "index.html")
+        if static_path is None or not os.path.isfile(static_path):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self.send_static(static_path, send_body)
+
+    def send_static(self, path, send_body):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self.not_modified(etag, stat.st_mtime):
+                return
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            self.send_response(HTTPStatus.OK)
+            self.send_validators(content_type, stat.st_size, etag, stat.st_mtime)
+            if send_body:
+                self.wfile.flush()
+                # socket.sendfile uses os.sendfile, so the bytes never enter Python
+                self.connection.sendfile(f)
+
+    def send_validators(self, content_type, length, etag, last_modified):
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(last_modified, usegmt=True))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            matched = any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+        else:
+            if_modified_since = self.headers.get("If-Modified-Since")
+            matched = False
+            if if_modified_since:
+                try:
+                    since = parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError):
+                    since = None
+                # HTTP dates have one-second resolution
+                matched = since is not None and int(last_modified) <= since
+        if not matched:
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(last_modified, usegmt=True))
+        self.end_headers()
+        return True
+
+def create_server(address, content_dir, static_dir, template_path, cache_bytes=64 << 20,
+                  quiet=False):
+    server = ThreadingHTTPServer(address, SiteRequestHandler)
+    server.quiet = quiet
+    server.renderer = PageRenderer(content_dir, template_path, cache_bytes)
+    server.static_dir = static_dir
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the site, rendering pages on demand.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--cache-mb", type=int, default=64, help="rendered page cache size")
+    parser.add_argument("--plugin", action="append", default=[], metavar="NAME",
+                        help="run a page transform: a built-in one ("
+                             + ", ".join(sorted(BUILTIN_TRANSFORMS))
+                             + ") or a module that registers its own; may be repeated")
+    args = parser.parse_args(argv)
+
+    load_plugins(args.plugin)
+
+    server = create_server((args.host, args.port), "content", "static", "template.html",
+                           cache_bytes=args.cache_mb << 20)
+    print(f"Serving on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
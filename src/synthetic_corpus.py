@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+
+WORDS = ("the ring elves dwarves shire hobbit wizard mountain river forest tower "
+         "road journey king sword council friend shadow light song map").split()
+
+def _sentence(rng, links, link_density):
+    words = []
+    for _ in range(rng.randint(6, 14)):
+        roll = rng.random()
+        word = rng.choice(WORDS)
+        if roll < link_density:
+            links[0] += 1
+            word = f"[{word}](/page-{links[0] % 997}/)"
+        elif roll < link_density + 0.05:
+            word = f"**{word}**"
+        elif roll < link_density + 0.1:
+            word = f"*{word}*"
+        elif roll < link_density + 0.13:
+            word = f"`{word}`"
+        words.append(word)
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng, links, link_density):
+    return " ".join(_sentence(rng, links, link_density) for _ in range(rng.randint(2, 5)))
+
+def _quote(rng, links, link_density, depth, list_items):
+    lines = []
+    for level in range(1, depth + 1):
+        prefix = "> " * level
+        lines.append(prefix + _sentence(rng, links, link_density))
+        if list_items and level == depth:
+            lines.extend(f"{prefix}* {rng.choice(WORDS)} item {i}" for i in range(list_items))
+    return "\n".join(lines)
+
+def _list(rng, links, link_density, items, ordered):
+    if ordered:
+        return "\n".join(f"{i}. {_sentence(rng, links, link_density)}" for i in range(1, items + 1))
+    return "\n".join(f"* {_sentence(rng, links, link_density)}" for _ in range(items))
+
+def _code(rng):
+    body = "\n".join(f"    {rng.choice(WORDS)}({i})" for i in range(rng.randint(3, 12)))
+    return f"```\nfunc main() {{\n{body}\n}}\n```"
+
+def generate_page_markdown(rng, page_size=4000, link_density=0.1, quote_depth=2,
+                           list_items=5, code_ratio=0.1, title="Page"):
+    links = [0]
+    blocks = [f"# {title}"]
+    size = len(blocks[0])
+    while size < page_size:
+        roll = rng.random()
+        if roll < code_ratio:
+            block = _code(rng)
+        elif roll < code_ratio + 0.1 and quote_depth:
+            block = _quote(rng, links, link_density, rng.randint(1, quote_depth), list_items)
+        elif roll < code_ratio + 0.2 and list_items:
+            block = _list(rng, links, link_density, list_items, ordered=rng.random() < 0.5)
+        elif roll < code_ratio + 0.25:
+            block = f"## {rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}"
+        else:
+            block = _paragraph(rng, links, link_density)
+        blocks.append(block)
+        size += len(block) + 2
+    return "\n\n".join(blocks)
+
+def generate_corpus(dest_dir, pages=100, page_size=4000, link_density=0.1, quote_depth=2,
+                    list_items=5, code_ratio=0.1, pages_per_dir=100, seed=0):
+    # The same arguments and seed always produce byte-identical trees
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        section_dir = os.path.join(dest_dir, f"section-{i // pages_per_dir:04d}")
+        os.makedirs(section_dir, exist_ok=True)
+        path = os.path.join(section_dir, f"page-{i:06d}.md")
+        markdown = generate_page_markdown(
+            rng, page_size=page_size, link_density=link_density, quote_depth=quote_depth,
+            list_items=list_items, code_ratio=code_ratio, title=f"Page {i}",
+        )
+        with open(path, 'w') as f:
+            f.write(markdown)
+        paths.append(path)
+    return paths
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=200, help="number of pages to generate")
+    parser.add_argument("--page-size", type=int, default=4000, help="approximate characters per page")
+    parser.add_argument("--link-density", type=float, default=0.1,
+                        help="fraction of words that become links")
+    parser.add_argument("--quote-depth", type=int, default=2, help="maximum blockquote nesting")
+    parser.add_argument("--list-items", type=int, default=5,
+                        help="items per list, including lists nested in quotes")
+    parser.add_argument("--code-ratio", type=float, default=0.1,
+                        help="fraction of blocks that are fenced code")
+    parser.add_argument("--seed", type=int, default=0)
+
+def corpus_options(args):
+    return {
+        "pages": args.pages,
+        "page_size": args.page_size,
+        "link_density": args.link_density,
+        "quote_depth": args.quote_depth,
+        "list_items": args.list_items,
+        "code_ratio": args.code_ratio,
+        "seed": args.seed,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic content/ tree.")
+    parser.add_argument("dest_dir")
+    add_corpus_arguments(parser)
+    args = parser.parse_args(argv)
+    paths = generate_corpus(args.dest_dir, **corpus_options(args))
+    print(f"Wrote {len(paths)} pages to {args.dest_dir}")
+
+if __name__ == "__main__":
+    main()
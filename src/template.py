@@ -0,0 +1,414 @@
+import hashlib
+import html
+import os
+import re
+
+from assets import ATTRIBUTE_PATTERN, asset_version, rewrite_asset_urls
+
+TOKEN_PATTERN = re.compile(r"\{\{(.*?)\}\}|\{%(.*?)%\}", re.DOTALL)
+PATH_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*$")
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")
+STRING_PATTERN = re.compile(r"""(["'])(.*)\1$""")
+LAYOUTS_DIR = "layouts"
+PARTIALS_DIR = "partials"
+MAX_INCLUDE_DEPTH = 32
+
+FILTERS = {
+    "escape": lambda value: html.escape(str(value)),
+    "upper": lambda value: str(value).upper(),
+    "lower": lambda value: str(value).lower(),
+    "join": lambda value: ", ".join(map(str, value)),
+}
+
+# Runtime helpers the generated render functions call
+def _get(values, name):
+    try:
+        return values[name]
+    except KeyError:
+        raise ValueError(f"No value for template placeholder '{name}'.") from None
+
+def _attr(value, name):
+    if isinstance(value, dict):
+        try:
+            return value[name]
+        except KeyError:
+            raise ValueError(f"No value for template placeholder '{name}'.") from None
+    try:
+        return getattr(value, name)
+    except AttributeError:
+        raise ValueError(f"No value for template placeholder '{name}'.") from None
+
+def _test(value, names):
+    # Like a chain of _attr calls, but anything missing is simply false
+    for name in names:
+        if value is None:
+            return None
+        value = value.get(name) if isinstance(value, dict) else getattr(value, name, None)
+    return value
+
+def _emit(out, value):
+    # Values are strings or HTML nodes; nodes are streamed piece by piece
+    if isinstance(value, str):
+        out.append(value)
+    elif hasattr(value, "iter_html"):
+        out.extend(value.iter_html())
+    else:
+        out.append(str(value))
+
+def _parse_path(text, source_name):
+    text = text.strip()
+    if not PATH_PATTERN.match(text):
+        raise ValueError(f"Invalid template expression '{text}' in {source_name}.")
+    return tuple(text.split("."))
+
+def _parse_expression(text, source_name):
+    path, *filters = [part.strip() for part in text.split("|")]
+    for name in filters:
+        if name not in FILTERS:
+            raise ValueError(f"Unknown template filter '{name}' in {source_name}.")
+    return ("expr", _parse_path(path, source_name), tuple(filters))
+
+def _parse_string(text, source_name):
+    match = STRING_PATTERN.match(text.strip())
+    if match is None:
+        raise ValueError(f"Expected a quoted template name, got '{text.strip()}' in {source_name}.")
+    return match.group(2)
+
+def parse_template(source, source_name="<template>"):
+    # Returns (extends, nodes, blocks). Nodes are tuples:
+    # ("text", s), ("expr", path, filters), ("for", name, path, body),
+    # ("if", path, negate, body, else_body), ("include", name), ("block", name, body)
+    root = []
+    stack = [("root", root, None)]
+    blocks = {}
+    extends = None
+    position = 0
+    for match in TOKEN_PATTERN.finditer(source):
+        body = stack[-1][1]
+        if match.start() > position:
+            body.append(("text", source[position:match.start()]))
+        position = match.end()
+        if match.group(1) is not None:
+            body.append(_parse_expression(match.group(1), source_name))
+            continue
+
+        words = match.group(2).split(None, 1)
+        keyword = words[0] if words else ""
+        argument = words[1] if len(words) > 1 else ""
+        if keyword == "for":
+            target, _, iterable = argument.partition(" in ")
+            if not NAME_PATTERN.match(target.strip()):
+                raise ValueError(f"Invalid loop variable '{target.strip()}' in {source_name}.")
+            node = ["for", target.strip(), _parse_path(iterable, source_name), []]
+            body.append(node)
+            stack.append(("for", node[3], node))
+        elif keyword == "if":
+            negate = argument.startswith("not ")
+            path = _parse_path(argument[4:] if negate else argument, source_name)
+            node = ["if", path, negate, [], []]
+            body.append(node)
+            stack.append(("if", node[3], node))
+        elif keyword == "else":
+            kind, _, node = stack.pop()
+            if kind != "if" or body is node[4]:
+                raise ValueError(f"Unexpected else in {source_name}.")
+            stack.append(("if", node[4], node))
+        elif keyword == "block":
+            name = argument.strip()
+            if not NAME_PATTERN.match(name) or name in blocks:
+                raise ValueError(f"Invalid or repeated block '{name}' in {source_name}.")
+            node = ["block", name, []]
+            blocks[name] = node[2]
+            body.append(node)
+            stack.append(("block", node[2], node))
+        elif keyword in ("endfor", "endif", "endblock"):
+            kind, _, _ = stack.pop()
+            if kind != keyword[3:]:
+                raise ValueError(f"Unexpected {keyword} in {source_name}.")
+        elif keyword == "include":
+            body.append(("include", _parse_string(argument, source_name)))
+        elif keyword == "extends":
+            if extends is not None or len(stack) > 1:
+                raise ValueError(f"extends must appear once, at the top level of {source_name}.")
+            extends = _parse_string(argument, source_name)
+        else:
+            raise ValueError(f"Unknown template tag '{keyword}' in {source_name}.")
+    if len(stack) > 1:
+        raise ValueError(f"Unclosed {stack[-1][0]} in {source_name}.")
+    if position < len(source):
+        root.append(("text", source[position:]))
+    return extends, root, blocks
+
+class _Loader:
+    # Reads and parses the files one template is compiled from, recording
+    # each file's hash so the compiled result can be checked for staleness
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        self.references = set()
+
+    def parse(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.files[os.path.abspath(path)] = hashlib.sha256(data).hexdigest()
+        source = data.decode("utf-8")
+        self.references.update(match.group(3) for match in ATTRIBUTE_PATTERN.finditer(source))
+        # Static file references point at fingerprinted names
+        return parse_template(rewrite_asset_urls(source), path)
+
+    def resolve(self, name):
+        return os.path.join(self.root, name)
+
+    def expand(self, path):
+        # Layout inheritance is resolved here, at compile time: the chain of
+        # extends is walked up and the most derived definition of each block wins
+        extends, nodes, blocks = self.parse(path)
+        overrides = dict(blocks)
+        chain = [path]
+        while extends is not None:
+            parent = self.resolve(extends)
+            if parent in chain:
+                raise ValueError(f"Template {path} extends itself through {parent}.")
+            chain.append(parent)
+            extends, nodes, parent_blocks = self.parse(parent)
+            for name, body in parent_blocks.items():
+                overrides.setdefault(name, body)
+        return self._inline(nodes, overrides, 0)
+
+    def _inline(self, nodes, overrides, depth):
+        result = []
+        for node in nodes:
+            kind = node[0]
+            if kind == "block":
+                result.extend(self._inline(overrides.get(node[1], node[2]), overrides, depth))
+            elif kind == "include":
+                if self.root is None:
+                    raise ValueError(f"Cannot include {node[1]} from a template not loaded from a file.")
+                if depth >= MAX_INCLUDE_DEPTH:
+                    raise ValueError(f"Includes nested deeper than {MAX_INCLUDE_DEPTH}: {node[1]}")
+                extends, included, blocks = self.parse(self.resolve(node[1]))
+                if extends is not None:
+                    raise ValueError(f"Included template {node[1]} cannot use extends.")
+                result.extend(self._inline(included, blocks, depth + 1))
+            elif kind == "for":
+                result.append(("for", node[1], node[2], self._inline(node[3], overrides, depth)))
+            elif kind == "if":
+                result.append(("if", node[1], node[2], self._inline(node[3], overrides, depth),
+                               self._inline(node[4], overrides, depth)))
+            else:
+                result.append(node)
+        return result
+
+class _CodeGenerator:
+    def __init__(self):
+        self.lines = ["def render(values, out):", "    append = out.append"]
+        self.constants = []
+        self.counter = 0
+
+    def constant(self, value):
+        self.constants.append(value)
+        return f"_c{len(self.constants) - 1}"
+
+    def value(self, path, scope):
+        head, rest = path[0], path[1:]
+        code = scope[head] if head in scope else f"_get(values, {head!r})"
+        for name in rest:
+            code = f"_attr({code}, {name!r})"
+        return code
+
+    def condition(self, path, scope):
+        head, rest = path[0], path[1:]
+        base = scope[head] if head in scope else f"values.get({head!r})"
+        return f"_test({base}, {rest!r})" if rest else base
+
+    def emit(self, nodes, scope, indent):
+        pad = "    " * indent
+        text = []
+        def flush():
+            if text:
+                self.lines.append(f"{pad}append({''.join(text)!r})")
+                text.clear()
+        for node in nodes:
+            kind = node[0]
+            if kind == "text":
+                text.append(node[1])
+                continue
+            flush()
+            if kind == "expr":
+                code = self.value(node[1], scope)
+                if node[2]:
+                    for name in node[2]:
+                        code = f"{self.constant(FILTERS[name])}({code})"
+                    self.lines.append(f"{pad}append({code})")
+                else:
+                    self.lines.append(f"{pad}_emit(out, {code})")
+            elif kind == "for":
+                self.counter += 1
+                local = f"_v{self.counter}"
+                self.lines.append(f"{pad}for {local} in {self.value(node[2], scope)}:")
+                self.emit(node[3], {**scope, node[1]: local}, indent + 1)
+                self.lines.append(f"{pad}    pass")
+            elif kind == "if":
+                test = self.condition(node[1], scope)
+                self.lines.append(f"{pad}if {'not ' if node[2] else ''}{test}:")
+                self.emit(node[3], scope, indent + 1)
+                self.lines.append(f"{pad}    pass")
+                if node[4]:
+                    self.lines.append(f"{pad}else:")
+                    self.emit(node[4], scope, indent + 1)
+        flush()
+
+def compile_nodes(nodes, name="<template>"):
+    # Generates the Python source of one render function that appends every
+    # piece of the page to a list, then compiles it
+    generator = _CodeGenerator()
+    generator.emit(nodes, {}, 1)
+    namespace = {"_get": _get, "_attr": _attr, "_test": _test, "_emit": _emit}
+    namespace.update((f"_c{index}", value) for index, value in enumerate(generator.constants))
+    exec(compile("\n".join(generator.lines), name, "exec"), namespace)
+    return namespace["render"]
+
+class Template:
+    def __init__(self, source=None, nodes=None, name="<template>", digest=None, files=(),
+                 references=()):
+        # Either template source, or nodes already expanded by a loader; files
+        # and references are the files it was compiled from and the href/src
+        # values written in them
+        if nodes is None:
+            extends, nodes, _ = parse_template(source, name)
+            if extends is not None:
+                raise ValueError("Templates that extend a layout must be loaded from a file.")
+            nodes = _Loader(None)._inline(nodes, {}, 0)
+        self.name = name
+        self.digest = digest
+        self.files = tuple(files)
+        self.references = tuple(references)
+        self._render = compile_nodes(nodes, name)
+
+    def iter_render(self, values):
+        # One call to the compiled function renders the whole page
+        out = []
+        self._render(values, out)
+        return out
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def __repr__(self):
+        return f"Template(name={self.name!r})"
+
+# Compiled templates by (path, root, asset URLs), each with the hashes of
+# the files it was compiled from; reused for as long as none of those files
+# changes. Asset URLs are rewritten as the files are read, so new ones need
+# a fresh compile.
+_compiled = {}
+
+def _files_current(files, stats):
+    for path, digest in files.items():
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stats.get(path) == stamp:
+            continue
+        with open(path, 'rb') as f:
+            if hashlib.sha256(f.read()).hexdigest() != digest:
+                return False
+        stats[path] = stamp
+    return True
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def load_template(template_path, root=None):
+    # Includes and extends resolve against root, the template's own
+    # directory unless given
+    if root is None:
+        root = os.path.dirname(template_path)
+    key = (os.path.abspath(template_path), os.path.abspath(root), asset_version())
+    entry = _compiled.get(key)
+    if entry is not None and _files_current(entry[1], entry[2]):
+        return entry[0]
+    loader = _Loader(root)
+    nodes = loader.expand(template_path)
+    digest = hashlib.sha256("".join(
+        f"{path}:{file_digest}\n" for path, file_digest in sorted(loader.files.items())
+    ).encode("utf-8")).hexdigest()
+    template = Template(nodes=nodes, name=template_path, digest=digest, files=sorted(loader.files),
+                        references=sorted(loader.references))
+    stats = {}
+    for path in loader.files:
+        stat = os.stat(path)
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    _compiled[key] = (template, loader.files, stats)
+    return template
+
+class TemplateSet:
+    # The site template plus per-section layouts: a page under content/blog/
+    # renders with layouts/blog.html when it exists, falling back through
+    # parent sections to the site template.
+    def __init__(self, template_path, content_dir=None):
+        self.template_path = template_path
+        self.content_dir = content_dir
+        self.root = os.path.dirname(template_path)
+        self.layouts_dir = os.path.join(self.root, LAYOUTS_DIR)
+        self._sections = {}
+
+    def candidates(self, from_path):
+        # Section layouts that would apply to the page, most specific first
+        if self.content_dir is None:
+            return []
+        candidates = []
+        current = os.path.dirname(os.path.relpath(from_path, self.content_dir))
+        while current and current != os.curdir:
+            candidates.append(os.path.join(self.layouts_dir, current + ".html"))
+            current = os.path.dirname(current)
+        return candidates
+
+    def path_for(self, from_path):
+        # Cached per section until a directory one of its layouts would live
+        # in changes, so a long-lived set sees layouts added or removed
+        section = os.path.dirname(from_path)
+        candidates = self.candidates(from_path)
+        stamp = tuple(_mtime_ns(os.path.dirname(candidate)) for candidate in candidates)
+        cached = self._sections.get(section)
+        if cached is not None and cached[1] == stamp:
+            return cached[0]
+        path = next((candidate for candidate in candidates if os.path.isfile(candidate)),
+                    self.template_path)
+        self._sections[section] = (path, stamp)
+        return path
+
+    def files(self, template):
+        # The files a template was compiled from, named from the template
+        # directory the way candidates() and template_path are, not from the cwd
+        root = os.path.abspath(self.root)
+        return [os.path.normpath(os.path.join(self.root, os.path.relpath(path, root)))
+                for path in template.files]
+
+    def dirs(self):
+        # Where layouts and the partials they include conventionally live
+        return [self.layouts_dir, os.path.join(self.root, PARTIALS_DIR)]
+
+    def for_page(self, from_path):
+        return load_template(self.path_for(from_path), self.root)
+
+    def for_layout(self, name):
+        # A named layout such as layouts/_list.html, else the site template
+        path = os.path.join(self.layouts_dir, name + ".html")
+        return load_template(path if os.path.isfile(path) else self.template_path, self.root)
+
+    def digest(self):
+        # Changes when the site template, any layout or anything they include does
+        paths = [self.template_path]
+        for root, dirs, files in os.walk(self.layouts_dir):
+            dirs.sort()
+            paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".html"))
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(load_template(path, self.root).digest.encode("ascii"))
+        return digest.hexdigest()
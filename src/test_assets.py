@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+
+from assets import (ASSET_MANIFEST_NAME, asset_version, fingerprint_assets, fingerprinted_path,
+                    rewrite_asset_urls, set_asset_urls, write_asset_manifest)
+from template import load_template
+from textnode import TextNode, text_node_to_html_node
+
+class TestFingerprintAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.state = os.path.join(self.tmp.name, "cache", "assets.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-bytes")
+
+    def tearDown(self):
+        set_asset_urls({})
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def fingerprint(self):
+        return fingerprint_assets(self.static, self.public, state_path=self.state)
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path(os.path.join("images", "a.png"), "0123456789abcdef"),
+                         os.path.join("images", "a.0123456789.png"))
+
+    def test_files_placed_under_hashed_names(self):
+        urls, placed = self.fingerprint()
+        self.assertEqual(sorted(urls), ["/images/a.png", "/index.css"])
+        self.assertEqual(len(placed), 2)
+        with open(os.path.join(self.public, urls["/images/a.png"].lstrip("/"))) as f:
+            self.assertEqual(f.read(), "png-bytes")
+
+    def test_unchanged_files_are_not_placed_again(self):
+        first, _ = self.fingerprint()
+        second, placed = self.fingerprint()
+        self.assertEqual(first, second)
+        self.assertEqual(placed, [])
+
+    def test_changed_file_gets_new_name(self):
+        first, _ = self.fingerprint()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        second, placed = self.fingerprint()
+        self.assertNotEqual(first["/index.css"], second["/index.css"])
+        self.assertEqual(placed, [second["/index.css"].lstrip("/")])
+
+    def test_cached_hash_reused_when_stat_matches(self):
+        self.fingerprint()
+        with open(self.state) as f:
+            state = json.load(f)
+        state["files"]["index.css"]["hash"] = "f" * 64
+        with open(self.state, 'w') as f:
+            json.dump(state, f)
+        urls, _ = self.fingerprint()
+        self.assertEqual(urls["/index.css"], "/index.ffffffffff.css")
+
+    def test_asset_manifest(self):
+        urls, _ = self.fingerprint()
+        self.assertEqual(write_asset_manifest(self.public, urls), "added")
+        self.assertEqual(write_asset_manifest(self.public, urls), "unchanged")
+        with open(os.path.join(self.public, ASSET_MANIFEST_NAME)) as f:
+            self.assertEqual(json.load(f), urls)
+
+class TestAssetUrls(unittest.TestCase):
+
+    def setUp(self):
+        set_asset_urls({"/index.css": "/index.abc.css", "/images/a.png": "/images/a.abc.png"})
+
+    def tearDown(self):
+        set_asset_urls({})
+
+    def test_rewrite_attributes(self):
+        self.assertEqual(rewrite_asset_urls('<link href="/index.css"><a href="/other.css">'),
+                         '<link href="/index.abc.css"><a href="/other.css">')
+
+    def test_image_and_link_nodes(self):
+        image = text_node_to_html_node(TextNode("alt", "image", "/images/a.png"))
+        self.assertEqual(image.props["src"], "/images/a.abc.png")
+        link = text_node_to_html_node(TextNode("css", "link", "/index.css"))
+        self.assertEqual(link.props["href"], "/index.abc.css")
+
+    def test_template_is_rewritten(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as f:
+                f.write('<link href="/index.css">{{ Content }}')
+            self.assertEqual(load_template(path).render({"Content": ""}),
+                             '<link href="/index.abc.css">')
+
+    def test_version_tracks_mapping(self):
+        version = asset_version()
+        self.assertNotEqual(version, "")
+        set_asset_urls({})
+        self.assertEqual(asset_version(), "")
+
+if __name__ == "__main__":
+    unittest.main()
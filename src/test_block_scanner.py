@@ -0,0 +1,38 @@
+import unittest
+from block_scanner import scan_blocks, classify_block
+
+class TestScanBlocks(unittest.TestCase):
+
+    def test_block_kinds_and_levels(self):
+        markdown = "## Title\n\nText\n\n* a\n- b\n\n1. one\n2. two\n\n> quote\n\n```\ncode\n```"
+        blocks = list(scan_blocks(markdown))
+        self.assertEqual(
+            [(block.kind, block.level) for block in blocks],
+            [("heading", 2), ("paragraph", 0), ("unordered_list", 0),
+             ("ordered_list", 0), ("quote", 0), ("code", 0)],
+        )
+
+    def test_spans_point_into_source(self):
+        markdown = "  # Heading  \n\n* first\n* second\n\n1. one\n2. two"
+        heading, unordered, ordered = scan_blocks(markdown)
+        self.assertEqual(heading.text(markdown), "# Heading")
+        self.assertEqual(heading.line_texts(markdown), [" Heading"])
+        self.assertEqual(unordered.line_texts(markdown), ["first", "second"])
+        self.assertEqual(ordered.line_texts(markdown), ["one", "two"])
+
+    def test_code_span_excludes_fences(self):
+        markdown = "```\nprint(1)\n```"
+        block, = scan_blocks(markdown)
+        self.assertEqual(block.line_texts(markdown), ["\nprint(1)\n"])
+
+    def test_whitespace_only_blocks_skipped(self):
+        self.assertEqual(list(scan_blocks("\n\n   \n\n")), [])
+
+    def test_out_of_order_numbers_are_paragraph(self):
+        self.assertEqual(classify_block("1. one\n3. three").kind, "paragraph")
+
+    def test_number_without_text_is_paragraph(self):
+        self.assertEqual(classify_block("1. one\n2").kind, "paragraph")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from build_stats import PAGE_STAGES, QUIET, BuildStats
+from markdown_core import generate_page
+
+class TestBuildStats(unittest.TestCase):
+
+    def test_generate_page_records_stages_and_nodes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, 'w') as f:
+                f.write("# Title\n\nSome **bold** text\n\n* a\n* b")
+            with open(template, 'w') as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            stats = BuildStats(QUIET)
+            generate_page(source, template, os.path.join(tmp, "out", "page.html"), stats=stats)
+
+        record, = stats.pages
+        self.assertEqual(record["path"], source)
+        self.assertEqual(set(record["stages"]), set(PAGE_STAGES))
+        self.assertTrue(all(seconds >= 0 for seconds in record["stages"].values()))
+        # div, h1, text, p, text, b, text, ul, li, text, li, text
+        self.assertEqual(record["nodes"], 12)
+
+    def test_report_orders_slowest_pages(self):
+        stats = BuildStats(QUIET)
+        for path, total in (("fast.md", 0.1), ("slow.md", 0.9), ("mid.md", 0.5)):
+            stages = dict.fromkeys(PAGE_STAGES, 0.0)
+            stages["render"] = total
+            stats.add_page({"path": path, "total": total, "stages": stages, "nodes": 1})
+        report = stats.report(slowest=2)
+        self.assertEqual([record["path"] for record in report["slowest"]], ["slow.md", "mid.md"])
+        self.assertAlmostEqual(report["stages"]["render"], 1.5)
+        self.assertEqual(report["nodes"], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compression import Compressor
+from markdown_core import write_page
+from markdown_utilities import copy_static_files, remove_output, sync_static_files
+from template import Template
+
+class TestCompressor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.data = b"<p>" + b"hello world " * 200 + b"</p>"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def read_gzip(self, path):
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+
+    def test_gzip_sidecar_round_trips(self):
+        for workers in (0, 2):
+            compressor = Compressor(("gz",), min_size=100, workers=workers)
+            page = self.path(f"page-{workers}.html")
+            self.write(page, self.data)
+            compressor.submit(page, self.data)
+            compressor.close()
+            self.assertEqual(self.read_gzip(page + ".gz"), self.data)
+
+    def test_small_and_binary_files_are_skipped(self):
+        compressor = Compressor(("gz",), min_size=100, workers=0)
+        compressor.submit(self.path("small.html"), b"<p>hi</p>")
+        compressor.submit(self.path("photo.png"), self.data)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_shrunk_file_loses_sidecar(self):
+        compressor = Compressor(("gz",), min_size=100, workers=0)
+        compressor.submit(self.path("page.html"), self.data)
+        compressor.submit(self.path("page.html"), b"<p>hi</p>")
+        self.assertFalse(os.path.exists(self.path("page.html.gz")))
+
+    def test_unchanged_file_keeps_sidecar(self):
+        compressor = Compressor(("gz",), min_size=100, workers=0)
+        compressor.submit(self.path("page.html"), self.data)
+        os.utime(self.path("page.html.gz"), ns=(0, 0))
+        compressor.submit(self.path("page.html"), self.data, changed=False)
+        self.assertEqual(os.stat(self.path("page.html.gz")).st_mtime_ns, 0)
+
+    def test_page_rewritten_without_compressor(self):
+        compressor = Compressor(("gz",), min_size=100, workers=0)
+        dest = self.path("public", "index.html")
+        template = Template("{{ Content }}")
+        write_page(dest, template, "Home", self.data.decode(), compressor=compressor)
+        # Watch mode writes pages without a compressor: the old sidecar goes
+        edited = self.data.replace(b"hello", b"howdy")
+        write_page(dest, template, "Home", edited.decode())
+        self.assertFalse(os.path.exists(dest + ".gz"))
+        # A sidecar older than its page is made again even if the page is unchanged
+        write_page(dest, template, "Home", edited.decode(), compressor=compressor)
+        os.utime(dest + ".gz", ns=(0, 0))
+        self.assertEqual(write_page(dest, template, "Home", edited.decode(), compressor=compressor),
+                         "unchanged")
+        self.assertEqual(self.read_gzip(dest + ".gz"), edited)
+
+    def test_brotli_requires_package(self):
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            with self.assertRaises(ValueError):
+                Compressor(("gz", "br"))
+
+    def test_write_page_compresses_rendered_bytes(self):
+        compressor = Compressor(("gz",), min_size=100, workers=0)
+        dest = self.path("public", "index.html")
+        self.assertEqual(write_page(dest, Template("{{ Content }}"), "Home",
+                                    self.data.decode(), compressor=compressor), "added")
+        self.assertEqual(self.read_gzip(dest + ".gz"), self.data)
+
+    def test_static_copy_and_sync(self):
+        self.write(self.path("static", "app.js"), self.data)
+        compressor = Compressor(("gz",), min_size=100)
+        copy_static_files(self.path("static"), self.path("copied"), compressor=compressor)
+        sync_static_files(self.path("static"), self.path("synced"),
+                          state_path=self.path("static.json"), compressor=compressor)
+        compressor.close()
+        self.assertEqual(self.read_gzip(self.path("copied", "app.js.gz")), self.data)
+        self.assertEqual(self.read_gzip(self.path("synced", "app.js.gz")), self.data)
+
+    def test_remove_output_removes_sidecars(self):
+        self.write(self.path("public", "blog", "post.html"), self.data)
+        self.write(self.path("public", "blog", "post.html.gz"), b"gz")
+        remove_output(self.path("public", "blog", "post.html"), self.path("public"))
+        self.assertFalse(os.path.exists(self.path("public", "blog")))
+
+if __name__ == "__main__":
+    unittest.main()
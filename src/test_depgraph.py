@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+from assets import set_asset_urls
+from depgraph import ASSET, SOURCE, TEMPLATE, DependencyGraph
+from template import TemplateSet
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.image = self.write(os.path.join(self.static, "a.png"), "png")
+        self.page = self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.layout = os.path.join(self.root, "layouts", "blog.html")
+        self.graph_path = os.path.join(self.root, "cache", "depgraph.json")
+        self.graph = self.load()
+
+    def tearDown(self):
+        set_asset_urls({})
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def load(self):
+        return DependencyGraph(self.graph_path, self.content, self.static, "public")
+
+    def test_resolve(self):
+        page_url = "/blog/post.html"
+        self.assertEqual(self.graph.resolve("/a.png", page_url), [(self.image, ASSET)])
+        self.assertEqual(self.graph.resolve("../a.png", page_url), [(self.image, ASSET)])
+        for url in ("../other.html#top", "/docs", "/", "https://example.com/x.png", "mailto:a@b.c", "#top"):
+            self.assertEqual(self.graph.resolve(url, page_url), [])
+
+    def test_static_edges_only_where_the_file_shapes_the_page(self):
+        template = self.write(os.path.join(self.root, "template.html"),
+                              '<link href="/site.css">{{ Content }}')
+        templates = TemplateSet(template, self.content)
+        dest = os.path.join("public", "blog", "post.html")
+        references = ["/a.png", "/files/report.pdf", "../other.html"]
+        def assets():
+            edges = self.graph.page_edges(self.page, dest, "public", templates, references)
+            return sorted(path for path, kind in edges if kind == ASSET)
+        # Only images get dimensions baked in; links and stylesheets stay as written
+        self.assertEqual(assets(), [self.image])
+        # Fingerprinted names are baked in for every static file
+        set_asset_urls({"/a.png": "/a.1234567890.png"})
+        self.assertEqual(assets(), sorted([self.image, os.path.join(self.static, "files", "report.pdf"),
+                                           os.path.join(self.static, "site.css")]))
+
+    def test_template_edges_are_named_like_the_template_path(self):
+        template = self.write(os.path.join(self.root, "template.html"), "{{ Content }}")
+        layout = self.write(os.path.join(self.root, "layouts", "blog.html"),
+                            "{% extends \"template.html\" %}")
+        templates = TemplateSet(template, self.content)
+        edges = self.graph.page_edges(self.page, os.path.join("public", "blog", "post.html"), "public",
+                                      templates, [])
+        self.assertEqual({path for path, kind in edges if kind == TEMPLATE}, {template, layout})
+
+    def record_post(self):
+        edges = [(self.page, SOURCE), (self.image, ASSET), (self.layout, TEMPLATE)]
+        self.graph.record(os.path.join("public", "blog", "post.html"), edges, [["*", "build", "full"]])
+        self.graph.save()
+        self.graph = self.load()
+
+    def test_changed_asset_dirties_its_pages(self):
+        self.record_post()
+        self.assertEqual(self.graph.changed_inputs(), {})
+        # A touch alone is not a change
+        os.utime(self.image, ns=(1, 1))
+        self.assertEqual(self.graph.changed_inputs(), {})
+        self.write(self.image, "png v2")
+        changed = self.graph.changed_inputs()
+        self.assertEqual(changed, {self.image: "changed"})
+        self.assertEqual(self.graph.dirty_outputs(changed),
+                         {os.path.join("public", "blog", "post.html"): [[self.image, ASSET, "changed"]]})
+
+    def test_added_layout_dirties_its_section(self):
+        self.record_post()
+        self.write(self.layout, "{{ Content }}")
+        self.assertEqual(self.graph.changed_inputs(), {self.layout: "added"})
+        self.assertEqual(list(self.graph.dirty_outputs([self.layout])), [os.path.join("public", "blog", "post.html")])
+
+    def test_explain(self):
+        self.record_post()
+        self.write(self.image, "png v2")
+        lines = self.graph.explain(os.path.join("public", "blog", "post.html"))
+        self.assertIn("    * (build) full", lines)
+        self.assertIn(f"    {self.image} (asset)  [changed since, will rebuild]", lines)
+        self.assertIn(f"    {self.layout} (template)  [missing]", lines)
+        self.assertEqual(self.graph.explain(self.image)[0], f"{self.image} is an input of:")
+        self.assertEqual(self.graph.explain("nowhere"), ["nowhere is not in the dependency graph"])
+
+    def test_removed_outputs_forget_their_inputs(self):
+        self.record_post()
+        self.graph.remove(os.path.join("public", "blog", "post.html"))
+        self.graph.save()
+        self.assertEqual(self.load().inputs, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from generations import (current_generation, list_generations, prune_generations,
+                         publish_generation, rollback, stage_generation)
+from markdown_core import write_page
+from template import Template
+
+class TestGenerations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self, text):
+        staging = stage_generation(self.public)
+        write_page(os.path.join(staging, "index.html"), Template("{{ Content }}"), "Home", text)
+        publish_generation(self.public, staging)
+        return staging
+
+    def test_publish_swaps_symlink(self):
+        first = self.build("one")
+        self.assertEqual(current_generation(self.public), first)
+        second = self.build("two")
+        self.assertEqual(current_generation(self.public), second)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "two")
+        self.assertEqual(self.read(os.path.join(first, "index.html")), "one")
+
+    def test_unchanged_files_are_hardlinked(self):
+        first = self.build("same")
+        second = self.build("same")
+        self.assertEqual(os.stat(os.path.join(first, "index.html")).st_ino,
+                         os.stat(os.path.join(second, "index.html")).st_ino)
+
+    def test_plain_directory_is_adopted(self):
+        self.write(os.path.join(self.public, "index.html"), "old")
+        generation = self.build("new")
+        generations = list_generations(self.public)
+        self.assertEqual(generations[-1], generation)
+        self.assertEqual(self.read(os.path.join(generations[0], "index.html")), "old")
+
+    def test_rollback(self):
+        first = self.build("one")
+        self.build("two")
+        manifest = os.path.join(self.tmp.name, "manifest.json")
+        self.write(manifest, "{}")
+        self.assertEqual(rollback(self.public, [manifest]), first)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "one")
+        # The state of the newer generation is gone, so the next build starts over
+        self.assertFalse(os.path.exists(manifest))
+        with self.assertRaises(ValueError):
+            rollback(self.public)
+
+    def test_prune_keeps_newest(self):
+        for text in ("one", "two", "three"):
+            latest = self.build(text)
+        removed = prune_generations(self.public, keep=2)
+        self.assertEqual(len(removed), 1)
+        self.assertEqual(len(list_generations(self.public)), 2)
+        self.assertEqual(current_generation(self.public), latest)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from htmlnode import HTMLNode, ParentNode, LeafNode
-from markdown_core import markdown_to_html_node
+from markdown_core import create_quote_node, markdown_to_html_node
 
 def normalize_html(html):
     return html.replace('\n', '').replace(' ', '')
@@ -80,6 +80,43 @@ class TestHTMLNode(unittest.TestCase):
                          '<p>And a paragraph at the end.</p></blockquote>')
         self.assertEqual(normalize_html(html_node.to_html()), normalize_html(expected_html))
 
+class TestQuoteParser(unittest.TestCase):
+
+    def test_deep_nesting_does_not_recurse(self):
+        markdown = "\n".join("> " * depth + f"level {depth}" for depth in range(1, 2001))
+        html = create_quote_node(markdown.splitlines(), max_depth=5000).to_html()
+        self.assertEqual(html.count("<blockquote>"), 2000)
+        self.assertTrue(html.endswith("</blockquote>" * 2000))
+
+    def test_depth_beyond_limit_is_folded(self):
+        html = create_quote_node(["> > > > deep"], max_depth=2).to_html()
+        self.assertEqual(html, "<blockquote><blockquote><p>> > deep</p></blockquote></blockquote>")
+
+    def test_returning_to_outer_level(self):
+        lines = ["> outer", "> > inner", "> outer again"]
+        self.assertEqual(
+            create_quote_node(lines).to_html(),
+            "<blockquote><p>outer</p><blockquote><p>inner</p></blockquote><p>outer again</p></blockquote>",
+        )
+
+    def test_quote_markers_inside_fence_are_code(self):
+        lines = ["> ```", "> > not nested", "> ```", "> after"]
+        self.assertEqual(
+            create_quote_node(lines).to_html(),
+            "<blockquote><pre><code>\n> not nested\n</code></pre><p>after</p></blockquote>",
+        )
+
+    def test_unclosed_fence_ends_with_its_quote(self):
+        lines = ["> > ```", "> > code", "> text"]
+        self.assertEqual(
+            create_quote_node(lines).to_html(),
+            "<blockquote><blockquote><pre><code>\ncode\n</code></pre></blockquote>"
+            "<p>text</p></blockquote>",
+        )
+
+    def test_empty_quote(self):
+        self.assertEqual(create_quote_node([">"]).to_html(), "<blockquote></blockquote>")
+
 class TestMarkdownToHtmlNode(unittest.TestCase):
 
     def test_paragraph(self):
@@ -0,0 +1,123 @@
+import json
+import os
+import struct
+import tempfile
+import unittest
+
+from images import image_version, index_images, probe_image_size, set_image_sizes
+from textnode import TextNode, text_node_to_html_node
+
+def png_bytes(width, height):
+    return (b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR"
+            + struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0) + b"\0" * 40)
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xda" + b"\0" * 40
+
+def webp_bytes(chunk, payload):
+    return b"RIFF" + struct.pack("<I", 100) + b"WEBP" + chunk + struct.pack("<I", 80) + payload
+
+class TestProbeImageSize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def probe(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return probe_image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.probe(png_bytes(640, 480)), (640, 480))
+
+    def test_gif(self):
+        self.assertEqual(self.probe(b"GIF89a" + struct.pack("<HH", 32, 16) + b"\0" * 30), (32, 16))
+
+    def test_jpeg_skips_segments_before_frame(self):
+        self.assertEqual(self.probe(jpeg_bytes(1920, 1080)), (1920, 1080))
+
+    def test_webp_lossy(self):
+        payload = b"\0\0\0\x9d\x01\x2a" + struct.pack("<HH", 300, 200) + b"\0" * 10
+        self.assertEqual(self.probe(webp_bytes(b"VP8 ", payload)), (300, 200))
+
+    def test_webp_lossless(self):
+        bits = (300 - 1) | ((200 - 1) << 14)
+        payload = b"\x2f" + bits.to_bytes(4, "little") + b"\0" * 10
+        self.assertEqual(self.probe(webp_bytes(b"VP8L", payload)), (300, 200))
+
+    def test_webp_extended(self):
+        payload = b"\0" * 4 + (299).to_bytes(3, "little") + (199).to_bytes(3, "little")
+        self.assertEqual(self.probe(webp_bytes(b"VP8X", payload)), (300, 200))
+
+    def test_unknown_and_truncated(self):
+        self.assertIsNone(self.probe(b""))
+        self.assertIsNone(self.probe(b"not an image at all"))
+        self.assertIsNone(self.probe(jpeg_bytes(10, 10)[:8]))
+        self.assertIsNone(self.probe(png_bytes(10, 10)[:20]))
+        self.assertIsNone(self.probe(b"GIF89a\x0a"))
+
+class TestIndexImages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.index = os.path.join(self.tmp.name, "cache", "images.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.image = os.path.join(self.static, "images", "a.png")
+        with open(self.image, 'wb') as f:
+            f.write(png_bytes(64, 32))
+        with open(os.path.join(self.static, "index.css"), 'w') as f:
+            f.write("body {}")
+
+    def tearDown(self):
+        set_image_sizes({})
+        self.tmp.cleanup()
+
+    def test_index_maps_urls_to_sizes(self):
+        sizes, probed = index_images(self.static, self.index)
+        self.assertEqual(sizes, {"/images/a.png": (64, 32)})
+        self.assertEqual(probed, [os.path.join("images", "a.png")])
+
+    def test_unchanged_images_are_not_probed_again(self):
+        index_images(self.static, self.index)
+        with open(self.index) as f:
+            state = json.load(f)
+        state["files"][os.path.join("images", "a.png")]["dimensions"] = [1, 2]
+        with open(self.index, 'w') as f:
+            json.dump(state, f)
+        sizes, probed = index_images(self.static, self.index)
+        self.assertEqual(probed, [])
+        self.assertEqual(sizes["/images/a.png"], (1, 2))
+
+    def test_changed_image_is_probed(self):
+        index_images(self.static, self.index)
+        with open(self.image, 'wb') as f:
+            f.write(png_bytes(128, 64) + b"\0")
+        sizes, probed = index_images(self.static, self.index)
+        self.assertEqual(sizes["/images/a.png"], (128, 64))
+        self.assertEqual(len(probed), 1)
+
+    def test_image_node_attributes(self):
+        sizes, _ = index_images(self.static, self.index)
+        set_image_sizes(sizes)
+        self.assertNotEqual(image_version(), "")
+        node = text_node_to_html_node(TextNode("a cat", "image", "/images/a.png"))
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/images/a.png" alt="a cat" width="64" height="32" loading="lazy" decoding="async"></img>',
+        )
+
+    def test_unknown_image_has_no_dimensions(self):
+        node = text_node_to_html_node(TextNode("remote", "image", "https://example.com/x.png"))
+        self.assertNotIn("width", node.props)
+        self.assertEqual(node.props["alt"], "remote")
+        self.assertEqual(node.props["loading"], "lazy")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from incremental import generate_pages_incremental, load_manifest, record_full_build
+from links import LinkIndex, list_outputs
+from markdown_core import find_pages
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, "cache", "manifest.json")
+        self.static = os.path.join(self.root, "static")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self):
+        return generate_pages_incremental(self.content, self.template, self.public, self.manifest,
+                                          static_dir=self.static)
+
+    def test_first_build_generates_everything(self):
+        rebuilt, removed = self.build()
+        self.assertEqual(len(rebuilt), 2)
+        self.assertEqual(removed, [])
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+        self.assertEqual(len(load_manifest(self.manifest)["pages"]), 2)
+
+    def test_unchanged_build_is_noop(self):
+        self.build()
+        rebuilt, removed = self.build()
+        self.assertEqual(rebuilt, [])
+        self.assertEqual(removed, [])
+
+    def test_only_changed_page_rebuilt(self):
+        self.build()
+        changed = os.path.join(self.content, "index.md")
+        self.write(changed, "# Home\n\nWelcome back")
+        os.utime(changed, ns=(0, 0))
+        rebuilt, _ = self.build()
+        self.assertEqual(rebuilt, [changed])
+
+    def test_first_build_after_a_full_build_is_noop(self):
+        self.build()
+        os.remove(self.manifest)
+        record_full_build(find_pages(self.content, self.public), self.manifest)
+        self.assertEqual(self.build(), ([], []))
+
+    def test_template_change_rebuilds_all(self):
+        self.build()
+        self.write(self.template, TEMPLATE + "<!-- v2 -->")
+        rebuilt, _ = self.build()
+        self.assertEqual(len(rebuilt), 2)
+
+    def test_missing_output_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        rebuilt, _ = self.build()
+        self.assertEqual(rebuilt, [os.path.join(self.content, "index.md")])
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        rebuilt, removed = self.build()
+        self.assertEqual(rebuilt, [])
+        self.assertEqual(removed, [os.path.join(self.public, "blog", "post.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_changed_image_rebuilds_only_pages_showing_it(self):
+        image = os.path.join(self.static, "cat.png")
+        self.write(image, "v1")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![cat](/cat.png)")
+        self.build()
+        self.write(image, "v2")
+        rebuilt, _ = self.build()
+        self.assertEqual(rebuilt, [os.path.join(self.content, "index.md")])
+
+    def test_removed_link_target_leaves_linking_pages(self):
+        # Their HTML cannot change; the link checker reports the broken link
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post.html)")
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        rebuilt, removed = self.build()
+        self.assertEqual(rebuilt, [])
+        self.assertEqual(removed, [os.path.join(self.public, "blog", "post.html")])
+
+    def test_edited_stylesheet_rebuilds_nothing_unless_fingerprinted(self):
+        self.write(self.template, '<link href="/site.css">' + TEMPLATE)
+        css = os.path.join(self.static, "site.css")
+        self.write(css, "body {}")
+        self.build()
+        self.write(css, "body { margin: 0 }")
+        self.assertEqual(self.build(), ([], []))
+
+    def test_new_section_layout_rebuilds_only_its_section(self):
+        self.build()
+        os.makedirs(os.path.join(self.root, "layouts"))
+        self.write(os.path.join(self.root, "layouts", "blog.html"), "<article>{{ Content }}</article>")
+        rebuilt, _ = self.build()
+        self.assertEqual(rebuilt, [os.path.join(self.content, "blog", "post.md")])
+        with open(os.path.join(self.public, "blog", "post.html")) as f:
+            self.assertEqual(f.read(), "<article><div><h1>Post</h1><p>Hello</p></div></article>")
+
+    def test_link_index_rechecks_only_affected_pages(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post.html) [x](/x.html)")
+        links_path = os.path.join(self.root, "cache", "links.json")
+        def check():
+            index = LinkIndex(links_path)
+            rebuilt, _ = generate_pages_incremental(self.content, self.template, self.public,
+                                                    self.manifest, static_dir=self.static,
+                                                    link_index=index)
+            broken = index.check(list_outputs(self.public))
+            index.save()
+            return rebuilt, index.checked, broken
+        self.assertEqual(check(), ([os.path.join(self.content, "index.md"),
+                                    os.path.join(self.content, "blog", "post.md")], 2,
+                                   [("/index.html", "/x.html", "missing")]))
+        self.assertEqual(check()[1:], (0, [("/index.html", "/x.html", "missing")]))
+        self.write(os.path.join(self.content, "x.md"), "# X")
+        # Only the new page is built; the page linking to it is checked again
+        self.assertEqual(check(), ([os.path.join(self.content, "x.md")], 2, []))
+
+if __name__ == "__main__":
+    unittest.main()
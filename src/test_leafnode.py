@@ -24,5 +24,17 @@ class TestLeafNode(unittest.TestCase):
         expected_html = '<a href="https://www.google.com">Click me!</a>'
         self.assertEqual(node.to_html(), expected_html)
 
+    def test_leafnodes_share_empty_props(self):
+        first = LeafNode(tag="b", value="one")
+        second = LeafNode(tag="i", value="two")
+        self.assertIs(first.props, second.props)
+        self.assertIs(first.children, second.children)
+        with self.assertRaises(TypeError):
+            first.props["class"] = "x"
+
+    def test_leafnode_has_no_instance_dict(self):
+        node = LeafNode(tag="p", value="text")
+        self.assertFalse(hasattr(node, "__dict__"))
+
 if __name__ == "__main__":
     unittest.main()
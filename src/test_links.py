@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+from links import LinkIndex, collect_links, list_outputs
+from markdown_core import markdown_to_html_node
+from transforms import HeadingAnchors, render_transformed
+
+class TestCollectLinks(unittest.TestCase):
+
+    def test_tree_and_html_agree(self):
+        node = markdown_to_html_node("# Top\n\n[a](/a.html#x) ![i](/img/x.png)\n\n## Sub part")
+        node, html = render_transformed(node, [HeadingAnchors()])
+        references, anchors = collect_links(node)
+        self.assertEqual(references, ["/a.html#x", "/img/x.png"])
+        self.assertEqual(anchors, ["sub-part", "top"])
+        self.assertEqual(collect_links(html), (references, anchors))
+
+    def test_one_rule_for_tree_and_html(self):
+        # Only a[href] and img[src] are links; ids count on any element
+        html = ('<div id="top"><a href="/a.html">a</a><img src="/i.png" alt="">'
+                '<link href="/style.css"><script src="/app.js"></script></div>')
+        self.assertEqual(collect_links(html), (["/a.html", "/i.png"], ["top"]))
+
+class TestLinkIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "links.json")
+        self.outputs = {"/index.html", "/blog/post.html", "/blog/index.html", "/img/a.png"}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, pages, outputs=None):
+        index = LinkIndex(self.path)
+        for url, (references, anchors) in pages.items():
+            index.update(url, references, anchors)
+        broken = index.check(self.outputs if outputs is None else outputs)
+        index.save()
+        return index, broken
+
+    def test_broken_links_and_anchors(self):
+        index, broken = self.build({
+            "/index.html": (["blog/post.html#intro", "/blog/", "/blog", "/img/a.png", "/gone.html",
+                             "https://example.com/x", "mailto:a@b.c", "#missing", "#top",
+                             "/blog/#anything"], ["top"]),
+            "/blog/post.html": (["../index.html#nope", "../img/b.png"], ["intro"]),
+        })
+        self.assertEqual(broken, [
+            ("/blog/post.html", "../index.html#nope", "missing anchor"),
+            ("/blog/post.html", "../img/b.png", "missing"),
+            ("/index.html", "/gone.html", "missing"),
+            ("/index.html", "#missing", "missing anchor"),
+        ])
+        self.assertEqual(index.checked, 2)
+
+    def test_incremental_check_touches_only_affected_pages(self):
+        self.build({
+            "/index.html": (["/new"], []),
+            "/blog/post.html": (["/img/a.png"], ["intro"]),
+            "/blog/index.html": (["post.html#intro"], []),
+        })
+        # Nothing rendered and no outputs came or went: nothing is checked
+        index, broken = self.build({})
+        self.assertEqual((index.checked, len(broken)), (0, 1))
+        # The missing target appears: only the page linking to it is checked
+        self.outputs.add("/new/index.html")
+        index, broken = self.build({})
+        self.assertEqual((index.checked, broken), (1, []))
+        # A rendered page whose ids changed gets the pages linking into it checked
+        index, broken = self.build({"/blog/post.html": (["/img/a.png"], ["overview"])})
+        self.assertEqual(index.checked, 2)
+        self.assertEqual(broken, [("/blog/index.html", "post.html#intro", "missing anchor")])
+
+    def test_removed_page_breaks_links_to_it(self):
+        self.build({"/index.html": (["/blog/post.html"], []), "/blog/post.html": (["/img/a.png"], [])})
+        index = LinkIndex(self.path)
+        index.remove("/blog/post.html")
+        broken = index.check(self.outputs - {"/blog/post.html"})
+        self.assertEqual(broken, [("/index.html", "/blog/post.html", "missing")])
+        self.assertEqual(index.checked, 1)
+        # The removed page no longer counts as linking anywhere
+        self.assertEqual(index.referrers, {"/blog/post.html": {"/index.html"}})
+
+    def test_unchanged_index_is_not_written(self):
+        pages = {"/index.html": (["/gone.html"], []), "/blog/post.html": (["/index.html"], ["intro"])}
+        self.build(pages)
+        os.utime(self.path, ns=(0, 0))
+        # Rendered again with the same links and ids, and nothing came or went
+        index, broken = self.build(pages)
+        self.assertFalse(index.dirty)
+        self.assertEqual(broken, [("/index.html", "/gone.html", "missing")])
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.outputs.add("/gone.html")
+        index, broken = self.build({})
+        self.assertEqual(broken, [])
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_list_outputs(self):
+        public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(public, "blog"))
+        for rel_path in ("index.html", os.path.join("blog", "post.html")):
+            open(os.path.join(public, rel_path), 'w').close()
+        self.assertEqual(list_outputs(public), {"/index.html", "/blog/post.html"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from listings import generate_listings, listing_keys, paginate
+from metadata import MetadataIndex
+from template import TemplateSet
+
+def post(title, date, tags, draft=False):
+    return (f"---\ntitle: {title}\ndate: {date}\ntags: [{', '.join(tags)}]\n"
+            f"draft: {'true' if draft else 'false'}\n---\nbody\n")
+
+class TestPaginate(unittest.TestCase):
+
+    def test_listing_keys(self):
+        meta = {"path": os.path.join("blog", "a.md"), "tags": ["x", "y"], "date": "2023-04-01"}
+        self.assertEqual(listing_keys(meta), ["archive:2023", "section:blog", "tag:x", "tag:y"])
+        self.assertEqual(listing_keys({"path": "about.md", "tags": []}), [])
+
+    def test_pages_are_newest_first(self):
+        items = [{"path": f"{n}.md", "date": f"2024-01-{n:02d}"} for n in range(1, 6)]
+        pages = list(paginate("tag:x", items, 2))
+        self.assertEqual([page["url"] for page in pages], ["/tags/x/", "/tags/x/page/2/", "/tags/x/page/3/"])
+        self.assertEqual([item["date"] for item in pages[0]["items"]], ["2024-01-05", "2024-01-04"])
+        self.assertEqual((pages[1]["prev"], pages[1]["next"]), ("/tags/x/", "/tags/x/page/3/"))
+        self.assertIsNone(pages[2]["next"])
+
+class TestGenerateListings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write(os.path.join(self.root, "template.html"),
+                                   "<title>{{ Title }}</title>{{ Content }}")
+        self.state = os.path.join(self.root, "cache", "listings.json")
+        for n in range(1, 6):
+            self.write_post(f"blog/p{n}.md", post(f"Post {n}", f"2024-02-0{n}", ["python"]))
+        self.write_post("blog/other.md", post("Other", "2023-05-01", ["misc"]))
+        self.write_post("notes/n.md", post("Note", "2023-06-01", ["misc"], draft=True))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def write_post(self, rel_path, text):
+        return self.write(os.path.join(self.content, rel_path), text)
+
+    def build(self):
+        metadata = MetadataIndex(self.content, os.path.join(self.root, "cache", "metadata.json"))
+        rendered, removed, outputs = generate_listings(
+            metadata, self.public, TemplateSet(self.template, self.content), page_size=2,
+            state_path=self.state)
+        metadata.save()
+        rel = lambda paths: sorted(os.path.relpath(path, self.public) for path in paths)
+        return rel(rendered), rel(removed), rel(outputs)
+
+    def test_first_build_renders_every_listing(self):
+        rendered, removed, outputs = self.build()
+        self.assertEqual(rendered, outputs)
+        self.assertIn(os.path.join("tags", "python", "page", "3", "index.html"), outputs)
+        self.assertIn(os.path.join("archive", "2023", "index.html"), outputs)
+        self.assertIn(os.path.join("sections", "blog", "index.html"), outputs)
+        # Drafts are left out
+        self.assertNotIn(os.path.join("sections", "notes", "index.html"), outputs)
+        with open(os.path.join(self.public, "tags", "misc", "index.html")) as f:
+            html = f.read()
+        self.assertIn('<li><a href="/blog/other.html">Other</a>', html)
+        self.assertNotIn("Note", html)
+
+    def test_unchanged_site_renders_nothing(self):
+        self.build()
+        self.assertEqual(self.build()[:2], ([], []))
+
+    def test_change_rerenders_only_listings_holding_the_page(self):
+        self.build()
+        self.write_post("blog/other.md", post("Other, renamed", "2023-05-01", ["misc"]))
+        rendered, removed, _ = self.build()
+        self.assertEqual(rendered, [os.path.join("archive", "2023", "index.html"),
+                                    os.path.join("sections", "blog", "page", "3", "index.html"),
+                                    os.path.join("tags", "misc", "index.html")])
+        self.assertEqual(removed, [])
+
+    def test_emptied_listing_is_removed(self):
+        self.build()
+        self.write_post("blog/other.md", post("Other", "2023-05-01", ["python"]))
+        rendered, removed, outputs = self.build()
+        self.assertEqual(removed, [os.path.join("tags", "misc", "index.html")])
+        self.assertIn(os.path.join("tags", "python", "page", "3", "index.html"), rendered)
+        self.assertNotIn(os.path.join("tags", "misc", "index.html"), outputs)
+
+    def test_template_change_rerenders_everything(self):
+        _, _, outputs = self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build()[0], outputs)
+
+    def test_list_layout(self):
+        self.write(os.path.join(self.root, "layouts", "_list.html"),
+                   "{% for item in Page.items %}[{{ item.title }}]{% endfor %}")
+        self.build()
+        with open(os.path.join(self.public, "tags", "python", "index.html")) as f:
+            self.assertEqual(f.read(), "[Post 5][Post 4]")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from markdown_core import parse_page
+from metadata import MetadataIndex, parse_front_matter, read_page_metadata, split_front_matter
+
+class TestFrontMatter(unittest.TestCase):
+
+    def test_split(self):
+        markdown = "---\ntitle: Hello: world\ndate: 2024-05-01\ntags: [a, \"b c\"]\ndraft: false\n---\n# Body\n"
+        meta, body = split_front_matter(markdown)
+        self.assertEqual(meta, {"title": "Hello: world", "date": "2024-05-01", "tags": ["a", "b c"],
+                                "draft": False})
+        self.assertEqual(body, "# Body\n")
+
+    def test_without_front_matter(self):
+        meta, body = split_front_matter("# Title\n\n---\n")
+        self.assertEqual(meta, {"tags": [], "draft": False})
+        self.assertEqual(body, "# Title\n\n---\n")
+
+    def test_block_lists_and_comments(self):
+        meta = parse_front_matter(["# note", "tags:", "  - one", "  - two", "layout: post"])
+        self.assertEqual(meta, {"tags": ["one", "two"], "layout": "post"})
+
+    def test_invalid_front_matter(self):
+        for lines in (["date: yesterday"], ["draft: maybe"], ["just text"]):
+            with self.assertRaises(ValueError, msg=lines):
+                parse_front_matter(lines)
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n# Body")
+
+    def test_parse_page_title(self):
+        title, node, meta = parse_page("---\ntitle: From front matter\n---\n# Heading\n\ntext")
+        self.assertEqual(title, "From front matter")
+        self.assertEqual(node.to_html(), "<div><h1>Heading</h1><p>text</p></div>")
+        title, _, meta = parse_page("---\ndraft: true\n---\n# Heading")
+        self.assertEqual((title, meta["title"], meta["draft"]), ("Heading", "Heading", True))
+
+class TestMetadataIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.index_path = os.path.join(self.tmp.name, "cache", "metadata.json")
+        self.post = self.write("blog/post.md", "---\ntitle: Post\ntags: [x]\n---\n# Ignored\n")
+        self.draft = self.write("draft.md", "---\ndraft: true\n---\n\nintro\n\n# Draft title\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.content, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_reads_title_from_front_matter_or_first_heading(self):
+        self.assertEqual(read_page_metadata(self.post)["title"], "Post")
+        self.assertEqual(read_page_metadata(self.draft)["title"], "Draft title")
+
+    def test_index_is_lazy_and_persisted(self):
+        index = MetadataIndex(self.content, self.index_path)
+        self.assertEqual(index.read, [])
+        self.assertTrue(index.is_draft(self.draft))
+        self.assertEqual(index.read, ["draft.md"])
+        pages = index.pages()
+        self.assertEqual([page["url"] for page in pages], ["/draft.html", "/blog/post.html"])
+        index.save()
+
+        index = MetadataIndex(self.content, self.index_path)
+        self.assertEqual(index.title(self.post), "Post")
+        self.assertEqual(index.read, [])
+
+    def test_changed_and_removed_pages(self):
+        index = MetadataIndex(self.content, self.index_path)
+        index.pages()
+        index.save()
+        self.write("blog/post.md", "---\ntitle: Renamed post\n---\n")
+        os.remove(self.draft)
+        index = MetadataIndex(self.content, self.index_path)
+        self.assertEqual([page["title"] for page in index.pages()], ["Renamed post"])
+        self.assertEqual(index.read, [os.path.join("blog", "post.md")])
+        self.assertNotIn("draft.md", index.entries)
+
+if __name__ == "__main__":
+    unittest.main()
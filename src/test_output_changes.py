@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import unittest
+
+from markdown_core import write_page
+from markdown_utilities import sync_static_files
+from output_changes import ChangeSet, prune_outputs
+from template import Template
+
+class TestWritePage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "public", "blog", "post.html")
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_new_page_is_added(self):
+        self.assertEqual(write_page(self.dest, self.template, "Post", "<p>hi</p>"), "added")
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<title>Post</title><p>hi</p>")
+
+    def test_identical_page_is_left_untouched(self):
+        write_page(self.dest, self.template, "Post", "<p>hi</p>")
+        os.utime(self.dest, ns=(0, 0))
+        self.assertEqual(write_page(self.dest, self.template, "Post", "<p>hi</p>"), "unchanged")
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 0)
+        # The streamed temp file is discarded
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), ["post.html"])
+
+    def test_different_page_is_rewritten(self):
+        write_page(self.dest, self.template, "Post", "<p>hi</p>")
+        self.assertEqual(write_page(self.dest, self.template, "Post", "<p>yo</p>"), "changed")
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<title>Post</title><p>yo</p>")
+
+class TestChangeSet(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.public, *parts)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_records_relative_paths(self):
+        changes = ChangeSet(self.public)
+        changes.record(self.path("blog", "post.html"), "added")
+        changes.record(self.path("index.html"), "changed")
+        changes.record(self.path("old.html"), "removed")
+        changes.record(self.path("about.html"), "unchanged")
+        self.assertEqual(changes.to_dict(), {
+            "added": ["blog/post.html"],
+            "changed": ["index.html"],
+            "removed": ["old.html"],
+            "unchanged": 1,
+        })
+
+    def test_removed_then_added_is_a_change(self):
+        changes = ChangeSet(self.public)
+        changes.record(self.path("index.html"), "removed")
+        changes.record(self.path("index.html"), "added")
+        self.assertEqual(changes.to_dict()["changed"], ["index.html"])
+        self.assertEqual(changes.to_dict()["removed"], [])
+
+    def test_unknown_outcome_raises(self):
+        with self.assertRaises(ValueError):
+            ChangeSet(self.public).record(self.path("index.html"), "moved")
+
+    def test_static_sync_report(self):
+        static = os.path.join(self.tmp.name, "static")
+        state = os.path.join(self.tmp.name, "static.json")
+        self.write(os.path.join(static, "index.css"), "body {}")
+        self.write(os.path.join(static, "app.js"), "go()")
+        sync_static_files(static, self.public, state_path=state)
+        self.write(os.path.join(static, "index.css"), "body { color: red }")
+        self.write(os.path.join(static, "images", "a.png"), "png")
+        os.remove(os.path.join(static, "app.js"))
+
+        changes = ChangeSet(self.public)
+        changes.record_static_sync(sync_static_files(static, self.public, state_path=state))
+        self.assertEqual(changes.to_dict(), {
+            "added": ["images/a.png"],
+            "changed": ["index.css"],
+            "removed": ["app.js"],
+            "unchanged": 0,
+        })
+
+    def test_write(self):
+        changes = ChangeSet(self.public)
+        changes.record(self.path("index.html"), "added")
+        manifest = os.path.join(self.tmp.name, "cache", "changes.json")
+        changes.write(manifest)
+        with open(manifest) as f:
+            self.assertEqual(json.load(f)["added"], ["index.html"])
+
+    def test_prune_outputs(self):
+        self.write(self.path("index.html"), "keep")
+        self.write(self.path("stale", "old.html"), "drop")
+        changes = ChangeSet(self.public)
+        removed = prune_outputs(self.public, [self.path("index.html")], changes)
+        self.assertEqual(removed, [self.path("stale", "old.html")])
+        self.assertFalse(os.path.exists(self.path("stale")))
+        self.assertTrue(os.path.exists(self.path("index.html")))
+        self.assertEqual(changes.to_dict()["removed"], ["stale/old.html"])
+
+if __name__ == "__main__":
+    unittest.main()
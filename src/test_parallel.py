@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from build_stats import QUIET, BuildStats
+from markdown_core import find_pages
+from parallel import generate_pages
+
+class TestParallelGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, 'w') as f:
+            f.write("<body>{{ Content }}</body>")
+        for i in range(6):
+            with open(os.path.join(self.content, f"page{i}.md"), 'w') as f:
+                f.write(f"# Page {i}\n\nBody of page {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_matches_serial(self):
+        pages = find_pages(self.content, self.public)
+        generated = generate_pages(pages, self.template, jobs=3, chunksize=1,
+                                   stats=BuildStats(QUIET))
+        self.assertEqual(generated, [from_path for from_path, _ in pages])
+        for _, dest_path in pages:
+            with open(dest_path) as f:
+                self.assertIn("<h1>Page", f.read())
+
+    def test_failing_page_reports_its_path(self):
+        bad_path = os.path.join(self.content, "page3.md")
+        with open(bad_path, 'w') as f:
+            f.write("# Broken\n\nan **unmatched bold")
+        with self.assertRaises(RuntimeError) as context:
+            generate_pages(find_pages(self.content, self.public), self.template, jobs=2,
+                           stats=BuildStats(QUIET))
+        self.assertIn(bad_path, str(context.exception))
+        self.assertIn("Unmatched delimiter", str(context.exception))
+
+if __name__ == "__main__":
+    unittest.main()
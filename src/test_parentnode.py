@@ -1,5 +1,6 @@
 # test_parentnode.py
 
+import io
 import unittest
 from htmlnode import LeafNode
 from htmlnode import ParentNode
@@ -45,5 +46,27 @@ class TestParentNode(unittest.TestCase):
         expected_html = "<div><p><b>Bold text</b>Normal text</p><hr style=\"border:none;\" /></div>"
         self.assertEqual(node.to_html(), expected_html)
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "intro"}),
+            LeafNode("hr", None),
+        ])
+        pieces = list(node.iter_html())
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(pieces), '<div><p class="intro"><b>Bold</b> text</p><hr /></div>')
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")])])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<ul><li>one</li></ul>")
+
+    def test_deeply_nested_does_not_recurse(self):
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "x"))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import time
+import unittest
+
+from markdown_core import markdown_to_html_node
+from parse_cache import ParseCache
+
+MARKDOWN = """# Title
+
+A paragraph with **bold**, a [link](/a) and ![img](/i.png).
+
+> quoted
+> > nested
+
+1. one
+2. two"""
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(os.path.join(self.tmp.name, "parsed"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_store_then_load(self):
+        html = markdown_to_html_node(MARKDOWN).to_html()
+        key = self.cache.key(MARKDOWN)
+        self.assertIsNone(self.cache.load(key))
+        self.cache.store(key, "Title", html, 17)
+        self.assertEqual(self.cache.load(key), ("Title", html, 17))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_content(self):
+        self.assertNotEqual(self.cache.key(MARKDOWN), self.cache.key(MARKDOWN + " "))
+
+    def test_corrupt_entry_is_discarded(self):
+        key = self.cache.key(MARKDOWN)
+        self.cache.store(key, "Title", "<p>x</p>", 1)
+        with open(self.cache._path(key), 'wb') as f:
+            f.write(b"\x00garbage")
+        self.assertIsNone(self.cache.load(key))
+        self.assertFalse(os.path.exists(self.cache._path(key)))
+
+    def test_trim_evicts_least_recently_used(self):
+        html = markdown_to_html_node(MARKDOWN).to_html()
+        keys = [self.cache.key(MARKDOWN + str(i)) for i in range(3)]
+        for age, key in enumerate(keys):
+            self.cache.store(key, "Title", html, 17)
+            stamp = time.time() - 100 + age
+            os.utime(self.cache._path(key), (stamp, stamp))
+        entry_size = os.path.getsize(self.cache._path(keys[0]))
+        self.cache.max_bytes = entry_size * 2
+        self.assertEqual(self.cache.trim(), 2)
+        self.assertTrue(os.path.exists(self.cache._path(keys[2])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+
+from server import LRUCache, create_server
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", "A", 4)
+        cache.put("b", "B", 4)
+        cache.get("a")
+        cache.put("c", "C", 4)
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.size, 8)
+
+    def test_oversized_value_not_cached(self):
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", "A", 11)
+        self.assertEqual(len(cache), 0)
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nPosts")
+        self.write(os.path.join(self.static, "site.css"), "body {}")
+        self.server = create_server(("127.0.0.1", 0), self.content, self.static, self.template,
+                                    quiet=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def request(self, path, headers=None):
+        connection = http.client.HTTPConnection(*self.server.server_address)
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_renders_page_on_demand(self):
+        response, body = self.request("/blog/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"<title>Blog</title><div><h1>Blog</h1><p>Posts</p></div>")
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+
+    def test_rendered_page_is_cached(self):
+        self.request("/")
+        self.request("/index.html")
+        self.assertEqual(len(self.server.renderer.cache), 1)
+
+    def test_if_none_match_returns_304(self):
+        response, _ = self.request("/")
+        etag = response.getheader("ETag")
+        response, body = self.request("/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_if_modified_since_returns_304(self):
+        response, _ = self.request("/site.css")
+        last_modified = response.getheader("Last-Modified")
+        response, _ = self.request("/site.css", {"If-Modified-Since": last_modified})
+        self.assertEqual(response.status, 304)
+
+    def test_partial_change_moves_last_modified(self):
+        partial = os.path.join(self.tmp.name, "partials", "footer.html")
+        os.makedirs(os.path.dirname(partial))
+        self.write(partial, "<footer>v1</footer>")
+        self.write(self.template, "{{ Content }}{% include \"partials/footer.html\" %}")
+        for path in (partial, self.template, os.path.join(self.content, "index.md")):
+            os.utime(path, (1000000000, 1000000000))
+        response, _ = self.request("/")
+        last_modified = response.getheader("Last-Modified")
+        self.write(partial, "<footer>v2</footer>")
+        os.utime(partial, (1100000000, 1100000000))
+        response, body = self.request("/", {"If-Modified-Since": last_modified})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"v2", body)
+        self.assertNotEqual(response.getheader("Last-Modified"), last_modified)
+
+    def test_source_change_invalidates_etag(self):
+        response, _ = self.request("/")
+        etag = response.getheader("ETag")
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home\n\nChanged")
+        os.utime(path, ns=(0, 0))
+        response, body = self.request("/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"Changed", body)
+
+    def test_serves_static_file(self):
+        response, body = self.request("/site.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"body {}")
+        self.assertEqual(response.getheader("Content-Type"), "text/css")
+
+    def test_missing_and_escaping_paths_404(self):
+        self.assertEqual(self.request("/nope")[0].status, 404)
+        self.assertEqual(self.request("/../template.html")[0].status, 404)
+
+if __name__ == "__main__":
+    unittest.main()
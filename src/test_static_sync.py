@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from markdown_utilities import sync_static_files
+
+class TestSyncStaticFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.state = os.path.join(self.tmp.name, "cache", "static.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def sync(self, **kwargs):
+        return sync_static_files(self.static, self.public, state_path=self.state, **kwargs)
+
+    def test_first_sync_copies_everything(self):
+        report = self.sync()
+        self.assertEqual(sorted(report["copied"]), [os.path.join("images", "a.png"), "index.css"])
+        with open(os.path.join(self.public, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png-bytes")
+
+    def test_second_sync_copies_nothing(self):
+        self.sync()
+        report = self.sync()
+        self.assertEqual(report["copied"], [])
+        self.assertEqual(report["unchanged"], 2)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        report = self.sync()
+        self.assertEqual(report["copied"], ["index.css"])
+
+    def test_touched_file_skipped_with_hash(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(0, 0))
+        report = self.sync(use_hash=True)
+        self.assertEqual(report["copied"], [])
+
+    def test_stale_files_removed_but_pages_kept(self):
+        self.sync()
+        self.write(os.path.join(self.public, "index.html"), "<html></html>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        report = self.sync()
+        self.assertEqual(report["removed"], [os.path.join("images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_hardlink_mode(self):
+        report = self.sync(link_mode="hardlink")
+        self.assertEqual(len(report["hardlink"]), 2)
+        src = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(src.st_ino, dest.st_ino)
+
+    def test_hardlinked_source_edited_in_place_is_not_unchanged(self):
+        self.sync(link_mode="hardlink")
+        source = os.path.join(self.static, "index.css")
+        # Same size, same inode as the published file
+        self.write(source, "body{} ")
+        os.utime(source, ns=(10**18, 10**18))
+        report = self.sync(link_mode="hardlink")
+        self.assertEqual(report["hardlink"], ["index.css"])
+
+    def test_hash_check_leaves_hardlinked_mtime_alone(self):
+        self.sync(link_mode="hardlink", use_hash=True)
+        source = os.path.join(self.static, "index.css")
+        os.utime(source, ns=(0, 0))
+        report = self.sync(link_mode="hardlink", use_hash=True)
+        self.assertEqual((report["hardlink"], report["unchanged"]), ([], 2))
+        self.assertEqual(os.stat(source).st_mtime_ns, 0)
+
+    def test_reflink_falls_back_to_copy(self):
+        report = self.sync(link_mode="reflink")
+        self.assertEqual(len(report["copied"]) + len(report["reflink"]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+
+from markdown_core import markdown_to_html_node
+from synthetic_corpus import generate_corpus
+
+class TestSyntheticCorpus(unittest.TestCase):
+
+    def test_corpus_is_deterministic_and_renders(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            options = {"pages": 12, "page_size": 1500, "link_density": 0.3,
+                       "quote_depth": 3, "code_ratio": 0.2, "pages_per_dir": 5}
+            paths = generate_corpus(first, **options)
+            other = generate_corpus(second, **options)
+            self.assertEqual(len(paths), 12)
+            self.assertEqual(len(os.listdir(first)), 3)
+            for path, other_path in zip(paths, other):
+                with open(path) as f, open(other_path) as g:
+                    markdown = f.read()
+                    self.assertEqual(markdown, g.read())
+                self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div><h1>"))
+
+if __name__ == "__main__":
+    unittest.main()
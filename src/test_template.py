@@ -0,0 +1,140 @@
+import os
+import tempfile
+import time
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, TemplateSet, load_template
+
+class TestTemplate(unittest.TestCase):
+
+    def test_render_all_placeholders(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        html = template.render({"Title": "Hello", "Content": "<p>Hi</p>"})
+        self.assertEqual(html, "<title>Hello</title><body><p>Hi</p></body>")
+
+    def test_compiled_segments(self):
+        template = Template("a{{ X }}b{{Y}}c")
+        self.assertEqual(template.iter_render({"X": "1", "Y": "2"}), ["a", "1", "b", "2", "c"])
+
+    def test_repeated_placeholder(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render({"Title": "T"}), "T - T")
+
+    def test_no_placeholders(self):
+        self.assertEqual(Template("static").render({}), "static")
+
+    def test_missing_value_raises_error(self):
+        template = Template("{{ Title }}")
+        with self.assertRaises(ValueError):
+            template.render({})
+
+    def test_node_values_are_streamed(self):
+        content = ParentNode("p", [LeafNode("b", "hi")])
+        self.assertEqual(Template("<main>{{ Content }}</main>").render({"Content": content}),
+                         "<main><p><b>hi</b></p></main>")
+
+    def test_loops_and_conditions(self):
+        template = Template(
+            "{% if tags %}<ul>{% for tag in tags %}<li>{{ tag.name | upper }}</li>{% endfor %}</ul>"
+            "{% else %}untagged{% endif %}{% if not page.draft %}!{% endif %}"
+        )
+        values = {"tags": [{"name": "a"}, {"name": "b"}], "page": {"draft": False}}
+        self.assertEqual(template.render(values), "<ul><li>A</li><li>B</li></ul>!")
+        self.assertEqual(template.render({"tags": [], "page": {}}), "untagged!")
+
+    def test_filters(self):
+        template = Template("{{ title | escape }} {{ tags | join }}")
+        self.assertEqual(template.render({"title": "<a & b>", "tags": ["x", "y"]}),
+                         "&lt;a &amp; b&gt; x, y")
+
+    def test_missing_attribute_raises_error(self):
+        with self.assertRaises(ValueError):
+            Template("{{ page.title }}").render({"page": {}})
+
+    def test_invalid_templates(self):
+        for source in ("{% for x in items %}", "{% endif %}", "{{ 1 + 2 }}", "{{ x | nope }}",
+                       "{% frobnicate %}", "{% block a %}{% block a %}{% endblock %}{% endblock %}"):
+            with self.assertRaises(ValueError, msg=source):
+                Template(source)
+
+class TestTemplateFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html",
+                   "<title>{% block title %}{{ Title }}{% endblock %}</title>"
+                   "{% include \"partials/nav.html\" %}<main>{% block main %}{{ Content }}{% endblock %}</main>")
+        self.write("partials/nav.html", "<nav>home</nav>")
+        self.write("layouts/blog.html",
+                   "{% extends \"template.html\" %}{% block main %}<article>{{ Content }}</article>{% endblock %}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_includes_and_blocks(self):
+        html = load_template(self.path("template.html")).render({"Title": "T", "Content": "c"})
+        self.assertEqual(html, "<title>T</title><nav>home</nav><main>c</main>")
+
+    def test_layout_overrides_blocks(self):
+        template = load_template(self.path("layouts/blog.html"), self.root)
+        html = template.render({"Title": "T", "Content": "c"})
+        self.assertEqual(html, "<title>T</title><nav>home</nav><main><article>c</article></main>")
+
+    def test_compiled_template_is_reused_until_a_dependency_changes(self):
+        path = self.path("template.html")
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        # Touching a file without changing it keeps the compiled template
+        os.utime(self.path("partials/nav.html"), ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        self.assertIs(load_template(path), first)
+        self.write("partials/nav.html", "<nav>changed</nav>")
+        second = load_template(path)
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.digest, first.digest)
+        self.assertIn("<nav>changed</nav>", second.render({"Title": "", "Content": ""}))
+
+    def test_section_layouts(self):
+        templates = TemplateSet(self.path("template.html"), self.path("content"))
+        self.assertEqual(templates.path_for(self.path("content/blog/2024/post.md")),
+                         self.path("layouts/blog.html"))
+        self.assertEqual(templates.path_for(self.path("content/about.md")), self.path("template.html"))
+        self.assertEqual(templates.path_for(self.path("content/docs/intro.md")), self.path("template.html"))
+
+    def test_section_layouts_added_and_removed_later(self):
+        templates = TemplateSet(self.path("template.html"), self.path("content"))
+        post = self.path("content/blog/2024/post.md")
+        layout = self.write("layouts/blog/2024.html", "<i>{{ Content }}</i>")
+        self.assertEqual(templates.path_for(post), layout)
+        os.remove(layout)
+        self.assertEqual(templates.path_for(post), self.path("layouts/blog.html"))
+        docs = self.path("content/docs/intro.md")
+        self.assertEqual(templates.path_for(docs), self.path("template.html"))
+        self.write("layouts/docs.html", "<b>{{ Content }}</b>")
+        self.assertEqual(templates.path_for(docs), self.path("layouts/docs.html"))
+
+    def test_set_digest_covers_layouts(self):
+        templates = TemplateSet(self.path("template.html"), self.path("content"))
+        before = templates.digest()
+        self.write("layouts/blog.html", "{% extends \"template.html\" %}")
+        self.assertNotEqual(templates.digest(), before)
+
+    def test_extends_cycle_raises_error(self):
+        self.write("a.html", "{% extends \"b.html\" %}")
+        self.write("b.html", "{% extends \"a.html\" %}")
+        with self.assertRaises(ValueError):
+            load_template(self.path("a.html"))
+
+if __name__ == "__main__":
+    unittest.main()
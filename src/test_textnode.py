@@ -321,6 +321,57 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(text_to_textnodes(text), expected)
 
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](/p{i})" for i in range(50))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 99)
+        self.assertEqual(nodes[-1], TextNode("l49", "link", "/p49"))
+
+    def test_literal_brackets_kept_as_text(self):
+        text = "a [not a link] and ![not an image] (x)"
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, "text")])
+
+    def test_inner_bracket_starts_link(self):
+        text = "[[link](https://link.com)"
+        expected = [
+            TextNode("[", "text"),
+            TextNode("link", "link", "https://link.com"),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_unmatched_delimiter_raises_error(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **unclosed bold")
+
+    # Interleaved constructs: whichever opens first claims its whole span and
+    # its contents stay literal text; nothing nests.
+    def test_delimiters_inside_link_label_stay_literal(self):
+        self.assertEqual(text_to_textnodes("[link **bold**](url)"),
+                         [TextNode("link **bold**", "link", "url")])
+        self.assertEqual(text_to_textnodes("![alt `x`](i.png)"),
+                         [TextNode("alt `x`", "image", "i.png")])
+        self.assertEqual(text_to_textnodes("[a*b](u) and *c*"), [
+            TextNode("a*b", "link", "u"),
+            TextNode(" and ", "text"),
+            TextNode("c", "italic"),
+        ])
+
+    def test_delimiters_inside_link_url_stay_literal(self):
+        self.assertEqual(text_to_textnodes("[x](u *y*) *z*"), [
+            TextNode("x", "link", "u *y*"),
+            TextNode(" ", "text"),
+            TextNode("z", "italic"),
+        ])
+
+    def test_links_inside_delimiters_stay_literal(self):
+        self.assertEqual(text_to_textnodes("**bold [link](u) more**"),
+                         [TextNode("bold [link](u) more", "bold")])
+        self.assertEqual(text_to_textnodes("`[not](a link)`"), [TextNode("[not](a link)", "code")])
+
+    def test_delimiter_opened_before_link_closes_inside_it(self):
+        self.assertEqual(text_to_textnodes("*a [b*](u)"),
+                         [TextNode("a [b", "italic"), TextNode("](u)", "text")])
+
 class TestMarkdownToBlocks(unittest.TestCase):
 
     def test_single_heading(self):
@@ -0,0 +1,117 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from markdown_core import markdown_to_html_node
+from transforms import (REMOVE, ExternalLinks, HeadingAnchors, Transform,
+                        apply_transforms, render_transformed)
+
+class Recorder(Transform):
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def enter(self, node, parent):
+        self.events.append((self.name, "enter", node.tag))
+
+    def leave(self, node, parent):
+        self.events.append((self.name, "leave", node.tag))
+
+class Replace(Transform):
+    def __init__(self, tag, make, on="enter"):
+        self.tag = tag
+        self.make = make
+        self.on = on
+
+    def enter(self, node, parent):
+        if self.on == "enter" and node.tag == self.tag:
+            return self.make(node)
+
+    def leave(self, node, parent):
+        if self.on == "leave" and node.tag == self.tag:
+            return self.make(node)
+
+def sample_tree():
+    return ParentNode("div", [
+        ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")]),
+        LeafNode("i", "italic"),
+    ])
+
+class TestWalk(unittest.TestCase):
+
+    def test_transforms_share_one_depth_first_pass(self):
+        events = []
+        apply_transforms(sample_tree(), [Recorder("a", events), Recorder("b", events)])
+        self.assertEqual(events, [
+            ("a", "enter", "div"), ("b", "enter", "div"),
+            ("a", "enter", "p"), ("b", "enter", "p"),
+            ("a", "enter", "b"), ("b", "enter", "b"),
+            ("a", "leave", "b"), ("b", "leave", "b"),
+            ("a", "enter", None), ("b", "enter", None),
+            ("a", "leave", None), ("b", "leave", None),
+            ("a", "leave", "p"), ("b", "leave", "p"),
+            ("a", "enter", "i"), ("b", "enter", "i"),
+            ("a", "leave", "i"), ("b", "leave", "i"),
+            ("a", "leave", "div"), ("b", "leave", "div"),
+        ])
+
+    def test_fused_serialization_matches_to_html(self):
+        markdown = "# Title\n\nSome **bold** [link](/x)\n\n> quote\n\n* a\n* b"
+        expected = markdown_to_html_node(markdown).to_html()
+        _, html = render_transformed(markdown_to_html_node(markdown), [])
+        self.assertEqual(html, expected)
+
+    def test_replace_on_enter_walks_the_replacement(self):
+        events = []
+        replace = Replace("i", lambda node: ParentNode("em", [LeafNode("b", node.value)]))
+        root, html = render_transformed(sample_tree(), [replace, Recorder("r", events)])
+        self.assertEqual(html, "<div><p><b>bold</b> text</p><em><b>italic</b></em></div>")
+        self.assertEqual(root.children[1].tag, "em")
+        self.assertIn(("r", "enter", "em"), events)
+
+    def test_replace_leaf_on_leave(self):
+        replace = Replace("b", lambda node: LeafNode("strong", node.value), on="leave")
+        _, html = render_transformed(sample_tree(), [replace])
+        self.assertEqual(html, "<div><p><strong>bold</strong> text</p><i>italic</i></div>")
+
+    def test_replace_parent_on_leave(self):
+        replace = Replace("p", lambda node: LeafNode("hr", None), on="leave")
+        root = apply_transforms(sample_tree(), [replace])
+        self.assertEqual(root.to_html(), "<div><hr /><i>italic</i></div>")
+        with self.assertRaises(ValueError):
+            render_transformed(sample_tree(), [replace])
+
+    def test_remove(self):
+        remove = Replace("b", lambda node: REMOVE)
+        root, html = render_transformed(sample_tree(), [remove])
+        self.assertEqual(html, "<div><p> text</p><i>italic</i></div>")
+        self.assertEqual(len(root.children[0].children), 1)
+
+    def test_replace_root(self):
+        replace = Replace("div", lambda node: ParentNode("section", node.children))
+        root, html = render_transformed(sample_tree(), [replace])
+        self.assertEqual(root.tag, "section")
+        self.assertTrue(html.startswith("<section><p>"))
+
+class TestBuiltinTransforms(unittest.TestCase):
+
+    def test_heading_anchors(self):
+        markdown = "# Intro\n\n## Some *detail*\n\n## Some detail"
+        _, html = render_transformed(markdown_to_html_node(markdown), [HeadingAnchors()])
+        self.assertIn('<h1 id="intro">', html)
+        self.assertIn('<h2 id="some-detail">', html)
+        self.assertIn('<h2 id="some-detail-1">', html)
+
+    def test_anchor_counts_reset_per_walk(self):
+        anchors = HeadingAnchors()
+        for _ in range(2):
+            _, html = render_transformed(markdown_to_html_node("# Intro"), [anchors])
+            self.assertIn('id="intro"', html)
+
+    def test_external_links(self):
+        markdown = "[in](/docs) and [out](https://example.com)"
+        _, html = render_transformed(markdown_to_html_node(markdown), [ExternalLinks()])
+        self.assertIn('<a href="/docs">', html)
+        self.assertIn('<a href="https://example.com" rel="noopener noreferrer" target="_blank">', html)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from assets import ASSET_MANIFEST_NAME, set_asset_urls
+from images import set_image_sizes
+from metadata import MetadataIndex
+from test_images import png_bytes
+from watch import InotifyWatcher, PollingWatcher, SiteState, collect_changes
+
+class TestSiteState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+        self.cwd = os.getcwd()
+        os.chdir(self.root)  # sync state and the graph live under .ssg-cache in the cwd
+        self.site = SiteState(self.content, self.static, self.template, self.public)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        set_image_sizes({})
+        set_asset_urls({})
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_page_edit_renders_only_that_page(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home\n\nEdited")
+        summary = self.site.apply_changes({path})
+        self.assertEqual(summary["rendered"], [path])
+        self.assertIn("Edited", self.read(os.path.join(self.public, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+
+    def test_deleted_page_removes_output(self):
+        path = os.path.join(self.content, "blog", "post.md")
+        self.site.apply_changes({path})
+        os.remove(path)
+        summary = self.site.apply_changes({path})
+        self.assertEqual(summary["removed"], [path])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_drafts_are_not_published(self):
+        metadata = MetadataIndex(self.content, os.path.join(self.root, "metadata.json"))
+        draft = os.path.join(self.content, "draft.md")
+        self.write(draft, "---\ndraft: true\n---\n# Draft")
+        site = SiteState(self.content, self.static, self.template, self.public, metadata=metadata)
+        self.assertNotIn(draft, site.pages)
+        self.assertEqual(site.apply_changes({draft})["rendered"], [])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "draft.html")))
+        # A published page marked as a draft is taken down
+        path = os.path.join(self.content, "blog", "post.md")
+        site.apply_changes({path})
+        self.write(path, "---\ndraft: true\n---\n# Post")
+        self.assertEqual(site.apply_changes({path})["removed"], [path])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+
+    def test_template_change_rerenders_all_pages(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        summary = self.site.apply_changes({self.template})
+        self.assertTrue(summary["template"])
+        self.assertEqual(len(summary["rendered"]), 2)
+        self.assertTrue(self.read(os.path.join(self.public, "index.html")).startswith("<h1>Home"))
+
+    def test_static_asset_synced(self):
+        path = os.path.join(self.static, "site.css")
+        self.write(path, "body {}")
+        summary = self.site.apply_changes({path})
+        self.assertEqual(summary["assets"], ["site.css"])
+        self.assertEqual(self.read(os.path.join(self.public, "site.css")), "body {}")
+
+    def test_resized_image_rerenders_pages_showing_it(self):
+        image = os.path.join(self.static, "cat.png")
+        with open(image, 'wb') as f:
+            f.write(png_bytes(64, 32))
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home\n\n![cat](/cat.png)")
+        self.site.apply_changes({image, path})
+        self.assertIn('width="64"', self.read(os.path.join(self.public, "index.html")))
+        self.site.apply_changes({os.path.join(self.content, "blog", "post.md")})
+        with open(image, 'wb') as f:
+            f.write(png_bytes(128, 64))
+        summary = self.site.apply_changes({image})
+        self.assertEqual(summary["rendered"], [path])
+        self.assertIn('width="128"', self.read(os.path.join(self.public, "index.html")))
+
+    def test_fingerprinted_asset_edit_rerenders_pages_linking_it(self):
+        css = os.path.join(self.static, "site.css")
+        self.write(css, "body {}")
+        self.write(self.template, '<link href="/site.css">{{ Content }}')
+        site = SiteState(self.content, self.static, self.template, self.public, fingerprint=True)
+        site.apply_changes({css})
+        pages = sorted(site.pages)
+        site.apply_changes(set(pages))
+        with open(os.path.join(self.public, ASSET_MANIFEST_NAME)) as f:
+            first = json.load(f)["/site.css"]
+        self.assertIn(first, self.read(os.path.join(self.public, "index.html")))
+        self.write(css, "body { margin: 0 }")
+        summary = site.apply_changes({css})
+        self.assertEqual(summary["rendered"], pages)
+        with open(os.path.join(self.public, ASSET_MANIFEST_NAME)) as f:
+            second = json.load(f)["/site.css"]
+        self.assertNotEqual(first, second)
+        self.assertTrue(os.path.isfile(os.path.join(self.public, second.lstrip("/"))))
+        self.assertIn(second, self.read(os.path.join(self.public, "blog", "post.html")))
+
+class TestWatchers(unittest.TestCase):
+
+    def check_watcher(self, watcher_class):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.md")
+            watcher = watcher_class([root], [])
+            try:
+                with open(path, 'w') as f:
+                    f.write("# Page")
+                self.assertEqual(collect_changes(watcher, debounce=0.01), {os.path.normpath(path)})
+            finally:
+                watcher.close()
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher(self):
+        self.check_watcher(InotifyWatcher)
+
+    def test_polling_watcher(self):
+        self.check_watcher(lambda dirs, files: PollingWatcher(dirs, files, interval=0.01))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,17 @@
 import re
+import sys
 from markdown_utilities import extract_markdown_images, extract_markdown_links
 from htmlnode import LeafNode  # Importing LeafNode for conversion purposes
+from block_scanner import scan_blocks, classify_block
+from assets import asset_url
+from images import image_size
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url", "alt_text")
+
     def __init__(self, text, text_type, url=None, alt_text=None):
         self.text = text
-        self.text_type = text_type
+        self.text_type = sys.intern(text_type)
         self.url = url
         self.alt_text = alt_text
 
@@ -106,47 +112,123 @@ def text_node_to_html_node(text_node):
     elif text_node.text_type == "link":
         if text_node.url is None:
             raise ValueError("Link nodes require a URL.")
-        return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
+        return LeafNode(tag="a", value=text_node.text, props={"href": asset_url(text_node.url)})
     
     elif text_node.text_type == "image":
         if text_node.url is None:
             raise ValueError("Image nodes require a URL.")
-        if text_node.alt_text is None:
-            text_node.alt_text = ""
-        return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.alt_text})
+        # The alt text is parsed into text; alt_text only overrides it
+        alt = text_node.alt_text if text_node.alt_text is not None else text_node.text
+        props = {"src": asset_url(text_node.url), "alt": alt}
+        size = image_size(text_node.url)
+        if size is not None:
+            # Lets the browser reserve the box before the image arrives
+            props["width"], props["height"] = str(size[0]), str(size[1])
+        props["loading"] = "lazy"
+        props["decoding"] = "async"
+        return LeafNode(tag="img", value="", props=props)
     
     else:
         raise ValueError(f"Unknown text type: {text_node.text_type}")
 
+INLINE_SPECIAL_CHARS = re.compile(r"[`*!\[]")
+DELIMITER_TEXT_TYPES = {"**": "bold", "*": "italic", "`": "code"}
+
+class _ForwardFinder:
+    # Remembers the last hit for each needle so repeated lookups from
+    # increasing positions never rescan the same stretch of text.
+    def __init__(self, text):
+        self.text = text
+        self.hits = {}
+
+    def find(self, needle, start):
+        hit = self.hits.get(needle)
+        if hit is None or (hit != -1 and hit < start):
+            hit = self.text.find(needle, start)
+            self.hits[needle] = hit
+        return hit
+
+def _scan_bracketed(text, finder, start):
+    # Matches "[label](url)" starting at text[start] == "[", with the same
+    # shortest-match, single-line rules as extract_markdown_links.
+    close = finder.find("](", start + 1)
+    if close == -1:
+        return None
+    # Labels never contain "[": an inner bracket starts the real candidate
+    inner = finder.find("[", start + 1)
+    if inner != -1 and inner < close:
+        return None
+    end = finder.find(")", close + 2)
+    if end == -1:
+        return None
+    newline = finder.find("\n", start)
+    if newline != -1 and newline < end:
+        return None
+    return text[start + 1:close], text[close + 2:end], end + 1
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, "text")]
-    
-    nodes = split_nodes_delimiter(nodes, "**", "bold")  # Handle bold (**)
-    nodes = split_nodes_delimiter(nodes, "*", "italic")  # Handle italic (*)
-    nodes = split_nodes_delimiter(nodes, "`", "code")  # Handle code (`)
-    nodes = split_nodes_image(nodes)  # Handle images (![alt](url))
-    nodes = split_nodes_link(nodes)  # Handle links ([text](url))
+    # Single left-to-right pass: literal runs are sliced straight out of the
+    # source and every closing delimiter is located at most once. Whichever
+    # construct opens first claims everything up to its close as literal
+    # text, so "[a **b**](u)" is a link labelled "a **b**" and "**[a](u)**"
+    # is bold text. The old split pipeline ran delimiters before links, so it
+    # split such labels and URLs apart instead.
+    nodes = []
+    finder = _ForwardFinder(text)
+    text_start = 0
+    position = 0
+    length = len(text)
+
+    while position < length:
+        match = INLINE_SPECIAL_CHARS.search(text, position)
+        if match is None:
+            break
+        position = match.start()
+        char = text[position]
+
+        if char == "`" or char == "*":
+            delimiter = "**" if text.startswith("**", position) else char
+            end = finder.find(delimiter, position + len(delimiter))
+            if end == -1:
+                raise ValueError(f"Unmatched delimiter '{delimiter}' in text: {text}")
+            if text_start < position:
+                nodes.append(TextNode(text[text_start:position], "text"))
+            nodes.append(TextNode(text[position + len(delimiter):end],
+                                  DELIMITER_TEXT_TYPES[delimiter]))
+            position = text_start = end + len(delimiter)
+            continue
 
+        if char == "!":
+            if not text.startswith("![", position):
+                position += 1
+                continue
+            found = _scan_bracketed(text, finder, position + 1)
+            if found is None:
+                # A "[" right after "!" can never start a link either
+                position += 2
+                continue
+            text_type = "image"
+            label_start = position
+        else:
+            found = _scan_bracketed(text, finder, position)
+            if found is None:
+                position += 1
+                continue
+            text_type = "link"
+            label_start = position
+
+        label, url, end = found
+        if text_start < label_start:
+            nodes.append(TextNode(text[text_start:label_start], "text"))
+        nodes.append(TextNode(label, text_type, url))
+        position = text_start = end
+
+    if text_start < length:
+        nodes.append(TextNode(text[text_start:], "text"))
     return nodes
 
 def markdown_to_blocks(markdown):
-    raw_blocks = markdown.split("\n\n")
-    blocks = [block.strip() for block in raw_blocks]
-    blocks = [block for block in blocks if block]
-    return blocks
+    return [block.text(markdown) for block in scan_blocks(markdown)]
 
 def block_to_block_type(block):
-    if block.startswith("#") and block.lstrip("#").startswith(" "):
-        return "heading"
-    if block.startswith("```") and block.endswith("```"):
-        return "code"
-    if all(line.startswith(">") for line in block.splitlines()):
-        return "quote"
-    if all(line.startswith(("*", "-")) and line[1:2] == " " for line in block.splitlines()):
-        return "unordered_list"
-    lines = block.splitlines()
-    if all(line.split(". ", 1)[0].isdigit() and line.split(". ", 1)[1] for line in lines):
-        numbers = [int(line.split(". ", 1)[0]) for line in lines]
-        if numbers == list(range(1, len(lines) + 1)):
-            return "ordered_list"
-    return "paragraph"
+    return classify_block(block).kind
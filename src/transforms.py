@@ -0,0 +1,196 @@
+import importlib
+import re
+
+from htmlnode import ParentNode
+
+# Returned from a hook to drop the node from its parent
+REMOVE = object()
+
+class Transform:
+    # Base class for tree transforms. enter runs before a node's children are
+    # visited and leave after; either may return a replacement node, REMOVE,
+    # or None to keep the node. A replacement returned by enter is what the
+    # later transforms and the child walk see.
+    def begin(self, root):
+        # Called once per walk before any node is visited
+        pass
+
+    def enter(self, node, parent):
+        return None
+
+    def leave(self, node, parent):
+        return None
+
+    def key(self):
+        # Identifies the transform and its settings in cache keys
+        return type(self).__name__
+
+class _Frame:
+    __slots__ = ("node", "parent", "index")
+
+    def __init__(self, node, parent, index):
+        self.node = node
+        self.parent = parent
+        self.index = index
+
+def _open_tag(node):
+    if node.tag is None:
+        raise ValueError("ParentNode must have a tag.")
+    if not node.children:
+        raise ValueError("ParentNode must have children.")
+    props_html = node.props_to_html()
+    if props_html:
+        props_html = " " + props_html
+    return f"<{node.tag}{props_html}>"
+
+def _run_hooks(hooks, node, parent):
+    for hook in hooks:
+        result = hook(node, parent)
+        if result is REMOVE:
+            return REMOVE
+        if result is not None:
+            node = result
+    return node
+
+def walk(root, transforms, pieces=None):
+    # One depth-first pass that runs every transform's hooks at each node.
+    # When pieces is a list the finished tree is serialized into it in the
+    # same pass; a ParentNode's start tag is written once its enter hooks
+    # have run, so leave hooks cannot replace it then. Returns the new root.
+    enters = [t.enter for t in transforms if type(t).enter is not Transform.enter]
+    leaves = [t.leave for t in transforms if type(t).leave is not Transform.leave]
+    for transform in transforms:
+        transform.begin(root)
+    # A pseudo-parent holding the root lets the root be replaced like any node
+    holder = [root]
+    stack = [(True, _Frame(root, None, 0))]
+    while stack:
+        entering, frame = stack.pop()
+        node = frame.node
+        siblings = frame.parent.children if frame.parent is not None else holder
+        if entering:
+            node = _run_hooks(enters, node, frame.parent)
+            if node is REMOVE:
+                siblings[frame.index] = None
+                continue
+            siblings[frame.index] = node
+            frame.node = node
+            if isinstance(node, ParentNode):
+                if not isinstance(node.children, list):
+                    node.children = list(node.children)
+                if pieces is not None:
+                    pieces.append(_open_tag(node))
+                stack.append((False, frame))
+                for index in range(len(node.children) - 1, -1, -1):
+                    stack.append((True, _Frame(node.children[index], node, index)))
+                continue
+        # Leaving: leaves reach here straight after enter, parents after their children
+        if isinstance(node, ParentNode) and None in node.children:
+            node.children = [child for child in node.children if child is not None]
+        replacement = _run_hooks(leaves, node, frame.parent)
+        if replacement is REMOVE:
+            if pieces is not None and isinstance(node, ParentNode):
+                raise ValueError(f"Cannot remove <{node.tag}> after its start tag was written.")
+            siblings[frame.index] = None
+            continue
+        if replacement is not node:
+            if pieces is not None and isinstance(node, ParentNode):
+                raise ValueError(f"Cannot replace <{node.tag}> after its start tag was written.")
+            siblings[frame.index] = replacement
+            node = replacement
+        if pieces is not None:
+            if isinstance(node, ParentNode):
+                pieces.append(f"</{node.tag}>")
+            else:
+                pieces.append(node.to_html())
+    if holder[0] is None:
+        raise ValueError("A transform removed the root node.")
+    return holder[0]
+
+def apply_transforms(root, transforms):
+    return walk(root, transforms)
+
+def render_transformed(root, transforms):
+    # Transforms and serializes in a single traversal; returns (root, html)
+    pieces = []
+    root = walk(root, transforms, pieces)
+    return root, "".join(pieces)
+
+# Transforms the build runs on every page, registered by plugins
+_registered = []
+_plugins = []
+
+def register_transform(transform):
+    _registered.append(transform)
+    return transform
+
+def load_plugins(names):
+    # Each name is a built-in transform or a module that calls
+    # register_transform when imported
+    for name in names:
+        if name in BUILTIN_TRANSFORMS:
+            register_transform(BUILTIN_TRANSFORMS[name]())
+        else:
+            importlib.import_module(name)
+        _plugins.append(name)
+
+def loaded_plugins():
+    return tuple(_plugins)
+
+def registered_transforms():
+    return tuple(_registered)
+
+def transforms_key():
+    return "|".join(transform.key() for transform in _registered)
+
+def node_text(node):
+    # Concatenated text of the leaves under node
+    pieces = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ParentNode):
+            stack.extend(reversed(current.children))
+        elif current.value:
+            pieces.append(current.value)
+    return "".join(pieces)
+
+def slugify(text):
+    return re.sub(r"[^\w]+", "-", text.lower()).strip("-") or "section"
+
+class HeadingAnchors(Transform):
+    # Gives every heading a unique id derived from its text
+    HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+
+    def begin(self, root):
+        self.seen = {}
+
+    def enter(self, node, parent):
+        if node.tag not in self.HEADING_TAGS or "id" in node.props:
+            return None
+        slug = slugify(node_text(node))
+        count = self.seen.get(slug, 0)
+        self.seen[slug] = count + 1
+        if count:
+            slug = f"{slug}-{count}"
+        node.props = {**node.props, "id": slug}
+        return None
+
+class ExternalLinks(Transform):
+    # Marks absolute http(s) links so they open safely in a new tab
+    def __init__(self, rel="noopener noreferrer", target="_blank"):
+        self.rel = rel
+        self.target = target
+
+    def key(self):
+        return f"ExternalLinks({self.rel!r},{self.target!r})"
+
+    def enter(self, node, parent):
+        if node.tag == "a" and node.props.get("href", "").startswith(("http://", "https://")):
+            node.props = {**node.props, "rel": self.rel, "target": self.target}
+        return None
+
+BUILTIN_TRANSFORMS = {
+    "heading-anchors": HeadingAnchors,
+    "external-links": ExternalLinks,
+}
@@ -0,0 +1,412 @@
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from assets import asset_urls, fingerprint_assets, set_asset_urls, write_asset_manifest
+from build_stats import QUIET, BuildStats
+from depgraph import DEFAULT_DEPGRAPH_PATH, SOURCE, TEMPLATE, DependencyGraph
+from images import IMAGE_EXTENSIONS, image_sizes, index_images, set_image_sizes
+from incremental import generate_pages_incremental
+from links import collect_links
+from markdown_core import find_pages, parse_page, render_content, write_page
+from markdown_utilities import remove_output, sync_static_files, sync_static_paths
+from metadata import MetadataIndex
+from template import TemplateSet
+from transforms import BUILTIN_TRANSFORMS, load_plugins
+
+# Returned by a watcher when it may have missed events and everything must be rescanned
+RESCAN = "*"
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    # Recursive directory watches through the Linux inotify syscalls, so an
+    # edit is noticed as soon as it happens instead of on the next scan.
+    def __init__(self, dirs, files):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        self.file_only = set()
+        # Single files are watched through their directory: editors usually
+        # replace a file by renaming over it, which would orphan a file watch.
+        self.files = {os.path.normpath(path) for path in files}
+        for path in self.files:
+            wd = self._watch_dir(os.path.dirname(path) or ".")
+            self.file_only.add(wd)
+        for path in dirs:
+            self._watch_tree(os.path.normpath(path))
+
+    def _watch_dir(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = path
+        return wd
+
+    def _watch_tree(self, root):
+        for dirpath, _, _ in os.walk(root):
+            # inotify hands back the same descriptor for a directory watched twice
+            self.file_only.discard(self._watch_dir(dirpath))
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(RESCAN)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.normpath(os.path.join(parent, name))
+            if wd in self.file_only and path not in self.files:
+                continue
+            if mask & IN_ISDIR:
+                # Attribute changes on a directory say nothing about its pages
+                if not mask & (IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    # Portable fallback: compares (mtime, size) snapshots of every file.
+    def __init__(self, dirs, files, interval=0.25):
+        self.dirs = [os.path.normpath(path) for path in dirs]
+        self.files = [os.path.normpath(path) for path in files]
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        paths = list(self.files)
+        for root in self.dirs:
+            for dirpath, _, names in os.walk(root):
+                paths.extend(os.path.join(dirpath, name) for name in names)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path, key in snapshot.items() if self.snapshot.get(path) != key}
+        changed.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+def create_watcher(dirs, files, polling=False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs, files)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(dirs, files)
+
+def collect_changes(watcher, debounce=0.02, max_delay=0.2):
+    # Blocks for the first change, then keeps gathering until the tree has been
+    # quiet for `debounce` seconds, so a save burst becomes one rebuild.
+    changed = set()
+    while not changed:
+        changed = watcher.wait(1.0)
+    deadline = time.monotonic() + max_delay
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return changed
+        more = watcher.wait(min(debounce, remaining))
+        if not more:
+            return changed
+        changed |= more
+
+def _is_under(path, root):
+    return path == root or path.startswith(root + os.sep)
+
+class SiteState:
+    # In-memory view of the site: the compiled template, the page map and
+    # the serialized body of every page rendered so far. A template edit then
+    # only costs template fill and write for pages already parsed. With a
+    # metadata index, draft pages are left out, as in a normal build. Pages
+    # record their edges in the dependency graph as they are rendered, which
+    # says which pages an edited image, or with fingerprint set a static file
+    # whose hash changed, shows up in.
+    def __init__(self, content_dir, static_dir, template_path, public_dir, metadata=None, graph=None,
+                 fingerprint=False):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.public_dir = public_dir
+        self.metadata = metadata
+        self.fingerprint = fingerprint
+        if graph is None:
+            graph = DependencyGraph(DEFAULT_DEPGRAPH_PATH, self.content_dir, self.static_dir, public_dir)
+        self.graph = graph
+        self.templates = TemplateSet(self.template_path, self.content_dir)
+        self.pages = self.find_pages()
+        self.parsed = {}
+
+    def find_pages(self):
+        return {os.path.normpath(src): dest for src, dest in find_pages(self.content_dir, self.public_dir)
+                if self.published(src)}
+
+    def published(self, from_path):
+        return self.metadata is None or not self.metadata.is_draft(from_path)
+
+    def dest_path(self, from_path):
+        rel_path = os.path.relpath(from_path, self.content_dir)
+        return os.path.join(self.public_dir, rel_path[:-len(".md")] + ".html")
+
+    def render(self, from_path, reasons):
+        parsed = self.parsed.get(from_path)
+        if parsed is None:
+            with open(from_path, 'r') as f:
+                title, html_node, meta = parse_page(f.read(), source=from_path)
+            # Kept serialized: a template edit only refills the template
+            parsed = title, render_content(html_node), meta
+            self.parsed[from_path] = parsed
+        title, content, meta = parsed
+        dest_path = self.pages[from_path]
+        write_page(dest_path, self.templates.for_page(from_path), title, content, meta=meta)
+        edges = self.graph.page_edges(from_path, dest_path, self.public_dir, self.templates,
+                                      collect_links(content)[0])
+        self.graph.record(self.graph.output_key(dest_path, self.public_dir), edges, reasons)
+
+    def refresh_images(self):
+        # Re-reads the headers of changed images; returns the static paths
+        # whose dimensions changed
+        old = image_sizes()
+        sizes, _ = index_images(self.static_dir)
+        set_image_sizes(sizes)
+        urls = {url for url in set(old) | set(sizes) if old.get(url) != sizes.get(url)}
+        return [os.path.join(self.static_dir, *url.lstrip("/").split("/")) for url in urls]
+
+    def refresh_assets(self):
+        # Places the fingerprinted copies of changed static files and points
+        # links at them; returns the static paths whose URL changed
+        old = asset_urls()
+        urls, _ = fingerprint_assets(self.static_dir, self.public_dir)
+        if urls == old:
+            return []
+        set_asset_urls(urls)
+        write_asset_manifest(self.public_dir, urls)
+        return [os.path.join(self.static_dir, *url.lstrip("/").split("/"))
+                for url in set(old) | set(urls) if old.get(url) != urls.get(url)]
+
+    def dependent_pages(self, paths):
+        # {source: reasons} for the pages rendered from any of paths
+        sources = {self.graph.output_key(dest, self.public_dir): src for src, dest in self.pages.items()}
+        return {sources[output]: reasons for output, reasons in self.graph.dirty_outputs(paths).items()
+                if output in sources}
+
+    def update_page(self, from_path):
+        self.parsed.pop(from_path, None)
+        # A page turned into a draft is taken down like a deleted one
+        if os.path.isfile(from_path) and self.published(from_path):
+            self.pages[from_path] = self.dest_path(from_path)
+            self.render(from_path, [[from_path, SOURCE, "changed"]])
+            return "rendered"
+        dest_path = self.pages.pop(from_path, None)
+        if dest_path is None:
+            return None
+        remove_output(dest_path, self.public_dir)
+        self.graph.remove(self.graph.output_key(dest_path, self.public_dir))
+        return "removed"
+
+    def apply_changes(self, changed):
+        summary = {"rendered": [], "removed": [], "assets": [], "template": False}
+        if RESCAN in changed:
+            self.templates = TemplateSet(self.template_path, self.content_dir)
+            self.parsed.clear()
+            self.refresh_images()
+            if self.fingerprint:
+                self.refresh_assets()
+            generate_pages_incremental(self.content_dir, self.template_path, self.public_dir,
+                                       stats=_silent_stats(), metadata=self.metadata,
+                                       static_dir=self.static_dir, graph=self.graph)
+            sync_static_files(self.static_dir, self.public_dir)
+            self.pages = self.find_pages()
+            summary["template"] = True
+            return summary
+
+        page_paths = set()
+        asset_paths = set()
+        template_paths = []
+        for path in changed:
+            if path == self.template_path or any(_is_under(path, root) for root in self.templates.dirs()):
+                summary["template"] = True
+                template_paths.append(path)
+            elif _is_under(path, self.content_dir):
+                if os.path.isdir(path):
+                    page_paths.update(os.path.normpath(src) for src, _ in find_pages(path, self.public_dir))
+                elif path.endswith(".md"):
+                    page_paths.add(path)
+                # A removed or renamed directory only reports itself
+                page_paths.update(src for src in self.pages if _is_under(src, path))
+            elif _is_under(path, self.static_dir):
+                if os.path.isdir(path):
+                    for dirpath, _, names in os.walk(path):
+                        asset_paths.update(os.path.join(dirpath, name) for name in names)
+                else:
+                    asset_paths.add(path)
+
+        # Image dimensions and asset URLs are baked into the parsed body, so
+        # the pages showing a resized image or a renamed asset are parsed again
+        stale = []
+        if any(path.lower().endswith(IMAGE_EXTENSIONS) for path in asset_paths):
+            stale.extend(self.refresh_images())
+        if asset_paths and self.fingerprint:
+            stale.extend(self.refresh_assets())
+        outdated = self.dependent_pages(stale) if stale else {}
+        for from_path in outdated:
+            self.parsed.pop(from_path, None)
+
+        for from_path in sorted(page_paths):
+            action = self.update_page(from_path)
+            if action is not None:
+                summary[action].append(from_path)
+
+        if summary["template"]:
+            # Layouts may have been added or removed; compiled templates
+            # themselves are reused unless their files changed
+            self.templates = TemplateSet(self.template_path, self.content_dir)
+            reasons = [[path, TEMPLATE, "changed"] for path in sorted(template_paths)]
+            for from_path in sorted(self.pages):
+                if from_path not in page_paths:
+                    self.render(from_path, reasons)
+                    summary["rendered"].append(from_path)
+
+        for from_path in sorted(outdated):
+            if from_path in self.pages and from_path not in summary["rendered"]:
+                self.render(from_path, outdated[from_path])
+                summary["rendered"].append(from_path)
+
+        if asset_paths:
+            rel_paths = [os.path.relpath(path, self.static_dir) for path in asset_paths]
+            report = sync_static_paths(self.static_dir, self.public_dir, rel_paths)
+            summary["assets"] = (report["copied"] + report["hardlink"] + report["reflink"]
+                                 + report["removed"])
+        return summary
+
+    def save(self):
+        self.graph.save()
+        if self.metadata is not None:
+            self.metadata.save()
+
+def _silent_stats():
+    return BuildStats(QUIET)
+
+def watch(site, watcher, debounce=0.02):
+    print(f"Watching {site.content_dir}, {site.static_dir} and {site.template_path}")
+    while True:
+        changed = collect_changes(watcher, debounce)
+        start = time.perf_counter()
+        try:
+            summary = site.apply_changes(changed)
+        except Exception as error:
+            # Keep watching: the next save usually fixes a half-written page
+            print(f"Rebuild failed: {error}")
+            continue
+        site.save()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Rebuilt in {elapsed:.1f}ms: {len(summary['rendered'])} page(s) rendered, "
+              f"{len(summary['removed'])} removed, {len(summary['assets'])} asset(s) synced"
+              + (", template reloaded" if summary["template"] else ""))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the site as its sources change.")
+    parser.add_argument("--polling", action="store_true", help="poll for changes instead of using inotify")
+    parser.add_argument("--debounce", type=float, default=0.02,
+                        help="seconds of quiet that end a burst of changes")
+    parser.add_argument("--drafts", action="store_true",
+                        help="also build pages whose front matter says draft: true")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also publish static files under content-hashed names, as the build does")
+    parser.add_argument("--plugin", action="append", default=[], metavar="NAME",
+                        help="run a page transform: a built-in one ("
+                             + ", ".join(sorted(BUILTIN_TRANSFORMS))
+                             + ") or a module that registers its own; may be repeated")
+    args = parser.parse_args(argv)
+
+    static_dir = "static"
+    public_dir = "public"
+    content_dir = "content"
+    template_path = "template.html"
+
+    # Pass the build's plugins, or the startup build redoes every page without them
+    load_plugins(args.plugin)
+    # Start from an up-to-date public/ so only live edits need handling
+    metadata = None if args.drafts else MetadataIndex(content_dir)
+    sync_static_files(static_dir, public_dir)
+    sizes, _ = index_images(static_dir)
+    set_image_sizes(sizes)
+    urls = {}
+    if args.fingerprint:
+        urls, _ = fingerprint_assets(static_dir, public_dir)
+        write_asset_manifest(public_dir, urls)
+    set_asset_urls(urls)
+    graph = DependencyGraph(DEFAULT_DEPGRAPH_PATH, content_dir, static_dir, public_dir)
+    generate_pages_incremental(content_dir, template_path, public_dir, stats=_silent_stats(),
+                               metadata=metadata, static_dir=static_dir, graph=graph)
+
+    site = SiteState(content_dir, static_dir, template_path, public_dir, metadata=metadata, graph=graph,
+                     fingerprint=args.fingerprint)
+    site.save()
+    watcher = create_watcher([content_dir, static_dir] + site.templates.dirs(), [template_path],
+                             polling=args.polling)
+    try:
+        watch(site, watcher, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    main()
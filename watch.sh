@@ -0,0 +1,6 @@
+#!/bin/bash
+python3 src/main.py --incremental --quiet
+python3 src/watch.py "$@" &
+WATCH_PID=$!
+trap 'kill $WATCH_PID' EXIT
+cd public && python3 -m http.server 8888